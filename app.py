@@ -1,7 +1,12 @@
+# First, so .env settings are in place before the modules below read them
+from modules import env  # noqa: F401
+import importlib
 import streamlit as st
 from authentication import login, sign_up, is_logged_in, get_logged_in_user,login_user
-from modules.module1 import run_module_1
-from modules.module2 import run_module_2
+from modules import resources
+
+# Page modules (and reportlab, Gemini, PyMuPDF behind them) load on first use or in the background warmup
+resources.warm_in_background()
 
 # Load custom CSS for dark theme
 st.markdown(
@@ -63,11 +68,11 @@ else:
 
     elif option == "Module 1":
         st.title("Stock Comparison")
-        run_module_1()
+        importlib.import_module("modules.module1").run()
 
     elif option == "Module 2":
         st.title("Multimodal Chatbot")
-        run_module_2()
+        importlib.import_module("modules.module2").run()
 if 'authenticated' not in st.session_state:
     st.session_state['authenticated'] = False
 def show_login():
@@ -88,10 +93,10 @@ if st.session_state['authenticated']:
     if option == "Stock Comparison":
         # run module 1
         import modules.module1 as m1
-        m1.run_module()
+        m1.run()
     
     elif option == "Gemini PDF Chatbot":
         import modules.module2 as m2
-        m2.run_module()
+        m2.run()
 else:
     show_login()
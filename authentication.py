@@ -1,21 +1,133 @@
+import base64
+import hashlib
+import hmac
 import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
-import requests
-# Mock database for users
-USER_DB = "users.json"
+from modules import backend_client
 
-def load_users():
-    """Load users from the mock database (users.json)."""
+logger = logging.getLogger(__name__)
+
+# User database (SQLite, one indexed row per user)
+USER_DB = "users.sqlite3"
+# Legacy plaintext store, migrated once into USER_DB
+LEGACY_USER_DB = "users.json"
+
+# PBKDF2-SHA256 cost; raise it as hardware gets faster. Existing hashes keep their own count.
+HASH_ITERATIONS = int(os.getenv("AUTH_HASH_ITERATIONS", 600_000))
+
+# Recently verified logins skip the slow hash on reruns
+VERIFIED_CACHE_TTL = 15 * 60
+VERIFIED_CACHE_SIZE = 1024
+
+_local = threading.local()
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+# Per-process key so cached entries never hold anything derived from a password alone
+_cache_key = secrets.token_bytes(32)
+_migration_lock = threading.Lock()
+_migrated = False
+
+def get_connection():
+    """Return this thread's connection to the user database, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(USER_DB, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " username TEXT PRIMARY KEY,"
+            " email TEXT,"
+            " password_hash TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        _local.conn = conn
+        migrate_legacy_users(conn)
+    return conn
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    """Salted PBKDF2-SHA256 in Django's "pbkdf2_sha256$iterations$salt$hash" format."""
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${base64.b64encode(digest).decode()}"
+
+def verify_password(password, password_hash):
+    """Check a password against a stored hash, using the cost recorded in the hash."""
+    try:
+        algorithm, iterations, salt, _ = password_hash.split("$", 3)
+    except ValueError:
+        return False
+    if algorithm != "pbkdf2_sha256":
+        return False
+    return hmac.compare_digest(hash_password(password, salt, int(iterations)), password_hash)
+
+def migrate_legacy_users(conn):
+    """One-shot import of users.json (plaintext passwords) into the hashed user table.
+
+    The hashes are committed under SQLite's write lock (BEGIN IMMEDIATE) and then
+    the plaintext file is deleted. Several processes can start at once: one that
+    finds the file gone has nothing left to do, and one that runs between the
+    commit and the delete only re-inserts users that already exist, which are
+    ignored. Hashing happens before taking the lock, so it is not held for seconds.
+    A file that can not be read as users is left alone, since nothing was imported.
+    """
+    global _migrated
+    with _migration_lock:
+        if _migrated:
+            return
+        rows = _legacy_rows()
+        if rows is not None:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have imported and deleted it while we were hashing
+                if os.path.exists(LEGACY_USER_DB):
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO users (username, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            _remove(LEGACY_USER_DB)
+        # Earlier builds kept the plaintext next to the database after importing it
+        _remove(f"{LEGACY_USER_DB}.migrated")
+        _migrated = True
+
+def _remove(path):
     try:
-        with open(USER_DB, "r") as file:
-            return json.load(file)
+        os.remove(path)
     except FileNotFoundError:
-        return {}
+        pass
 
-def save_users(users):
-    """Save users to the mock database (users.json)."""
-    with open(USER_DB, "w") as file:
-        json.dump(users, file)
+def _legacy_rows():
+    """User rows from users.json with hashed passwords, or None if there is nothing to migrate."""
+    try:
+        with open(LEGACY_USER_DB, "r") as file:
+            users = json.load(file)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        users = None
+    if not isinstance(users, dict):
+        logger.warning("%s is not a JSON object of users; nothing imported from it", LEGACY_USER_DB)
+        return None
+    rows = []
+    for username, user in users.items():
+        if not isinstance(user, dict) or not isinstance(user.get("password"), str):
+            logger.warning("skipping malformed user record %r in %s", username, LEGACY_USER_DB)
+            continue
+        rows.append((username, user.get("email"), hash_password(user["password"]), time.time()))
+    return rows
+
+def _verified_key(username, password):
+    return hmac.new(_cache_key, f"{username}\0{password}".encode(), hashlib.sha256).digest()
 
 def is_logged_in():
     """Check if the user is logged in by checking session state."""
@@ -27,22 +139,39 @@ def get_logged_in_user():
 
 def login(username, password):
     """Handle user login."""
-    users = load_users()
-    if username in users and users[username]["password"] == password:
-        return True
-    return False
+    key = _verified_key(username, password)
+    with _verified_lock:
+        verified_at = _verified.get(key)
+        if verified_at is not None and time.time() - verified_at < VERIFIED_CACHE_TTL:
+            _verified.move_to_end(key)
+            return True
+
+    row = get_connection().execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None or not verify_password(password, row[0]):
+        return False
+
+    with _verified_lock:
+        _verified[key] = time.time()
+        _verified.move_to_end(key)
+        while len(_verified) > VERIFIED_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return True
 
 def sign_up(username, email, password):
     """Handle user signup."""
-    users = load_users()
-    if username in users:
+    try:
+        # The primary key makes the existence check and the insert one atomic step
+        get_connection().execute(
+            "INSERT INTO users (username, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
+            (username, email, hash_password(password), time.time()),
+        )
+    except sqlite3.IntegrityError:
         return False  # Username already exists
-
-    # Save new user
-    users[username] = {"email": email, "password": password}
-    save_users(users)
     return True
 def login_user(username, password):
-    url = "http://127.0.0.1:8000/accounts/api/login/"
-    response = requests.post(url, json={"username": username, "password": password})
-    return response.status_code == 200
+    """Log in through the Django backend and keep its tokens in the session."""
+    response = backend_client.login(username, password)
+    if response.status_code != 200:
+        return False
+    st.session_state["tokens"] = {key: response.json()[key] for key in ("access", "refresh")}
+    return True
@@ -0,0 +1,114 @@
+"""
+Technical indicator cost over 20 years of daily bars for 1, 100 and 1,000 symbols.
+
+Prices are synthetic random walks (--years x 252 trading days, all symbols on
+the same dates) served to ``modules.indicators.IndicatorCache`` from memory
+instead of the timeseries store, so disk speed does not enter into it. For
+every indicator and symbol count:
+
+  batch      cold cache: the whole history computed as one days x symbols matrix
+  looped     the same, one symbol at a time (what batching saves)
+  update     warm cache, one new bar per symbol, advanced from the saved state
+  hit        warm cache, nothing new
+
+``max diff`` is the largest gap between the updated series and a full
+recompute that includes the new bar. No network or API key is needed. Run
+from the repository root:
+
+    python -m benchmarks.bench_indicators [--symbols 1,100,1000] [--years 20] [--rounds 3]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from modules import indicators
+
+INDICATORS = [
+    indicators.SMA(50),
+    indicators.SMA(200),
+    indicators.EMA(20),
+    indicators.RSI(14),
+    indicators.MACD(),
+    indicators.Bollinger(),
+    indicators.Volatility(20),
+]
+
+
+class MemoryStore:
+    """Stands in for ``timeseries.load``: ``days`` bars of a shared date range per symbol."""
+
+    def __init__(self, symbols, total_days, seed=0):
+        rng = np.random.default_rng(seed)
+        self.symbols = [f"S{i:04d}" for i in range(symbols)]
+        self.dates = np.arange(total_days, dtype=np.int32) + 7305
+        self.prices = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (total_days, symbols)), axis=0))
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.days = total_days
+
+    def load(self, symbol):
+        return {"date": self.dates[:self.days], "adjusted_close": self.prices[:self.days, self.index[symbol]]}
+
+
+def best(call, rounds, setup=None):
+    samples = []
+    for _ in range(rounds):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def bench(count, days, rounds):
+    store = MemoryStore(count, days + 1)
+    rows = []
+    for indicator in INDICATORS:
+        cache = None
+
+        def cold():
+            nonlocal cache
+            store.days = days
+            cache = indicators.IndicatorCache(loader=store.load)
+
+        def warm():
+            cold()
+            cache.get(store.symbols, indicator)
+            store.days = days + 1
+
+        batch = best(lambda: cache.get(store.symbols, indicator), rounds, cold)
+        looped = best(lambda: [cache.get([symbol], indicator) for symbol in store.symbols], rounds, cold)
+        update = best(lambda: cache.get(store.symbols, indicator), rounds, warm)
+        hit = best(lambda: cache.get(store.symbols, indicator), rounds)
+        assert cache.stats()["updates"] == count and cache.stats()["computes"] == count
+
+        updated = cache.get(store.symbols, indicator)
+        full, _ = indicator.compute(store.prices)
+        diff = max(
+            np.nanmax(np.abs(updated[symbol][name] - full[name][:, i]), initial=0.0)
+            for i, symbol in enumerate(store.symbols)
+            for name in indicator.outputs
+        )
+        rows.append((repr(indicator), batch, looped, update, hit, diff))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", default="1,100,1000", help="comma-separated symbol counts")
+    parser.add_argument("--years", type=int, default=20, help="years of daily bars per symbol")
+    parser.add_argument("--rounds", type=int, default=3, help="timed rounds per measurement (best is reported)")
+    args = parser.parse_args()
+
+    days = args.years * 252
+    for count in (int(value) for value in args.symbols.split(",")):
+        print(f"\n{count} symbols x {days} days")
+        print(f"{'indicator':<22} {'batch ms':>10} {'looped ms':>10} {'update ms':>10} {'hit ms':>8} {'max diff':>10}")
+        for name, batch, looped, update, hit, diff in bench(count, days, args.rounds):
+            print(f"{name:<22} {batch * 1000:>10.2f} {looped * 1000:>10.2f} {update * 1000:>10.3f} {hit * 1000:>8.3f} {diff:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
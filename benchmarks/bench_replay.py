@@ -0,0 +1,128 @@
+"""
+Record Alpha Vantage responses into a fixture store, then load-test replay.
+
+First records GLOBAL_QUOTE, OVERVIEW and TIME_SERIES_DAILY for --symbols
+symbols from the ``mock_servers`` stand-in (the same path a real recording
+takes, with ALPHA_TRANSPORT=record), then replays them with no network:
+
+  fetch     uncached requests for recorded symbols, straight through the transport
+  unseen    the same for symbols never recorded (ALPHA_REPLAY_ANY_SYMBOL)
+  compare   module1.get_stock_information_many for 10 symbols at a time
+            against a warm quote cache, as the comparison page does
+
+and reports requests/s, failures and what replay injected. Run from the
+repository root:
+
+    python -m benchmarks.bench_replay [--symbols 200] [--requests 20000] [--clients 32]
+                                      [--latency 0.0] [--error-rate 0.0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import mock_servers
+from benchmarks.load_market import HOST, wait_until_up
+
+ROOT = Path(__file__).resolve().parent.parent
+MOCK_PORT = 18730
+FUNCTIONS = ["GLOBAL_QUOTE", "OVERVIEW", "TIME_SERIES_DAILY"]
+COMPARE_SIZE = 10
+
+
+def run_load(call, jobs, clients):
+    """Run ``call(job)`` for every job on ``clients`` threads; returns (seconds, failures)."""
+    failures = 0
+
+    def attempt(job):
+        try:
+            call(job)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for ok in pool.map(attempt, jobs, chunksize=64):
+            failures += not ok
+    return time.perf_counter() - start, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=200, help="symbols to record")
+    parser.add_argument("--requests", type=int, default=20000, help="requests per replay scenario")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent client threads")
+    parser.add_argument("--latency", type=float, default=0.0, help="injected replay latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of replayed requests that fail")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="smartstock-replay-")
+    os.environ.update(
+        ALPHA_API_KEY="benchmark",
+        ALPHA_TRANSPORT="record",
+        ALPHA_FIXTURES=os.path.join(workdir, "fixtures.sqlite3"),
+        ALPHA_VANTAGE_URL=f"http://{HOST}:{MOCK_PORT}/query",
+    )
+    sys.path.insert(0, str(ROOT))
+    os.chdir(workdir)
+    from modules import alpha_vantage, module1, transport
+    from modules.rate_limit import RateLimiter
+
+    symbols = [f"R{i:04d}" for i in range(args.symbols)]
+    mock = mock_servers.start(MOCK_PORT)
+    try:
+        wait_until_up(MOCK_PORT)
+        # Recording still goes through the limiter; the stand-in has no quota
+        alpha_vantage.limiter = RateLimiter({"minute": (10**9, 60)})
+        start = time.perf_counter()
+        recorded, failures = run_load(
+            lambda job: alpha_vantage.fetch(job[0], job[1], use_cache=False),
+            [(symbol, function) for symbol in symbols for function in FUNCTIONS], args.clients,
+        )
+    finally:
+        mock.terminate()
+        mock.wait()
+    store = alpha_vantage.transport.store
+    raw = sum(len(store.get({"function": function, "symbol": symbol})) for symbol in symbols for function in FUNCTIONS)
+    stored = sum(stats["bytes"] for stats in store.stats().values())
+    print(f"recorded {len(symbols) * len(FUNCTIONS) - failures} responses in {time.perf_counter() - start:.1f}s,"
+          f" {raw / 1024:.0f} KB raw -> {stored / 1024:.0f} KB stored")
+
+    replay = transport.ReplayTransport(
+        transport.FixtureStore(os.environ["ALPHA_FIXTURES"]), latency=args.latency, error_rate=args.error_rate, any_symbol=True, seed=1,
+    )
+    alpha_vantage.transport = replay
+    rng = random.Random(0)
+
+    def compare(batch):
+        if not all(module1.get_stock_information_many(batch).values()):
+            raise RuntimeError("lookup failed")
+
+    unseen = [f"U{i:04d}" for i in range(args.symbols)]
+    scenarios = {
+        "fetch": (lambda job: alpha_vantage.fetch(*job, use_cache=False),
+                  [(rng.choice(symbols), rng.choice(FUNCTIONS)) for _ in range(args.requests)]),
+        "unseen": (lambda job: alpha_vantage.fetch(*job, use_cache=False),
+                   [(rng.choice(unseen), rng.choice(FUNCTIONS)) for _ in range(args.requests)]),
+        "compare": (compare,
+                    [rng.sample(symbols, COMPARE_SIZE) for _ in range(args.requests // COMPARE_SIZE)]),
+    }
+    # The comparison page reads through the quote cache; fill it first
+    module1.get_stock_information_many(symbols)
+
+    print(f"{'scenario':>8} {'calls':>8} {'failed':>6} {'calls/s':>10} {'replayed':>9}")
+    for name, (call, jobs) in scenarios.items():
+        before = replay.stats()["requests"]
+        elapsed, failures = run_load(call, jobs, args.clients)
+        print(f"{name:>8} {len(jobs):>8} {failures:>6} {len(jobs) / elapsed:>10.0f} {replay.stats()['requests'] - before:>9}")
+    print(f"replay: {replay.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Report rendering throughput for 2, 10 and 50 symbol reports.
+
+Uses synthetic snapshots and 10 years of random-walk prices, so no API key or
+network is needed. Run from the repository root:
+
+    python -m benchmarks.bench_reports [--reports 8]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from modules import reports, timeseries
+from modules.snapshot import StockSnapshot
+
+SYMBOL_COUNTS = [2, 10, 50]
+DAYS = 2520
+
+
+def synthetic_report(n_symbols, seed):
+    """Report data shaped like ``reports.build_report_data`` output."""
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i:02d}" for i in range(n_symbols)]
+    prices = 100 * np.cumprod(1 + rng.normal(0.0004, 0.015, size=(DAYS, n_symbols)), axis=0)
+    dates = np.arange(18000, 18000 + DAYS, dtype=np.int32)
+
+    daily = timeseries.returns(prices)
+    centered = daily - daily.mean(axis=0)
+    stocks = [
+        StockSnapshot(
+            symbol=symbol,
+            name=f"Synthetic Company {i}",
+            price=float(prices[-1, i]),
+            market_cap=rng.uniform(1, 3000) * 1e9,
+            year_high=float(prices[-252:, i].max()),
+            year_low=float(prices[-252:, i].min()),
+            trading_day=int(dates[-1]),
+            fetched_at=0.0,
+        )
+        for i, symbol in enumerate(symbols)
+    ]
+    step = max(1, DAYS // reports.MAX_CHART_POINTS)
+    return {
+        "stocks": stocks,
+        "history": {
+            "symbols": symbols,
+            "start": "2019-04-15",
+            "end": "2029-03-07",
+            "dates": dates[::step].copy(),
+            "growth": (prices / prices[0])[::step],
+            "metrics": {
+                "total_return": prices[-1] / prices[0] - 1,
+                "annualized_return": (prices[-1] / prices[0]) ** 0.1 - 1,
+                "annualized_volatility": daily.std(axis=0, ddof=1) * np.sqrt(timeseries.TRADING_DAYS),
+                "max_drawdown": timeseries.max_drawdown(prices),
+                "beta": centered.T @ centered[:, 0] / (centered[:, 0] @ centered[:, 0]),
+                "benchmark": symbols[0],
+            },
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=8, help="reports rendered per symbol count")
+    args = parser.parse_args()
+
+    # Start the worker processes before timing anything
+    reports.submit_render(synthetic_report(2, seed=-1 % 2**32)).result()
+
+    print(f"{'symbols':>8} {'reports':>8} {'seconds':>8} {'reports/s':>10} {'avg KB':>8}")
+    for n_symbols in SYMBOL_COUNTS:
+        # Distinct seeds so every report misses the cache
+        batch = [synthetic_report(n_symbols, seed=n_symbols * 1000 + i) for i in range(args.reports)]
+        start = time.perf_counter()
+        futures = [reports.submit_render(data) for data in batch]
+        sizes = [len(future.result()) for future in futures]
+        elapsed = time.perf_counter() - start
+        print(f"{n_symbols:>8} {args.reports:>8} {elapsed:>8.2f} {args.reports / elapsed:>10.2f} {np.mean(sizes) / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
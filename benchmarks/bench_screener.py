@@ -0,0 +1,113 @@
+"""
+Screener query latency over a synthetic fundamentals table.
+
+Builds an ``api.screener.Screener`` for --symbols made-up stocks (random
+market caps, P/E ratios, yields, sectors and 52-week ranges, with some
+figures missing as in real OVERVIEW data) and times typical screens:
+
+  all            no filter, largest companies first
+  large_cheap    market cap > $10B and 0 < P/E < 20, by P/E
+  near_low       within 10% of the 52-week low, by market cap
+  combined       the two above plus a sector and a dividend yield floor
+
+It also times building the table (with its sort indexes) and loading it
+from disk. No network, database or Django settings are needed. Run from the
+repository root:
+
+    python -m benchmarks.bench_screener [--symbols 10000] [--rounds 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SECTORS = ["TECHNOLOGY", "FINANCE", "ENERGY", "HEALTHCARE", "MANUFACTURING", "TRADE & SERVICES", "REAL ESTATE"]
+QUERIES = {
+    "all": {},
+    "large_cheap": {"ranges": {"market_cap": (1e10, None), "pe_ratio": (0, 20)}, "sort": "pe_ratio", "descending": False},
+    "near_low": {"ranges": {"from_low": (None, 0.10)}},
+    "combined": {
+        "ranges": {"market_cap": (1e10, None), "pe_ratio": (0, 20), "from_low": (None, 0.10), "dividend_yield": (0.02, None)},
+        "equals": {"sector": "FINANCE"},
+    },
+}
+
+
+def synthetic_rows(n, seed=0):
+    from api.screener import FUNDAMENTALS, set_price
+
+    rng = np.random.default_rng(seed)
+    market_cap = np.exp(rng.uniform(np.log(5e7), np.log(3e12), n))
+    price = np.exp(rng.uniform(np.log(1), np.log(900), n))
+    year_low = price * rng.uniform(0.5, 1.0, n)
+    year_high = np.maximum(price, year_low) * rng.uniform(1.0, 1.8, n)
+    figures = {
+        "market_cap": market_cap,
+        "pe_ratio": rng.normal(22, 15, n),
+        "forward_pe": rng.normal(18, 10, n),
+        "peg_ratio": rng.uniform(0, 5, n),
+        "price_to_book": rng.uniform(0.3, 20, n),
+        "eps": rng.normal(3, 4, n),
+        "dividend_yield": np.where(rng.random(n) < 0.4, 0.0, rng.uniform(0, 0.08, n)),
+        "profit_margin": rng.normal(0.08, 0.1, n),
+        "beta": rng.normal(1, 0.4, n),
+        "year_high": year_high,
+        "year_low": year_low,
+        "shares": market_cap / price,
+    }
+    # About one figure in twenty is "None" in real OVERVIEW payloads
+    for values in figures.values():
+        values[rng.random(n) < 0.05] = np.nan
+    rows = {}
+    for i in range(n):
+        symbol = f"S{i:05d}"
+        row = {"symbol": symbol, "name": f"Synthetic {i}", "sector": SECTORS[i % len(SECTORS)], "exchange": "NYSE"}
+        row.update({name: float(figures[name][i]) for name in FUNDAMENTALS})
+        row["fetched_at"] = 0.0
+        rows[symbol] = set_price(row, float(price[i]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=10000, help="stocks in the table")
+    parser.add_argument("--rounds", type=int, default=200, help="timed runs per query")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT / "smartstock_backend"))
+    from api.screener import Screener
+
+    rows = synthetic_rows(args.symbols)
+    start = time.perf_counter()
+    table = Screener.from_rows(rows)
+    built = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "screener.npz")
+        table.save(path)
+        start = time.perf_counter()
+        table = Screener.load(path)
+        loaded = time.perf_counter() - start
+        size = os.path.getsize(path)
+    print(f"{args.symbols} symbols: built in {built * 1000:.0f} ms, {size / 1024:.0f} KB on disk, loaded in {loaded * 1000:.1f} ms")
+
+    print(f"{'query':<12} {'matches':>8} {'median ms':>10} {'p99 ms':>10}")
+    for name, query in QUERIES.items():
+        samples = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            count, _ = table.query(**query)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{name:<12} {count:>8} {statistics.median(samples) * 1000:>10.3f} {p99 * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
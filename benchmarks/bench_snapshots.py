@@ -0,0 +1,96 @@
+"""
+Size and speed of cached comparison rows: JSON payloads versus packed snapshots.
+
+For --symbols symbols built from the recorded IBM payloads (symbol, price and
+market cap varied per symbol), compares
+
+  bytes     what the quote cache stores per symbol: the GLOBAL_QUOTE and
+            OVERVIEW JSON payloads, or one packed StockSnapshot record
+  decode    turning the stored bytes back into a comparison row
+  sort      ranking every symbol by market cap, parsing the old display
+            strings ("$3073.52 Billion") or reading the numeric field
+
+No network or API key is needed. Run from the repository root:
+
+    python -m benchmarks.bench_snapshots [--symbols 1000] [--rounds 5]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.mock_servers import PAYLOADS
+from modules.snapshot import StockSnapshot
+
+
+def display_row(quote, overview):
+    """A comparison row as ``module1`` used to build and cache it, all strings."""
+    quote_data = quote["Global Quote"]
+    return {
+        "Name": overview.get("Name", "N/A"),
+        "Symbol": quote_data["01. symbol"],
+        "Market Cap": f"${round(float(overview.get('MarketCapitalization', 0)) / 1e9, 2)} Billion",
+        "Current Price": f"${quote_data.get('05. price', 'N/A')}",
+        "52-Week High": f"${overview.get('52WeekHigh', 'N/A')}",
+        "52-Week Low": f"${overview.get('52WeekLow', 'N/A')}",
+    }
+
+
+def synthetic_payloads(n, seed=0):
+    """(quote, overview) payload pairs for ``n`` made-up symbols."""
+    quote = json.loads((PAYLOADS / "global_quote.json").read_text())
+    overview = json.loads((PAYLOADS / "overview.json").read_text())
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(n):
+        symbol = f"S{i:04d}"
+        pairs.append((
+            {"Global Quote": dict(quote["Global Quote"], **{"01. symbol": symbol, "05. price": f"{rng.uniform(1, 900):.4f}"})},
+            dict(overview, Symbol=symbol, MarketCapitalization=str(rng.randrange(10**8, 3 * 10**12))),
+        ))
+    return pairs
+
+
+def best(call, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return min(samples), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=1000, help="symbols per measurement")
+    parser.add_argument("--rounds", type=int, default=5, help="timed rounds per measurement")
+    args = parser.parse_args()
+
+    pairs = synthetic_payloads(args.symbols)
+    stored_json = [(json.dumps(quote), json.dumps(overview)) for quote, overview in pairs]
+    snapshots = [StockSnapshot.from_payloads(quote["Global Quote"]["01. symbol"], quote, overview) for quote, overview in pairs]
+    records = [snapshot.pack() for snapshot in snapshots]
+    rows = [display_row(quote, overview) for quote, overview in pairs]
+
+    json_bytes = sum(len(quote) + len(overview) for quote, overview in stored_json)
+    record_bytes = sum(len(record) for record in records)
+    print(f"{args.symbols} symbols: JSON payloads {json_bytes / args.symbols:.0f} B/symbol,"
+          f" packed snapshots {record_bytes / args.symbols:.0f} B/symbol ({json_bytes / record_bytes:.0f}x smaller)")
+
+    cases = {
+        "decode/json": lambda: [display_row(json.loads(quote), json.loads(overview)) for quote, overview in stored_json],
+        "decode/packed": lambda: [StockSnapshot.unpack(record) for record in records],
+        "sort/strings": lambda: sorted(rows, key=lambda row: float(row["Market Cap"][1:].split()[0]), reverse=True),
+        "sort/numeric": lambda: sorted(snapshots, key=lambda snapshot: snapshot.market_cap, reverse=True),
+        "format/rows": lambda: [snapshot.row() for snapshot in snapshots],
+    }
+    print(f"{'case':<16} {'min ms':>10} {'median ms':>10}")
+    for name, call in cases.items():
+        fastest, median = best(call, args.rounds)
+        print(f"{name:<16} {fastest * 1000:>10.2f} {median * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
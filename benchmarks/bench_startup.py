@@ -0,0 +1,96 @@
+"""
+Cold-start cost of the Streamlit app: page-module import time and first renders.
+
+Every measurement runs in a fresh Python process, so nothing is already
+imported or cached. Pages are rendered through Streamlit's AppTest harness
+from homepage.py:
+
+  import:<module>  seconds to import the module
+  login            first render of the login page
+  module1/2/3      first render of the logged-in home page, then (after
+                   --pause seconds, as a user would take to pick a page)
+                   the first render of the comparison, chatbot or screener page
+
+Pass --no-warmup to measure with the background warmup disabled. No API keys
+or network are needed. Run from the repository root:
+
+    python -m benchmarks.bench_startup [--repeat 5] [--pause 1.0] [--no-warmup]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORTS = ["modules.module1", "modules.module2", "modules.module3"]
+PAGES = {"module1": "Stock Comparison", "module2": "Chatbot", "module3": "Stock Screener"}
+
+
+def measure(case, pause):
+    """Run one case in this (fresh) process and return its timings in seconds."""
+    sys.path.insert(0, str(ROOT))
+    if case.startswith("import:"):
+        start = time.perf_counter()
+        __import__(case.split(":", 1)[1])
+        return {"import": time.perf_counter() - start}
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(ROOT / "homepage.py"), default_timeout=120)
+    if case != "login":
+        app.session_state["logged_in"] = True
+        app.session_state["username"] = "benchmark"
+    start = time.perf_counter()
+    app.run()
+    timings = {"first_render": time.perf_counter() - start}
+    if case in PAGES:
+        time.sleep(pause)
+        pages = next(radio for radio in app.radio if "Select a Module" in radio.label)
+        start = time.perf_counter()
+        pages.set_value(PAGES[case]).run()
+        timings["page_render"] = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"{case} raised: {app.exception[0].message}")
+    return timings
+
+
+def run_case(case, pause, warmup, workdir):
+    env = dict(os.environ, PYTHONPATH=str(ROOT), SMARTSTOCK_WARMUP="1" if warmup else "0", GOOGLE_API_KEY="benchmark", ALPHA_API_KEY="")
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", case, "--pause", str(pause)],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per case")
+    parser.add_argument("--pause", type=float, default=1.0, help="seconds between the home page and the module page")
+    parser.add_argument("--no-warmup", action="store_true", help="disable the background warmup")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.pause)))
+        return
+
+    cases = [f"import:{module}" for module in IMPORTS] + ["login", *PAGES]
+    print(f"{'case':<24} {'metric':<14} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    # A scratch working directory keeps the app's SQLite caches out of the checkout
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in cases:
+            runs = [run_case(case, args.pause, not args.no_warmup, workdir) for _ in range(args.repeat)]
+            for metric in runs[0]:
+                values = [run[metric] * 1000 for run in runs]
+                print(f"{case:<24} {metric:<14} {statistics.median(values):>10.1f} {min(values):>10.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Concurrent signup and login load against the backend: Django's default SQLite
+settings versus the tuned profile in settings.py.
+
+Each profile gets a fresh, migrated database in a temporary directory and is
+served by Django's threaded WSGI server (the auth views are synchronous).
+Reports requests/s, p50/p99 latency and failed requests (typically
+"database is locked" errors) for each endpoint. Passwords use a fast hasher
+by default so the numbers show the database rather than PBKDF2; pass
+--real-hash to include hashing. Run from the repository root:
+
+    python -m benchmarks.load_auth [--users 300] [--concurrency 50] [--real-hash]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.load_market import BACKEND, HOST, wait_until_up
+
+ROOT = Path(__file__).resolve().parent.parent
+PORTS = {"default": 18711, "tuned": 18712}
+
+
+def serve(profile, port, path, real_hash):
+    sys.path.insert(0, str(BACKEND))
+    os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark")
+    os.environ["DJANGO_SETTINGS_MODULE"] = "smartstock_backend.settings"
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ["*"]
+    settings.DATABASES["default"]["NAME"] = path
+    if profile == "default":
+        # What settings.py had before: no options, a new connection per request
+        settings.DATABASES["default"]["OPTIONS"] = {}
+        settings.DATABASES["default"]["CONN_MAX_AGE"] = 0
+        settings.DATABASES["default"]["CONN_HEALTH_CHECKS"] = False
+    if not real_hash:
+        settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+    import django
+    from django.core.management import call_command
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    ThreadedWSGIServer.request_queue_size = 1024
+    server = ThreadedWSGIServer((HOST, port), QuietHandler)
+    server.set_app(get_wsgi_application())
+    server.serve_forever()
+
+
+async def drive(url, bodies, concurrency):
+    """POST every body, ``concurrency`` at a time; returns (latencies, failures, seconds)."""
+    latencies, failures = [], 0
+    queue = iter(bodies)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal failures
+            for body in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=body)
+                except httpx.HTTPError:
+                    failures += 1
+                    continue
+                if response.status_code >= 300:
+                    failures += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, failures, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300, help="signups, then logins, per profile")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight at once")
+    parser.add_argument("--real-hash", action="store_true", help="keep the configured PBKDF2 hasher")
+    parser.add_argument("--serve", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        profile, port, path, real_hash = args.serve
+        serve(profile, int(port), path, real_hash == "1")
+        return
+
+    print(f"{'profile':>8} {'endpoint':>8} {'requests':>8} {'failed':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for profile, port in PORTS.items():
+            command = [sys.executable, "-m", "benchmarks.load_auth", "--serve", profile, str(port),
+                       str(Path(directory) / f"{profile}.sqlite3"), "1" if args.real_hash else "0"]
+            process = subprocess.Popen(command, cwd=ROOT)
+            try:
+                wait_until_up(port)
+                prefix = uuid.uuid4().hex[:8]
+                users = [{"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "password": "benchmark-pass"} for i in range(args.users)]
+                for endpoint in ("signup", "login"):
+                    url = f"http://{HOST}:{port}/api/{endpoint}/"
+                    latencies, failures, elapsed = asyncio.run(drive(url, users, args.concurrency))
+                    p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if latencies else (float("nan"),) * 2
+                    print(
+                        f"{profile:>8} {endpoint:>8} {len(users):>8} {failures:>6} {len(latencies) / elapsed:>8.1f}"
+                        f" {p50:>8.1f} {p99:>8.1f}"
+                    )
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
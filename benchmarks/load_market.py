@@ -0,0 +1,177 @@
+"""
+Load test for the market-data endpoint: sync (threaded WSGI) versus async (ASGI).
+
+Starts the Alpha Vantage stand-in from ``mock_servers`` with a fixed
+latency, then serves the backend once with Django's threaded WSGI server and
+the blocking view, and once with uvicorn and the async view, and drives both
+with the same concurrent load. Reports requests/s, p50/p99 latency and how
+many upstream calls were made. Needs uvicorn and httpx; no API key or
+network. Run from the repository root:
+
+    python -m benchmarks.load_market [--requests 400] [--concurrency 100] [--latency 0.1]
+
+Scenarios:
+  burst   every request asks for the same cold symbol (single-flight)
+  fanout  every request asks for 10 cold symbols of its own
+  warm    every request asks for the same 10 cached symbols
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks import mock_servers
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / "smartstock_backend"
+HOST = "127.0.0.1"
+MOCK_PORT, SYNC_PORT, ASYNC_PORT = 18700, 18701, 18702
+FANOUT_SYMBOLS = 10
+
+
+def serve_backend(kind, port, mock_port):
+    """Run the backend with an in-memory cache, a fresh database and the benchmark URLconf."""
+    sys.path.insert(0, str(BACKEND))
+    os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark")
+    os.environ["DJANGO_SETTINGS_MODULE"] = "smartstock_backend.settings"
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ["*"]
+    settings.ROOT_URLCONF = "benchmarks.load_urls"
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "OPTIONS": {"MAX_ENTRIES": 100_000}}}
+    settings.ALPHA_VANTAGE_URL = f"http://{HOST}:{mock_port}/query"
+    settings.ALPHA_API_KEY = "benchmark"
+    # Demand tracking and portfolio updates write to the database on every fetch
+    settings.DATABASES["default"]["NAME"] = os.path.join(tempfile.mkdtemp(prefix="smartstock-load-"), "db.sqlite3")
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    if kind == "sync":
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+        from django.core.wsgi import get_wsgi_application
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        ThreadedWSGIServer.request_queue_size = 1024
+        server = ThreadedWSGIServer((HOST, port), QuietHandler)
+        server.set_app(get_wsgi_application())
+        server.serve_forever()
+    else:
+        import uvicorn
+        from django.core.asgi import get_asgi_application
+
+        uvicorn.run(get_asgi_application(), host=HOST, port=port, log_level="warning", backlog=2048)
+
+
+def start(*args):
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.load_market", "--serve", *map(str, args)], cwd=ROOT)
+    return process
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://{HOST}:{port}/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def upstream_calls():
+    return httpx.get(f"http://{HOST}:{MOCK_PORT}/_calls").json()["calls"]
+
+
+async def drive(url, symbol_lists, concurrency):
+    """Send one request per symbol list, ``concurrency`` at a time; returns (latencies, errors, seconds)."""
+    latencies, errors = [], 0
+    queue = iter(symbol_lists)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            for symbols in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url, params={"symbols": ",".join(symbols)})
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.json()["errors"]:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+
+def scenarios(n_requests, tag):
+    """Symbol lists per scenario; ``tag`` keeps each server's symbols cold."""
+    warm = [f"W{tag}{i}" for i in range(FANOUT_SYMBOLS)]
+    return {
+        "burst": [[f"HOT{tag}"]] * n_requests,
+        "fanout": [[f"F{tag}R{r}S{i}" for i in range(FANOUT_SYMBOLS)] for r in range(n_requests)],
+        "warm": (warm, [warm] * n_requests),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=100, help="requests in flight at once")
+    parser.add_argument("--latency", type=float, default=0.1, help="mock upstream latency in seconds")
+    parser.add_argument("--serve", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        kind, port, mock_port = args.serve
+        serve_backend(kind, int(port), int(mock_port))
+        return
+
+    processes = [mock_servers.start(MOCK_PORT, args.latency)]
+    try:
+        wait_until_up(MOCK_PORT)
+        print(f"{'server':>6} {'scenario':>8} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'upstream':>8}")
+        for kind, port, path in [("sync", SYNC_PORT, "sync/quotes/"), ("async", ASYNC_PORT, "api/quotes/")]:
+            processes.append(start(kind, port, MOCK_PORT))
+            wait_until_up(port)
+            url = f"http://{HOST}:{port}/{path}"
+            for name, symbol_lists in scenarios(args.requests, kind).items():
+                if name == "warm":
+                    warm, symbol_lists = symbol_lists
+                    httpx.get(url, params={"symbols": ",".join(warm)}, timeout=60)
+                before = upstream_calls()
+                latencies, errors, elapsed = asyncio.run(drive(url, symbol_lists, args.concurrency))
+                p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if latencies else (float("nan"),) * 2
+                print(
+                    f"{kind:>6} {name:>8} {len(symbol_lists):>8} {errors:>6} {len(latencies) / elapsed:>8.1f}"
+                    f" {p50:>8.1f} {p99:>8.1f} {upstream_calls() - before:>8}"
+                )
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+URLconf for ``benchmarks.load_market``: the async market views next to a
+thread-per-request baseline with the same caching and single-flight.
+"""
+
+from django.http import JsonResponse
+from django.urls import path
+
+from api import market, views
+
+
+def sync_quotes(request):
+    """The blocking implementation the async ``quotes`` view replaced."""
+    symbols = views._symbols(request)
+    quote_entries, errors = market.get_many("GLOBAL_QUOTE", symbols)
+    overview_entries, overview_errors = market.get_many("OVERVIEW", list(quote_entries))
+    errors.update(overview_errors)
+    data = {
+        symbol: {"GLOBAL_QUOTE": quote_entries[symbol]["payload"], "OVERVIEW": overview_entries[symbol]["payload"]}
+        for symbol in symbols if symbol in quote_entries and symbol in overview_entries
+    }
+    return JsonResponse({"quotes": data, "errors": errors})
+
+
+urlpatterns = [
+    path("api/quotes/", views.quotes),
+    path("sync/quotes/", sync_quotes),
+]
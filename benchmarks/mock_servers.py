@@ -0,0 +1,156 @@
+"""
+Offline stand-ins for Alpha Vantage and Gemini, replaying recorded payloads.
+
+One asyncio keep-alive HTTP/1.1 server answers both APIs from the files in
+``benchmarks/payloads``:
+
+  GET  /query?function=...&symbol=...      Alpha Vantage; the recorded IBM payload
+                                           with the requested symbol swapped in
+  GET  /query?function=LISTING_STATUS      the recorded listing CSV
+  POST /v1beta/models/<model>:streamGenerateContent?alt=sse
+                                           the recorded Gemini events, one chunk each
+  POST /v1beta/models/<model>:generateContent
+                                           the same answer in one JSON response
+  GET  /_calls                             {"calls": n} upstream calls answered so far
+
+Every upstream call waits ``latency`` seconds before answering and Gemini
+events are spaced ``token_latency`` apart. Point the apps at it with
+ALPHA_VANTAGE_URL=http://127.0.0.1:<port>/query and
+GEMINI_API_URL=http://127.0.0.1:<port>/v1beta. Run on its own with:
+
+    python -m benchmarks.mock_servers [--port 18700] [--latency 0.1] [--token-latency 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PAYLOADS = Path(__file__).resolve().parent / "payloads"
+ROOT = PAYLOADS.parent.parent
+HOST = "127.0.0.1"
+# Symbol the payloads were recorded for, replaced by the requested one
+RECORDED_SYMBOL = "IBM"
+ALPHA_FILES = {
+    "GLOBAL_QUOTE": "global_quote.json",
+    "OVERVIEW": "overview.json",
+    "TIME_SERIES_DAILY": "time_series_daily.json",
+    "TIME_SERIES_DAILY_ADJUSTED": "time_series_daily.json",
+}
+LISTING_FILE = "listing_status.csv"
+GEMINI_STREAM_FILE = "gemini_stream.sse"
+
+
+def load_payloads():
+    """({function: payload split around the recorded symbol}, listing CSV, [Gemini SSE events])."""
+    templates = {
+        function: (PAYLOADS / name).read_bytes().split(json.dumps(RECORDED_SYMBOL).encode())
+        for function, name in ALPHA_FILES.items()
+    }
+    listing = (PAYLOADS / LISTING_FILE).read_bytes()
+    events = [event + b"\r\n\r\n" for event in (PAYLOADS / GEMINI_STREAM_FILE).read_bytes().split(b"\r\n\r\n") if event.strip()]
+    return templates, listing, events
+
+
+def listed_symbols():
+    """Symbols in the recorded listing, in file order."""
+    lines = (PAYLOADS / LISTING_FILE).read_text().splitlines()[1:]
+    return [line.split(",", 1)[0] for line in lines if line]
+
+
+def _answer_text(events):
+    texts = []
+    for event in events:
+        for candidate in json.loads(event[5:])["candidates"]:
+            texts.extend(part["text"] for part in candidate["content"]["parts"])
+    return "".join(texts)
+
+
+def serve(port, latency=0.0, token_latency=0.0):
+    """Serve both stand-ins on ``port`` until the process is stopped."""
+    templates, listing, events = load_payloads()
+    answer = json.dumps({"candidates": [{"content": {"parts": [{"text": _answer_text(events)}], "role": "model"}, "finishReason": "STOP"}]}).encode()
+    calls = 0
+
+    def respond(writer, body, content_type="application/json", status=b"200 OK"):
+        writer.write(b"HTTP/1.1 %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n\r\n%s" % (status, content_type.encode(), len(body), body))
+
+    def alpha(query):
+        function = query.get("function", "")
+        if function == "LISTING_STATUS":
+            return listing, "text/csv"
+        if function not in templates:
+            return json.dumps({"Error Message": f"Invalid API call: {function}"}).encode(), "application/json"
+        return json.dumps(query.get("symbol", "")).encode().join(templates[function]), "application/json"
+
+    async def stream(writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        for event in events:
+            await asyncio.sleep(token_latency)
+            writer.write(b"%x\r\n%s\r\n" % (len(event), event))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+
+    async def handle(reader, writer):
+        nonlocal calls
+        try:
+            while request_line := await reader.readline():
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)  # Gemini prompt; the answer is recorded
+                method, target = request_line.split()[:2]
+                url = urlparse(target.decode())
+                if url.path == "/_calls":
+                    respond(writer, json.dumps({"calls": calls}).encode())
+                    await writer.drain()
+                    continue
+
+                calls += 1
+                await asyncio.sleep(latency)
+                if method == b"GET" and url.path == "/query":
+                    respond(writer, *alpha({key: values[0] for key, values in parse_qs(url.query).items()}))
+                elif method == b"POST" and url.path.endswith(":streamGenerateContent"):
+                    await stream(writer)
+                elif method == b"POST" and url.path.endswith(":generateContent"):
+                    respond(writer, answer)
+                else:
+                    respond(writer, b'{"error": "not found"}', status=b"404 Not Found")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, HOST, port, backlog=2048)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def start(port, latency=0.0, token_latency=0.0):
+    """Run ``serve`` in a child process; the caller terminates it."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_servers", "--port", str(port), "--latency", str(latency), "--token-latency", str(token_latency)],
+        cwd=ROOT,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18700)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds before each upstream answer")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds between Gemini stream events")
+    args = parser.parse_args()
+    serve(args.port, args.latency, args.token_latency)
+
+
+if __name__ == "__main__":
+    main()
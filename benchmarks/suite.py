@@ -0,0 +1,371 @@
+"""
+End-to-end benchmark suite for the app's hot paths, run fully offline.
+
+Alpha Vantage and Gemini are replaced by the ``mock_servers`` stand-in
+replaying recorded payloads, and the Streamlit modules run in a temporary
+working directory so their caches start empty. Cases:
+
+  quotes/<cold|warm>/<n>     module1.get_stock_information(_many) for 1-100 symbols
+  report/<cold|warm>/<n>     PDF comparison report for 2-50 symbols (create_pdf_report)
+  pdf/<cold|warm>/<pages>    module2's PDF extraction and indexing for 1-500 pages
+  auth/<signup|login>/c<n>   backend auth views under n concurrent clients
+  chat/<ttft|total>          Gemini streaming proxy, first chunk and whole answer
+
+Every case reports seconds per call (min, median, mean, max, stddev, p99)
+plus case-specific extras, and the run is written as JSON with the commit,
+Python and machine it ran on, so runs can be compared over time. Run from
+the repository root:
+
+    python -m benchmarks.suite [--quick] [--only quotes,pdf] [--rounds 5] [--output run.json]
+    python -m benchmarks.suite --compare old.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import load_auth, mock_servers
+from benchmarks.load_market import BACKEND, HOST, wait_until_up
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+MOCK_PORT = 18720
+AUTH_PORT = 18721
+
+SIZES = {
+    "quotes": [1, 10, 100],
+    "report": [2, 10, 50],
+    "pdf": [1, 10, 100, 500],
+    "auth": [1, 10, 50],
+}
+QUICK_SIZES = {
+    "quotes": [1, 10],
+    "report": [2, 10],
+    "pdf": [1, 10],
+    "auth": [1, 10],
+}
+PDF_WORDS_PER_PAGE = 350
+PDF_PROMPT = "How did revenue and operating margin change compared with the previous year?"
+# Median ratios outside this band are flagged by --compare
+COMPARE_TOLERANCE = 0.10
+
+
+def summarize(samples, **extra):
+    """Timing statistics for a list of seconds, plus any case-specific figures."""
+    samples = sorted(samples)
+    return {
+        "unit": "s",
+        "rounds": len(samples),
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": samples[-1],
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "p99": float(np.percentile(samples, 99)),
+        **extra,
+    }
+
+
+def timed(function, rounds, setup=None):
+    """Call ``function(setup())`` (or ``function()``) ``rounds`` times and return the durations."""
+    samples = []
+    for _ in range(rounds):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        function(argument) if setup else function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_quotes(sizes, rounds, workdir):
+    """Quote and overview lookups through the Streamlit module against the Alpha Vantage stand-in."""
+    from modules import alpha_vantage, module1
+    from modules.rate_limit import RateLimiter
+    from modules.stock_cache import QuoteCache
+
+    # The stand-in has no quota; the free-tier limiter would only measure sleeping
+    alpha_vantage.limiter = RateLimiter({"minute": (10**9, 60)})
+    universe = mock_servers.listed_symbols()
+    calls_url = f"http://{HOST}:{MOCK_PORT}/_calls"
+    results = {}
+
+    def lookup(symbols):
+        if len(symbols) == 1:
+            stocks = {symbols[0]: module1.get_stock_information(symbols[0])}
+        else:
+            stocks = module1.get_stock_information_many(symbols)
+        if not all(stocks.values()):
+            raise RuntimeError(f"lookup failed for {', '.join(symbol for symbol, stock in stocks.items() if not stock)}")
+
+    for n in sizes:
+        symbols = universe[:n]
+
+        def cold():
+            alpha_vantage.quote_cache = QuoteCache(path=str(workdir / f"quotes-{uuid.uuid4().hex}.sqlite3"))
+            return symbols
+
+        before = _upstream_calls(calls_url)
+        samples = timed(lookup, rounds, setup=cold)
+        calls = (_upstream_calls(calls_url) - before) / rounds
+        results[f"quotes/cold/{n}"] = summarize(samples, symbols=n, upstream_calls=calls)
+
+        before = _upstream_calls(calls_url)
+        samples = timed(lambda: lookup(symbols), rounds)
+        results[f"quotes/warm/{n}"] = summarize(samples, symbols=n, upstream_calls=(_upstream_calls(calls_url) - before) / rounds)
+    return results
+
+
+def _upstream_calls(url):
+    import httpx
+
+    return httpx.get(url).json()["calls"]
+
+
+def bench_report(sizes, rounds, workdir):
+    """Report rendering in the worker pool: new data every round (cold) and the same data again (warm)."""
+    from benchmarks.bench_reports import synthetic_report
+    from modules import reports
+
+    # Start the worker processes before timing anything
+    reports.submit_render(synthetic_report(2, seed=2**32 - 1)).result()
+    results = {}
+    for n in sizes:
+        seeds = iter(range(n * 1000, n * 1000 + rounds))
+        sizes_kb = []
+
+        def render(data):
+            sizes_kb.append(len(reports.submit_render(data).result()) / 1024)
+
+        samples = timed(render, rounds, setup=lambda: synthetic_report(n, seed=next(seeds)))
+        results[f"report/cold/{n}"] = summarize(samples, symbols=n, pdf_kb=statistics.fmean(sizes_kb))
+
+        data = synthetic_report(n, seed=0)
+        render(data)
+        samples = timed(lambda: render(data), rounds)
+        results[f"report/warm/{n}"] = summarize(samples, symbols=n)
+    return results
+
+
+def synthetic_pdf(pages, seed=0):
+    """A text PDF of ``pages`` pages of report-like prose, built with reportlab."""
+    import io
+
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    rng = np.random.default_rng(seed)
+    vocabulary = (
+        "revenue margin operating cash flow quarter growth segment guidance outlook dividend "
+        "earnings share buyback debt capital expenditure consulting software infrastructure "
+        "demand pricing customers contracts backlog currency impact year compared previous"
+    ).split()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for _ in range(pages):
+        text = pdf.beginText(40, 750)
+        words = rng.choice(vocabulary, size=PDF_WORDS_PER_PAGE)
+        for line in range(0, PDF_WORDS_PER_PAGE, 14):
+            text.textLine(" ".join(words[line:line + 14]))
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def bench_pdf(sizes, rounds, workdir):
+    """Extraction plus chunk indexing (cold) and the cached index (warm), each answering one prompt."""
+    from modules.pdf_index import PdfIndex, extract_pages, get_pdf_index
+
+    results = {}
+    for pages in sizes:
+        data = synthetic_pdf(pages, seed=pages)
+        samples = timed(lambda: PdfIndex(extract_pages(data)).context_for(PDF_PROMPT), rounds)
+        results[f"pdf/cold/{pages}"] = summarize(samples, pages=pages, pdf_kb=len(data) / 1024)
+
+        get_pdf_index(data)
+        samples = timed(lambda: get_pdf_index(data).context_for(PDF_PROMPT), rounds)
+        results[f"pdf/warm/{pages}"] = summarize(samples, pages=pages)
+    return results
+
+
+def bench_auth(sizes, rounds, workdir, real_hash=False):
+    """Signup then login under ``n`` concurrent clients against the tuned backend profile."""
+    command = [sys.executable, "-m", "benchmarks.load_auth", "--serve", "tuned", str(AUTH_PORT),
+               str(workdir / "auth.sqlite3"), "1" if real_hash else "0"]
+    process = subprocess.Popen(command, cwd=ROOT)
+    results = {}
+    try:
+        wait_until_up(AUTH_PORT)
+        for concurrency in sizes:
+            prefix = uuid.uuid4().hex[:8]
+            users = [
+                {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "password": "benchmark-pass"}
+                for i in range(max(rounds, 4 * concurrency))
+            ]
+            for endpoint in ("signup", "login"):
+                url = f"http://{HOST}:{AUTH_PORT}/api/{endpoint}/"
+                latencies, failures, elapsed = asyncio.run(load_auth.drive(url, users, concurrency))
+                if not latencies:
+                    raise RuntimeError(f"every {endpoint} request failed")
+                results[f"auth/{endpoint}/c{concurrency}"] = summarize(
+                    latencies, concurrency=concurrency, failures=failures, requests_per_second=len(latencies) / elapsed
+                )
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def bench_chat(sizes, rounds, workdir):
+    """Time to first chunk and to the whole answer through the backend's Gemini proxy."""
+    sys.path.insert(0, str(BACKEND))
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(
+            GEMINI_API_URL=f"http://{HOST}:{MOCK_PORT}/v1beta",
+            GEMINI_API_KEY="benchmark",
+            GEMINI_MODEL="gemini-1.5-flash-latest",
+        )
+    from api import gemini
+
+    contents = [{"role": "user", "parts": [{"text": PDF_PROMPT}]}]
+
+    async def run():
+        first, total = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            chunks = 0
+            async for _ in gemini.stream_generate(contents):
+                if not chunks:
+                    first.append(time.perf_counter() - start)
+                chunks += 1
+            total.append(time.perf_counter() - start)
+        return first, total, chunks
+
+    first, total, chunks = asyncio.run(run())
+    return {"chat/ttft": summarize(first), "chat/total": summarize(total, chunks=chunks)}
+
+
+CASES = {
+    "quotes": bench_quotes,
+    "report": bench_report,
+    "pdf": bench_pdf,
+    "auth": bench_auth,
+    "chat": bench_chat,
+}
+
+
+def metadata(args):
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "options": {"rounds": args.rounds, "quick": args.quick, "latency": args.latency,
+                    "token_latency": args.token_latency, "real_hash": args.real_hash},
+    }
+
+
+def compare(old_path, new_path):
+    """Print median times of two runs side by side, flagging changes beyond COMPARE_TOLERANCE."""
+    old, new = (json.loads(Path(path).read_text()) for path in (old_path, new_path))
+    for label, run in (("old", old), ("new", new)):
+        print(f"{label}: {(run['meta']['commit'] or '?')[:10]}  {run['meta']['created_at']}")
+    print(f"{'case':<24} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name in sorted(old["results"].keys() | new["results"].keys()):
+        before, after = old["results"].get(name), new["results"].get(name)
+        if before is None or after is None:
+            cells = ["-" if stats is None else f"{stats['median'] * 1000:.2f}" for stats in (before, after)]
+            print(f"{name:<24} {cells[0]:>10} {cells[1]:>10}")
+            continue
+        ratio = after["median"] / before["median"] if before["median"] else float("inf")
+        flag = "slower" if ratio > 1 + COMPARE_TOLERANCE else "faster" if ratio < 1 - COMPARE_TOLERANCE else ""
+        print(f"{name:<24} {before['median'] * 1000:>10.2f} {after['median'] * 1000:>10.2f} {ratio:>7.2f} {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help=f"comma separated case groups ({', '.join(CASES)})")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast smoke run")
+    parser.add_argument("--rounds", type=int, default=5, help="timed calls per case")
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in latency per upstream call, seconds")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds between Gemini stream events")
+    parser.add_argument("--real-hash", action="store_true", help="keep the configured PBKDF2 hasher for auth")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    groups = args.only.split(",") if args.only else list(CASES)
+    unknown = set(groups) - set(CASES)
+    if unknown:
+        parser.error(f"unknown case groups: {', '.join(sorted(unknown))}")
+    sizes = QUICK_SIZES if args.quick else SIZES
+
+    # The Streamlit modules read these at import and keep their caches in the working directory
+    os.environ["ALPHA_API_KEY"] = "benchmark"
+    os.environ["ALPHA_VANTAGE_URL"] = f"http://{HOST}:{MOCK_PORT}/query"
+    sys.path.insert(0, str(ROOT))
+    meta = metadata(args)
+    results = {}
+    mock = mock_servers.start(MOCK_PORT, args.latency, args.token_latency)
+    workdir = Path(tempfile.mkdtemp(prefix="smartstock-bench-"))
+    cwd = os.getcwd()
+    try:
+        wait_until_up(MOCK_PORT)
+        os.chdir(workdir)
+        # A fresh listing file makes the symbol index complete without a download
+        shutil.copy(mock_servers.PAYLOADS / mock_servers.LISTING_FILE, workdir / "symbol_listing.csv")
+        for group in groups:
+            extra = {"real_hash": args.real_hash} if group == "auth" else {}
+            started = time.perf_counter()
+            group_results = CASES[group](sizes.get(group), args.rounds, workdir, **extra)
+            for name, stats in group_results.items():
+                print(f"{name:<24} median {stats['median'] * 1000:>10.2f} ms  p99 {stats['p99'] * 1000:>10.2f} ms")
+            print(f"{group} done in {time.perf_counter() - started:.1f}s")
+            results.update(group_results)
+    finally:
+        os.chdir(cwd)
+        mock.terminate()
+        mock.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{(meta['commit'] or 'unknown')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
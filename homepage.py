@@ -1,11 +1,15 @@
+# First, so .env settings are in place before the modules below read them
+from modules import env  # noqa: F401
 import streamlit as st
 from streamlit_extras.add_vertical_space import add_vertical_space
 import importlib
-import requests
+from modules import backend_client, instrumentation, resources
 
-# URLs for signup and login (Django API endpoints)
-signup_url = "http://127.0.0.1:8000/api/signup/"
-login_url = "http://127.0.0.1:8000/api/login/"
+# Page modules and shared resources load in the background after this render
+
+# Spans finished during this rerun feed the optional timings panel
+trace = instrumentation.start_trace()
+instrumentation.serve_metrics()
 
 # Streamlit Page Settings
 st.set_page_config(page_title="SmartStock - AI Investment Agent", page_icon="📈", layout="centered")
@@ -51,75 +55,93 @@ if "username" not in st.session_state:
     st.session_state.username = ""
 if "current_page" not in st.session_state:
     st.session_state.current_page = "home"
+if "tokens" not in st.session_state:
+    st.session_state.tokens = {}
 
 # Sidebar switch
 page = st.sidebar.selectbox("🔐 Choose Page", ["Login", "Sign Up"])
-
-# If not logged in
-if not st.session_state.logged_in:
-    st.title("🚀 Welcome to SmartStock 📈")
-    st.caption("Your AI-Powered Stock Analysis & Chatbot")
-    st.divider()
-    add_vertical_space(2)
-
-    if page == "Login":
-        st.subheader("🔓 Login to your account")
-
-        username = st.text_input("👤 Username")
-        password = st.text_input("🔑 Password", type="password")
-
-        if st.button("Login 🔥"):
-            # API call to login
-            login_data = {"username": username, "password": password}
-            response = requests.post(login_url, json=login_data)
-            if response.status_code == 200:
-                st.success("Logged in successfully! 🎯")
-                st.session_state.logged_in = True
-                st.session_state.username = username
-            else:
-                st.error(f"Login failed: {response.json().get('error', 'Unknown error')} ❌")
-
-    elif page == "Sign Up":
-        st.subheader("🆕 Create New Account")
-
-        new_username = st.text_input("👤 New Username")
-        new_password = st.text_input("🔑 New Password", type="password")
-        confirm_password = st.text_input("🔒 Confirm Password", type="password")
-
-        if st.button("Sign Up 🚀"):
-            # API call to signup
-            if new_password != confirm_password:
-                st.error("Passwords do not match! ❌")
-            elif new_username == "" or new_password == "":
-                st.error("Fields cannot be empty! ⚠️")
-            else:
-                signup_data = {"username": new_username, "password": new_password, "email": f"{new_username}@example.com"}
-                response = requests.post(signup_url, json=signup_data)
-                if response.status_code == 201:
-                    st.success("Account created successfully! 🎉 Please login now.")
+view = page
+
+# The logout path ends in st.rerun(), so the rerun is timed whichever way the script exits
+try:
+    # If not logged in
+    if not st.session_state.logged_in:
+        st.title("🚀 Welcome to SmartStock 📈")
+        st.caption("Your AI-Powered Stock Analysis & Chatbot")
+        st.divider()
+        add_vertical_space(2)
+
+        if page == "Login":
+            st.subheader("🔓 Login to your account")
+
+            username = st.text_input("👤 Username")
+            password = st.text_input("🔑 Password", type="password")
+
+            if st.button("Login 🔥"):
+                # API call to login; later requests use the signed tokens instead of the password
+                response = backend_client.login(username, password)
+                if response.status_code == 200:
+                    st.success("Logged in successfully! 🎯")
+                    st.session_state.logged_in = True
+                    st.session_state.username = username
+                    st.session_state.tokens = {key: response.json()[key] for key in ("access", "refresh")}
                 else:
-                    st.error(f"Signup failed: {response.json().get('error', 'Unknown error')} ❌")
+                    st.error(f"Login failed: {response.json().get('error', 'Unknown error')} ❌")
 
-# After login
-else:
-    st.title(f"👋 Welcome, {st.session_state.username}!")
-    st.subheader("Choose a Module to Begin 📚")
+        elif page == "Sign Up":
+            st.subheader("🆕 Create New Account")
 
-    selected_option = st.radio("🔍 Select a Module", ["Home", "Stock Comparison", "Chatbot"], horizontal=True)
+            new_username = st.text_input("👤 New Username")
+            new_password = st.text_input("🔑 New Password", type="password")
+            confirm_password = st.text_input("🔒 Confirm Password", type="password")
 
-    if selected_option == "Home":
-        st.info("Welcome to SmartStock. Please choose a module from above to proceed.")
+            if st.button("Sign Up 🚀"):
+                # API call to signup
+                if new_password != confirm_password:
+                    st.error("Passwords do not match! ❌")
+                elif new_username == "" or new_password == "":
+                    st.error("Fields cannot be empty! ⚠️")
+                else:
+                    response = backend_client.signup(new_username, new_password, f"{new_username}@example.com")
+                    if response.status_code == 201:
+                        st.success("Account created successfully! 🎉 Please login now.")
+                    else:
+                        st.error(f"Signup failed: {response.json().get('error', 'Unknown error')} ❌")
+
+    # After login
+    else:
+        st.title(f"👋 Welcome, {st.session_state.username}!")
+        st.subheader("Choose a Module to Begin 📚")
+
+        selected_option = st.radio("🔍 Select a Module", ["Home", "Stock Comparison", "Stock Screener", "Chatbot"], horizontal=True)
+        view = selected_option
+
+        if selected_option == "Home":
+            st.info("Welcome to SmartStock. Please choose a module from above to proceed.")
     
-    elif selected_option == "Stock Comparison":
-        mod1 = importlib.import_module("modules.module1")
-        mod1.run()  # call the run() function you’ll define inside module1.py
+        elif selected_option == "Stock Comparison":
+            mod1 = importlib.import_module("modules.module1")
+            mod1.run()  # call the run() function you’ll define inside module1.py
     
-    elif selected_option == "Chatbot":
-        mod2 = importlib.import_module("modules.module2")
-        mod2.run()
-
-    st.divider()
-    if st.button("🚪 Logout"):
-        st.session_state.logged_in = False
-        st.success("Logged out successfully.")
-        st.rerun()
+        elif selected_option == "Stock Screener":
+            mod3 = importlib.import_module("modules.module3")
+            mod3.run()
+
+        elif selected_option == "Chatbot":
+            mod2 = importlib.import_module("modules.module2")
+            mod2.run()
+
+        st.divider()
+        if st.button("🚪 Logout"):
+            if st.session_state.tokens:
+                backend_client.logout(st.session_state.tokens)
+            st.session_state.logged_in = False
+            st.session_state.tokens = {}
+            st.success("Logged out successfully.")
+            st.rerun()
+finally:
+    trace.finish(page=view)
+
+if instrumentation.DEBUG_PANEL or st.query_params.get("debug") == "1":
+    instrumentation.show_debug_panel(trace)
+resources.warm_in_background()
@@ -0,0 +1,160 @@
+"""
+Alpha Vantage client shared by every Streamlit session in the process.
+
+Requests go through one pooled ``requests.Session`` on a bounded thread pool,
+so several symbols can be fetched in a single round trip of wall time.
+Concurrent requests for the same (symbol, function) share one in-flight call,
+and every call first takes a token from the shared rate limiter. While the
+quota is exhausted, expired cache entries are served instead of failing.
+Requests go out through a ``transport`` (see ``modules.transport``), which
+can also record responses or replay them without touching the network;
+replayed payloads are cached in their own file (ALPHA_REPLAY_CACHE).
+"""
+
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.instrumentation import span
+from modules.rate_limit import RateLimiter, ThrottledError
+from modules.stock_cache import CACHE_DB, QuoteCache
+from modules.transport import from_env as transport_from_env
+
+# Overridable so benchmarks can point the app at a local stand-in
+ALPHA_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+# Where quotes go in replay mode, so replayed payloads never reach the real cache
+REPLAY_CACHE_DB = os.getenv("ALPHA_REPLAY_CACHE", "stock_cache.replay.sqlite3")
+
+# Quote + overview for a 20-symbol watchlist in one round trip
+MAX_WORKERS = 40
+REQUEST_TIMEOUT = 15
+
+# Seconds to stop sending requests after Alpha Vantage reports throttling
+THROTTLE_BACKOFF = 60
+# How Alpha Vantage's quota notices describe themselves
+RATE_LIMIT_WORDS = ("rate limit", "call frequency")
+
+# Free tier quotas by default; ALPHA_RATE_LIMIT_DB shares them across processes
+limiter = RateLimiter(
+    {
+        "minute": (int(os.getenv("ALPHA_RATE_PER_MINUTE", 5)), 60),
+        "day": (int(os.getenv("ALPHA_RATE_PER_DAY", 25)), 24 * 60 * 60),
+    },
+    path=os.getenv("ALPHA_RATE_LIMIT_DB"),
+)
+
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+
+# Live by default; ALPHA_TRANSPORT=record or replay for development and load tests
+transport = transport_from_env(session, ALPHA_URL, REQUEST_TIMEOUT)
+
+quote_cache = QuoteCache(path=REPLAY_CACHE_DB if transport.replayed else CACHE_DB)
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="alpha")
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def submit(symbol, function, use_cache=True, **params):
+    """Return a Future for an Alpha Vantage payload, reusing the cache and any in-flight request.
+
+    Extra keyword arguments are sent as query parameters. Pass ``use_cache=False`` for
+    payloads that have their own store, such as daily time series.
+    """
+    payload = quote_cache.get(symbol, function) if use_cache else None
+    if payload is not None:
+        future = Future()
+        future.set_result(payload)
+        return future
+
+    key = (symbol, function, tuple(sorted(params.items())))
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        # Run in the caller's context so the fetch shows up in its rerun's trace
+        future = _executor.submit(contextvars.copy_context().run, _fetch, symbol, function, use_cache, params)
+        _in_flight[key] = future
+    # Registered outside the lock: the callback runs immediately if the fetch already finished
+    future.add_done_callback(lambda done: _forget(key, done))
+    return future
+
+
+def fetch(symbol, function, use_cache=True, **params):
+    """Blocking variant of ``submit``."""
+    return submit(symbol, function, use_cache, **params).result()
+
+
+def fetch_csv(function, **params):
+    """Fetch a CSV endpoint such as LISTING_STATUS and return the response text."""
+    _take_token()
+    params = {"function": function, "apikey": os.getenv("ALPHA_API_KEY"), **params}
+    with span("alpha_vantage.request", function=function):
+        text = transport.get(params)
+    # Errors and throttle notes still come back as JSON
+    if text.lstrip().startswith("{"):
+        payload = json.loads(text)
+        if is_throttle_payload(payload):
+            _throttled(payload)
+        raise ValueError(payload.get("Error Message", "Unexpected response from Alpha Vantage"))
+    return text
+
+
+def _take_token():
+    if transport.rate_limited:
+        with span("alpha_vantage.rate_limit"):
+            limiter.acquire()
+
+
+def _throttled(payload):
+    message = payload.get("Note") or payload.get("Information")
+    # "Information" also explains premium-only endpoints, which say nothing about limits
+    if transport.rate_limited and ("Note" in payload or any(word in message.lower() for word in RATE_LIMIT_WORDS)):
+        limiter.penalize(THROTTLE_BACKOFF)
+    raise ThrottledError(message)
+
+
+def _forget(key, future):
+    with _in_flight_lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+def _fetch(symbol, function, use_cache, extra_params):
+    params = {"function": function, "symbol": symbol, "apikey": os.getenv("ALPHA_API_KEY"), **extra_params}
+    try:
+        _take_token()
+        with span("alpha_vantage.request", function=function):
+            payload = json.loads(transport.get(params))
+        if is_throttle_payload(payload):
+            _throttled(payload)
+    except ThrottledError:
+        entry = quote_cache.lookup(symbol, function) if use_cache else None
+        if entry is not None:
+            return entry[0]
+        raise
+
+    if use_cache and is_valid_payload(function, payload):
+        quote_cache.put(symbol, function, payload)
+    return payload
+
+
+def is_throttle_payload(payload):
+    """Alpha Vantage reports quota errors as a 200 with a "Note" or "Information" message."""
+    return isinstance(payload, dict) and ("Note" in payload or "Information" in payload)
+
+
+def is_valid_payload(function, payload):
+    """Only real answers are cached; error and empty payloads are retried next time."""
+    if function == "GLOBAL_QUOTE":
+        return "01. symbol" in payload.get("Global Quote", {})
+    if function == "OVERVIEW":
+        return "Symbol" in payload
+    return bool(payload)
@@ -0,0 +1,107 @@
+"""
+HTTP client for the Django backend.
+
+One keep-alive ``requests.Session`` is shared by every Streamlit session in
+the process, so page actions reuse pooled connections instead of opening a
+new TCP connection each time. After login, requests carry the signed access
+token and transparently refresh it when it expires.
+"""
+
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.instrumentation import span
+
+BACKEND_URL = os.getenv("SMARTSTOCK_BACKEND_URL", "http://127.0.0.1:8000")
+REQUEST_TIMEOUT = 10
+
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+
+
+def url(path):
+    return f"{BACKEND_URL}/{path.lstrip('/')}"
+
+
+def signup(username, password, email):
+    return session.post(url("api/signup/"), json={"username": username, "password": password, "email": email}, timeout=REQUEST_TIMEOUT)
+
+
+def login(username, password):
+    """Log in; on success the response JSON holds "access" and "refresh" tokens."""
+    return session.post(url("api/login/"), json={"username": username, "password": password}, timeout=REQUEST_TIMEOUT)
+
+
+def refresh(tokens):
+    """Replace ``tokens["access"]`` using the refresh token; returns False if that is no longer valid."""
+    response = session.post(url("api/token/refresh/"), json={"refresh": tokens.get("refresh", "")}, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        return False
+    tokens["access"] = response.json()["access"]
+    return True
+
+
+def logout(tokens):
+    """Revoke the session's refresh tokens on the backend (best effort; returns whether it worked)."""
+    try:
+        response = session.post(url("api/logout/"), json={"refresh": tokens.get("refresh", "")}, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        return False
+    return response.status_code == 200
+
+
+def request(method, path, tokens, **kwargs):
+    """Send an authenticated request, refreshing the access token once if it has expired."""
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    headers = kwargs.pop("headers", {})
+    with span("backend.request", method=method) as current:
+        response = session.request(method, url(path), headers={**headers, "Authorization": f"Bearer {tokens.get('access', '')}"}, **kwargs)
+        if response.status_code == 401 and refresh(tokens):
+            response = session.request(method, url(path), headers={**headers, "Authorization": f"Bearer {tokens['access']}"}, **kwargs)
+        current.set(status=response.status_code)
+    return response
+
+
+def get(path, tokens, **kwargs):
+    return request("GET", path, tokens, **kwargs)
+
+
+def post(path, tokens, **kwargs):
+    return request("POST", path, tokens, **kwargs)
+
+
+def quotes(symbols):
+    """Raw GLOBAL_QUOTE and OVERVIEW payloads per symbol from the backend's shared cache.
+
+    Returns ``{"quotes": {symbol: {function: payload}}, "errors": {symbol: message}}``.
+    """
+    with span("backend.quotes"):
+        response = session.get(url("api/quotes/"), params={"symbols": ",".join(symbols)}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def screener(params):
+    """Rows of the backend's screener table matching ``params`` (see ``api/screener.py``); returns the response."""
+    with span("backend.screener"):
+        return session.get(url("api/screener/"), params=params, timeout=REQUEST_TIMEOUT)
+
+
+def dashboard(tokens):
+    """The user's holdings, portfolio analytics and watchlist quotes in one request."""
+    return get("api/dashboard/", tokens)
+
+
+def add_to_watchlist(tokens, symbol):
+    return post("api/watchlist/", tokens, json={"symbol": symbol})
+
+
+def set_holding(tokens, symbol, quantity, average_cost):
+    return request("PUT", f"api/holdings/{symbol}/", tokens, json={"quantity": quantity, "average_cost": average_cost})
+
+
+def remove_holding(tokens, symbol):
+    return request("DELETE", f"api/holdings/{symbol}/", tokens)
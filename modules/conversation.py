@@ -0,0 +1,165 @@
+"""
+Chatbot conversation storage and context building.
+
+Full transcripts live in SQLite rather than in ``st.session_state``, so a
+session only holds its conversation id. Each prompt is sent with as many
+recent turns as fit in a token budget; turns that fall out of the window are
+folded into a stored running summary, which is only extended with the turns
+that dropped out since the last compaction.
+"""
+
+import sqlite3
+import threading
+import time
+
+HISTORY_DB = "chat_history.sqlite3"
+CONTEXT_TOKEN_BUDGET = 8000
+SUMMARY_FALLBACK_CHARS = 200
+
+# Gemini calls the assistant role "model"
+GEMINI_ROLES = {"user": "user", "assistant": "model"}
+
+
+def estimate_tokens(text):
+    """Roughly four characters per token; close enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+class ConversationStore:
+    """Messages and running summaries per conversation, in a WAL-mode SQLite file."""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " conversation_id TEXT NOT NULL,"
+            " role TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS messages_by_conversation ON messages (conversation_id, id)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " conversation_id TEXT PRIMARY KEY,"
+            " summary TEXT NOT NULL,"
+            " covers_until INTEGER NOT NULL)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, conversation_id, role, content):
+        cursor = self._connect().execute(
+            "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            (conversation_id, role, content, time.time()),
+        )
+        return cursor.lastrowid
+
+    def append_turn(self, conversation_id, prompt, reply):
+        """Store a user message and the reply to it in one transaction, so roles always alternate."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(conversation_id, "user", prompt, now), (conversation_id, "assistant", reply, now)],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def count(self, conversation_id):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()[0]
+
+    def latest(self, conversation_id, limit):
+        """The newest ``limit`` messages, oldest first."""
+        rows = self._connect().execute(
+            "SELECT id, role, content FROM messages WHERE conversation_id = ? ORDER BY id DESC LIMIT ?",
+            (conversation_id, limit),
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def window(self, conversation_id, budget_tokens):
+        """The newest messages whose combined size fits ``budget_tokens``, oldest first."""
+        cursor = self._connect().execute(
+            "SELECT id, role, content FROM messages WHERE conversation_id = ? ORDER BY id DESC",
+            (conversation_id,),
+        )
+        messages, used = [], 0
+        for row in cursor:
+            used += estimate_tokens(row["content"])
+            if used > budget_tokens:
+                break
+            messages.append(dict(row))
+        cursor.close()
+        return messages[::-1]
+
+    def between(self, conversation_id, after_id, before_id):
+        rows = self._connect().execute(
+            "SELECT id, role, content FROM messages WHERE conversation_id = ? AND id > ? AND id < ? ORDER BY id",
+            (conversation_id, after_id, before_id),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self, conversation_id):
+        """Return (summary text, id of the last message it covers)."""
+        row = self._connect().execute(
+            "SELECT summary, covers_until FROM summaries WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        return (row["summary"], row["covers_until"]) if row else ("", 0)
+
+    def save_summary(self, conversation_id, summary, covers_until):
+        self._connect().execute(
+            "INSERT INTO summaries (conversation_id, summary, covers_until) VALUES (?, ?, ?)"
+            " ON CONFLICT (conversation_id) DO UPDATE SET"
+            " summary = excluded.summary, covers_until = excluded.covers_until",
+            (conversation_id, summary, covers_until),
+        )
+
+
+def extractive_summary(summary, messages):
+    """Fallback compaction without a model call: keep the start of each dropped user turn."""
+    lines = [summary] if summary else []
+    lines += [f"- {m['content'][:SUMMARY_FALLBACK_CHARS]}" for m in messages if m["role"] == "user"]
+    return "\n".join(lines)
+
+
+def build_context(store, conversation_id, budget_tokens=CONTEXT_TOKEN_BUDGET, summarize=None):
+    """Return prior turns as Gemini ``contents`` that fit the token budget.
+
+    ``summarize(previous_summary, dropped_messages)`` folds turns that no longer
+    fit into the running summary; it defaults to ``extractive_summary``.
+    """
+    summarize = summarize or extractive_summary
+    messages = store.window(conversation_id, budget_tokens)
+    # Gemini history has to start with a user turn
+    while messages and messages[0]["role"] != "user":
+        messages.pop(0)
+
+    summary, covers_until = store.summary(conversation_id)
+    first_kept = messages[0]["id"] if messages else 2**63 - 1
+    dropped = store.between(conversation_id, covers_until, first_kept)
+    if dropped:
+        summary = summarize(summary, dropped)
+        store.save_summary(conversation_id, summary, dropped[-1]["id"])
+
+    contents = []
+    if summary:
+        contents.append({"role": "user", "parts": [f"Summary of our earlier conversation:\n{summary}"]})
+        contents.append({"role": "model", "parts": ["Noted, I will keep that in mind."]})
+    contents += [{"role": GEMINI_ROLES[m["role"]], "parts": [m["content"]]} for m in messages]
+    return contents
@@ -0,0 +1,11 @@
+"""
+Loads ``.env`` into the environment, once per process.
+
+Modules read their settings (ports, tokens, URLs) into constants when they
+are imported, so the entry scripts import this before anything else.
+Variables already set in the environment win over ``.env``.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -0,0 +1,467 @@
+"""
+Technical indicators over the stored daily series, for many symbols at once.
+
+Each indicator works on a (days x symbols) price matrix and is vectorized
+along both axes: trailing-window figures come from cumulative sums and
+exponential averages from a blocked closed form, so there is no Python loop
+over days. ``compute`` also returns the indicator's state after the last
+day, and ``update`` advances that state by one new bar per symbol in
+constant time (running sums over a ring buffer of the window, or the last
+average), so a new daily bar never means recomputing 20 years.
+
+``IndicatorCache`` keeps the series and state per (symbol, indicator,
+params). A lookup returns unchanged series as they are, advances series
+that gained up to MAX_NEW_BARS bars with ``update`` (written into spare rows
+at the end of the cached arrays, so nothing is copied), and computes the
+rest in blocks of symbols that share the same dates.
+"""
+
+import math
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from modules import timeseries
+from modules.instrumentation import span
+from modules.resources import shared
+
+MAX_ENTRIES = 2048
+# More new bars than this are cheaper to recompute as one batch
+MAX_NEW_BARS = 20
+# Symbols computed together; larger blocks stop fitting in the CPU cache and get slower
+BLOCK_SYMBOLS = 32
+# Rows allocated past the end of each cached series, so new bars are appended in place
+SPARE_BARS = 64
+# Keep decay ** -block well inside float64 range in the blocked EMA
+_MAX_EMA_GROWTH = math.log(1e150)
+_MAX_EMA_BLOCK = 4096
+
+
+def _window_sums(values, window):
+    """Sums over each trailing ``window`` rows, NaN until the first full window."""
+    sums = np.full_like(values, np.nan)
+    if len(values) >= window:
+        total = np.cumsum(values, axis=0)
+        sums[window - 1] = total[window - 1]
+        sums[window:] = total[window:] - total[:-window]
+    return sums
+
+
+def _ema(values, alpha, initial=None):
+    """y[t] = alpha * x[t] + (1 - alpha) * y[t - 1] down the rows; y[-1] is ``initial`` (default: the first row).
+
+    Within a block, y[t] = q[t] * (y[-1] + alpha * sum(x[k] / q[k] for k <= t)) with
+    q[t] = (1 - alpha) ** (t + 1), which is a cumulative sum; blocks are short enough
+    for 1 / q not to overflow.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.empty_like(values)
+    if len(values) == 0:
+        return result
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        result[:] = values
+        return result
+    previous = np.array(values[0] if initial is None else initial, dtype=float)
+    block = min(_MAX_EMA_BLOCK, max(1, int(_MAX_EMA_GROWTH / -math.log(decay))))
+    powers = decay ** np.arange(1, block + 1, dtype=float)
+    powers = powers.reshape((-1,) + (1,) * (values.ndim - 1))
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        q = powers[:len(chunk)]
+        result[start:start + len(chunk)] = q * (previous + alpha * np.cumsum(chunk / q, axis=0))
+        previous = result[start + len(chunk) - 1]
+    return result
+
+
+def _ring(values, window):
+    """Trailing-window state: the last ``window`` rows (zero-padded in front), the slot to overwrite next and the row count."""
+    ring = np.zeros((window, values.shape[1]))
+    tail = values[-window:] if len(values) else values
+    ring[window - len(tail):] = tail
+    return {
+        "ring": ring,
+        "slot": np.zeros(values.shape[1], dtype=np.int64),
+        "count": np.full(values.shape[1], len(values), dtype=np.int64),
+    }
+
+
+def _push(state, row):
+    """Replace each symbol's oldest window row with ``row``; returns the rows dropped."""
+    columns = np.arange(len(row))
+    slot = state["slot"]
+    dropped = state["ring"][slot, columns].copy()
+    state["ring"][slot, columns] = row
+    state["slot"] = (slot + 1) % len(state["ring"])
+    state["count"] = state["count"] + 1
+    return dropped
+
+
+def _take(state, i):
+    """Symbol ``i``'s part of a state (the last axis of every array is the symbol)."""
+    return {name: value[..., i:i + 1].copy() for name, value in state.items()}
+
+
+def _stack(states):
+    return {name: np.concatenate([state[name] for state in states], axis=-1) for name in states[0]}
+
+
+class Indicator:
+    """An indicator with fixed parameters; ``key`` identifies it in the cache."""
+
+    name = ""
+    outputs = ()
+
+    def __init__(self, *params):
+        self.params = params
+
+    @property
+    def key(self):
+        return (self.name, *self.params)
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.params}"
+
+    def compute(self, prices):
+        """({output: days x symbols array}, state after the last day, or None if too short to update)."""
+        raise NotImplementedError
+
+    def update(self, state, row):
+        """Advance ``state`` in place by one day's prices (one per symbol); returns {output: value per symbol}."""
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """Simple moving average over ``window`` days."""
+
+    name = "sma"
+    outputs = ("sma",)
+
+    def __init__(self, window=20):
+        super().__init__(window)
+        self.window = window
+
+    def compute(self, prices):
+        state = _ring(prices, self.window)
+        state["sum"] = state["ring"].sum(axis=0)
+        return {"sma": _window_sums(prices, self.window) / self.window}, state
+
+    def update(self, state, row):
+        state["sum"] += row - _push(state, row)
+        return {"sma": np.where(state["count"] >= self.window, state["sum"] / self.window, np.nan)}
+
+
+class EMA(Indicator):
+    """Exponential moving average with alpha = 2 / (span + 1), starting from the first price."""
+
+    name = "ema"
+    outputs = ("ema",)
+
+    def __init__(self, span=20):
+        super().__init__(span)
+        self.alpha = 2 / (span + 1)
+
+    def compute(self, prices):
+        ema = _ema(prices, self.alpha)
+        return {"ema": ema}, ({"ema": ema[-1].copy()} if len(ema) else None)
+
+    def update(self, state, row):
+        state["ema"] = self.alpha * row + (1 - self.alpha) * state["ema"]
+        return {"ema": state["ema"].copy()}
+
+
+def _rsi(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / loss)
+    # No losses in the window: 100, or 50 if the price did not move at all
+    return np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), rsi)
+
+
+class RSI(Indicator):
+    """Wilder's relative strength index over ``period`` days (0-100)."""
+
+    name = "rsi"
+    outputs = ("rsi",)
+
+    def __init__(self, period=14):
+        super().__init__(period)
+        self.period = period
+
+    def compute(self, prices):
+        rsi = np.full_like(prices, np.nan)
+        if len(prices) <= self.period:
+            return {"rsi": rsi}, None
+        change = np.diff(prices, axis=0)
+        gains, losses = np.maximum(change, 0), np.maximum(-change, 0)
+        # Seeded with the plain average of the first period, then smoothed with alpha = 1 / period
+        gain, loss = np.empty_like(gains[self.period - 1:]), np.empty_like(losses[self.period - 1:])
+        for moves, average in ((gains, gain), (losses, loss)):
+            average[0] = moves[:self.period].mean(axis=0)
+            average[1:] = _ema(moves[self.period:], 1 / self.period, average[0])
+        rsi[self.period:] = _rsi(gain, loss)
+        return {"rsi": rsi}, {"price": prices[-1].copy(), "gain": gain[-1].copy(), "loss": loss[-1].copy()}
+
+    def update(self, state, row):
+        change = row - state["price"]
+        state["price"] = np.array(row, dtype=float)
+        state["gain"] = (state["gain"] * (self.period - 1) + np.maximum(change, 0)) / self.period
+        state["loss"] = (state["loss"] * (self.period - 1) + np.maximum(-change, 0)) / self.period
+        return {"rsi": _rsi(state["gain"], state["loss"])}
+
+
+class MACD(Indicator):
+    """Fast minus slow EMA, its ``signal``-day EMA and the difference (histogram)."""
+
+    name = "macd"
+    outputs = ("macd", "signal", "histogram")
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        super().__init__(fast, slow, signal)
+        self.alphas = (2 / (fast + 1), 2 / (slow + 1), 2 / (signal + 1))
+
+    def compute(self, prices):
+        fast, slow = _ema(prices, self.alphas[0]), _ema(prices, self.alphas[1])
+        macd = fast - slow
+        signal = _ema(macd, self.alphas[2])
+        outputs = {"macd": macd, "signal": signal, "histogram": macd - signal}
+        if not len(prices):
+            return outputs, None
+        return outputs, {"fast": fast[-1].copy(), "slow": slow[-1].copy(), "signal": signal[-1].copy()}
+
+    def update(self, state, row):
+        fast_alpha, slow_alpha, signal_alpha = self.alphas
+        state["fast"] = fast_alpha * row + (1 - fast_alpha) * state["fast"]
+        state["slow"] = slow_alpha * row + (1 - slow_alpha) * state["slow"]
+        macd = state["fast"] - state["slow"]
+        state["signal"] = signal_alpha * macd + (1 - signal_alpha) * state["signal"]
+        return {"macd": macd, "signal": state["signal"].copy(), "histogram": macd - state["signal"]}
+
+
+class Bollinger(Indicator):
+    """``window``-day moving average with bands ``width`` standard deviations either side, and %B."""
+
+    name = "bollinger"
+    outputs = ("middle", "upper", "lower", "percent_b")
+
+    def __init__(self, window=20, width=2.0):
+        super().__init__(window, width)
+        self.window = window
+        self.width = width
+
+    def _bands(self, price, total, squares, shift):
+        mean = total / self.window
+        std = np.sqrt(np.maximum(squares / self.window - mean * mean, 0))
+        middle = shift + mean
+        upper, lower = middle + self.width * std, middle - self.width * std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_b = (price - lower) / (upper - lower)
+        return {"middle": middle, "upper": upper, "lower": lower, "percent_b": percent_b}
+
+    def compute(self, prices):
+        # Sums of squares are taken around each symbol's first price to limit cancellation
+        shift = prices[0].copy() if len(prices) else np.zeros(prices.shape[1])
+        shifted = prices - shift
+        outputs = self._bands(prices, _window_sums(shifted, self.window), _window_sums(shifted * shifted, self.window), shift)
+        state = _ring(shifted, self.window)
+        state.update(sum=state["ring"].sum(axis=0), squares=(state["ring"] ** 2).sum(axis=0), shift=shift)
+        return outputs, state
+
+    def update(self, state, row):
+        shifted = row - state["shift"]
+        dropped = _push(state, shifted)
+        state["sum"] += shifted - dropped
+        state["squares"] += shifted * shifted - dropped * dropped
+        outputs = self._bands(row, state["sum"], state["squares"], state["shift"])
+        full = state["count"] >= self.window
+        return {name: np.where(full, values, np.nan) for name, values in outputs.items()}
+
+
+class Volatility(Indicator):
+    """Standard deviation of daily log returns over ``window`` days, annualized over ``periods`` days a year."""
+
+    name = "volatility"
+    outputs = ("volatility",)
+
+    def __init__(self, window=20, periods=timeseries.TRADING_DAYS):
+        super().__init__(window, periods)
+        self.window = window
+        self.scale = math.sqrt(periods)
+
+    def _volatility(self, total, squares):
+        variance = np.maximum((squares - total * total / self.window) / (self.window - 1), 0)
+        return np.sqrt(variance) * self.scale
+
+    def compute(self, prices):
+        volatility = np.full_like(prices, np.nan)
+        if not len(prices):
+            return {"volatility": volatility}, None
+        returns = np.diff(np.log(prices), axis=0)
+        volatility[1:] = self._volatility(_window_sums(returns, self.window), _window_sums(returns * returns, self.window))
+        state = _ring(returns, self.window)
+        state.update(sum=state["ring"].sum(axis=0), squares=(state["ring"] ** 2).sum(axis=0), price=prices[-1].copy())
+        return {"volatility": volatility}, state
+
+    def update(self, state, row):
+        change = np.log(row / state["price"])
+        state["price"] = np.array(row, dtype=float)
+        dropped = _push(state, change)
+        state["sum"] += change - dropped
+        state["squares"] += change * change - dropped * dropped
+        return {"volatility": np.where(state["count"] >= self.window, self._volatility(state["sum"], state["squares"]), np.nan)}
+
+
+class _Entry:
+    """One cached series: buffers with spare rows past ``length``, and the indicator state after the last row."""
+
+    __slots__ = ("buffers", "length", "state")
+
+    def __init__(self, buffers, length, state):
+        self.buffers = buffers
+        self.length = length
+        self.state = state
+
+    @property
+    def last_date(self):
+        return self.buffers["date"][self.length - 1]
+
+    def series(self):
+        return {name: values[:self.length] for name, values in self.buffers.items()}
+
+    def extended(self, columns, state):
+        """A new entry with ``columns`` ({name: rows}) appended, written into the spare rows when they suffice.
+
+        Rows up to ``length`` are never rewritten, so series already handed out stay valid.
+        """
+        length = self.length + len(columns["date"])
+        buffers = self.buffers
+        if length > len(buffers["date"]):
+            buffers = {name: _grow(values, length + SPARE_BARS) for name, values in buffers.items()}
+        for name, values in columns.items():
+            buffers[name][self.length:length] = values
+        return _Entry(buffers, length, state)
+
+
+def _grow(values, size):
+    grown = np.empty(size, dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
+
+
+def _buffer(values, dtype=float):
+    buffer = np.empty(len(values) + SPARE_BARS, dtype=dtype)
+    buffer[:len(values)] = values
+    return buffer
+
+
+class IndicatorCache:
+    """Indicator series and state per (symbol, indicator key), least recently used evicted.
+
+    ``loader(symbol)`` returns a symbol's stored columns, as ``timeseries.load`` does.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_new_bars=MAX_NEW_BARS, loader=timeseries.load, field="adjusted_close"):
+        self.max_entries = max_entries
+        self.max_new_bars = max_new_bars
+        self.loader = loader
+        self.field = field
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.updates = 0
+        self.computes = 0
+
+    def get(self, symbols, indicator):
+        """{symbol: {"date": days since epoch, output: values}} for every symbol with stored history.
+
+        The arrays are shared with the cache; do not modify them.
+        """
+        with span("indicators.get", indicator=indicator.name) as current:
+            histories = {symbol: self.loader(symbol) for symbol in dict.fromkeys(symbols)}
+            results = {}
+            advance = defaultdict(list)
+            compute = defaultdict(list)
+            for symbol, history in histories.items():
+                dates = history["date"]
+                if not len(dates):
+                    continue
+                entry = self._lookup((symbol, indicator.key))
+                new = len(dates) - (entry.length if entry else 0)
+                if entry and new == 0 and dates[-1] == entry.last_date:
+                    results[symbol] = entry.series()
+                elif entry and entry.state is not None and 0 < new <= self.max_new_bars and dates[entry.length - 1] == entry.last_date:
+                    advance[new].append((symbol, entry))
+                else:
+                    compute[(len(dates), int(dates[0]), int(dates[-1]))].append(symbol)
+
+            for new, group in advance.items():
+                results.update(self._advance(group, new, indicator, histories))
+            for group in compute.values():
+                results.update(self._compute(group, indicator, histories))
+            updated, computed = sum(map(len, advance.values())), sum(map(len, compute.values()))
+            with self._lock:
+                self.hits += len(results) - updated - computed
+                self.updates += updated
+                self.computes += computed
+            current.set(result="hit" if not updated and not computed else "miss")
+        return results
+
+    def _compute(self, group, indicator, histories):
+        """Compute ``group`` from scratch, in matrices of the symbols whose dates match the first one's."""
+        dates = histories[group[0]]["date"]
+        batch = [symbol for symbol in group if np.array_equal(histories[symbol]["date"], dates)]
+        results = {}
+        for start in range(0, len(batch), BLOCK_SYMBOLS):
+            block = batch[start:start + BLOCK_SYMBOLS]
+            # One contiguous column per symbol, so each symbol's results are copied out in one piece
+            prices = np.empty((len(dates), len(block)), order="F")
+            for i, symbol in enumerate(block):
+                prices[:, i] = histories[symbol][self.field]
+            outputs, state = indicator.compute(prices)
+            for i, symbol in enumerate(block):
+                buffers = {"date": _buffer(dates, np.int32), **{name: _buffer(values[:, i]) for name, values in outputs.items()}}
+                entry = _Entry(buffers, len(dates), None if state is None else _take(state, i))
+                self._store((symbol, indicator.key), entry)
+                results[symbol] = entry.series()
+        # Same length and end points but different days in between; rare enough to do one by one
+        for symbol in group:
+            if symbol not in results:
+                results.update(self._compute([symbol], indicator, histories))
+        return results
+
+    def _advance(self, group, new, indicator, histories):
+        """Extend cached series by their ``new`` latest bars with ``indicator.update``."""
+        state = _stack([entry.state for _, entry in group])
+        prices = np.column_stack([np.asarray(histories[symbol][self.field][-new:], dtype=float) for symbol, _ in group])
+        rows = [indicator.update(state, prices[day]) for day in range(new)]
+        outputs = {name: np.array([row[name] for row in rows]) for name in indicator.outputs}
+        results = {}
+        for i, (symbol, entry) in enumerate(group):
+            columns = {"date": histories[symbol]["date"][-new:], **{name: values[:, i] for name, values in outputs.items()}}
+            entry = entry.extended(columns, _take(state, i))
+            self._store((symbol, indicator.key), entry)
+            results[symbol] = entry.series()
+        return results
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "updates": self.updates, "computes": self.computes, "entries": len(self._memory)}
+
+
+@shared("indicator_cache")
+def get_cache():
+    return IndicatorCache()
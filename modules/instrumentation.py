@@ -0,0 +1,232 @@
+"""
+Timing spans and Prometheus-style metrics for the Streamlit app.
+
+``span(name, **attributes)`` times a block and ``timed(name)`` a function.
+Every finished span is added to a process-wide histogram labeled with its
+name and attributes, so attributes must stay low-cardinality (an Alpha
+Vantage function or "hit"/"miss", never a symbol or a user). ``observe``
+records a duration measured some other way, e.g. time to first chunk.
+
+Spans finished while a Streamlit rerun is being traced (see
+``start_trace``) are also kept for the debug panel, including spans from
+worker threads started with ``contextvars.copy_context().run``. Setting
+METRICS_PORT serves the metrics at ``http://<host>:METRICS_PORT/metrics``,
+on loopback unless METRICS_HOST says otherwise. When METRICS_TOKEN is set,
+scrapes must send ``Authorization: Bearer <METRICS_TOKEN>``, as the backend's
+/metrics/ requires.
+"""
+
+import contextvars
+import functools
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+DEBUG_PANEL = os.getenv("SMARTSTOCK_DEBUG_PANEL", "").lower() in ("1", "true", "yes")
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+HISTOGRAM = "smartstock_span_duration_seconds"
+ERRORS = "smartstock_span_errors_total"
+
+_trace = contextvars.ContextVar("trace", default=None)
+_server = None
+_server_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation, used as a context manager; ``set`` adds attributes known only once it has run."""
+
+    __slots__ = ("name", "attributes", "start", "duration", "error")
+
+    def __init__(self, name, attributes, start=None):
+        self.name = name
+        self.attributes = attributes
+        self.start = start
+        self.duration = None
+        self.error = False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        self.error = exc_type is not None and issubclass(exc_type, Exception)
+        _finish(self)
+
+
+class Registry:
+    """Histograms of span durations and error counts, keyed by span name and attributes."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, attributes=None, error=False):
+        key = (name, tuple(sorted((label, _label_value(value)) for label, value in (attributes or {}).items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (last one is +Inf), sum, count, errors]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0]
+            series[0][bisect_left(self.buckets, seconds)] += 1
+            series[1] += seconds
+            series[2] += 1
+            series[3] += error
+
+    def snapshot(self):
+        """{(name, labels): (bucket counts, sum, count, errors)}"""
+        with self._lock:
+            return {key: (list(counts), total, count, errors) for key, (counts, total, count, errors) in self._series.items()}
+
+    def render(self):
+        """The metrics in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {HISTOGRAM} Duration of instrumented operations.",
+            f"# TYPE {HISTOGRAM} histogram",
+        ]
+        series = sorted(self.snapshot().items())
+        for (name, labels), (counts, total, count, _) in series:
+            base = _format_labels((("span", name),) + labels)
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{HISTOGRAM}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{HISTOGRAM}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f"{HISTOGRAM}_sum{{{base}}} {total}")
+            lines.append(f"{HISTOGRAM}_count{{{base}}} {count}")
+        lines += [f"# HELP {ERRORS} Instrumented operations that raised.", f"# TYPE {ERRORS} counter"]
+        for (name, labels), (_, _, _, errors) in series:
+            lines.append(f"{ERRORS}{{{_format_labels((('span', name),) + labels)}}} {errors}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _format_labels(labels):
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return ",".join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped))
+
+
+registry = Registry()
+
+
+def _finish(current):
+    registry.observe(current.name, current.duration, current.attributes, current.error)
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append(current)
+
+
+def span(name, **attributes):
+    """Context manager timing the enclosed block; ``as`` gives the Span so attributes can be added."""
+    return Span(name, attributes)
+
+
+def timed(name, **attributes):
+    """Decorator running every call of the function inside ``span(name, **attributes)``."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe(name, seconds, **attributes):
+    """Record a duration measured by the caller, ending now."""
+    current = Span(name, attributes, time.perf_counter() - seconds)
+    current.duration = seconds
+    _finish(current)
+
+
+class Trace:
+    """Spans finished during one Streamlit rerun."""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans = []
+        self.duration = None
+
+    def finish(self, **attributes):
+        """Record the rerun itself as a span and stop collecting."""
+        self.duration = time.perf_counter() - self.start
+        registry.observe(self.name, self.duration, attributes)
+        if _trace.get() is self:
+            _trace.set(None)
+        return self
+
+
+def start_trace(name="streamlit.rerun"):
+    """Collect the spans of the current rerun (the script thread and workers it starts)."""
+    trace = Trace(name)
+    _trace.set(trace)
+    return trace
+
+
+def show_debug_panel(trace):
+    """Sidebar table of the rerun's spans, in start order."""
+    import streamlit as st
+
+    with st.sidebar.expander(f"⏱️ Timings ({trace.duration * 1000:.0f} ms this rerun)"):
+        rows = sorted(list(trace.spans), key=lambda current: current.start)
+        st.dataframe(
+            {
+                "span": [current.name for current in rows],
+                "start ms": [round((current.start - trace.start) * 1000, 1) for current in rows],
+                "ms": [round(current.duration * 1000, 2) for current in rows],
+                "attributes": [", ".join(f"{key}={value}" for key, value in current.attributes.items()) for current in rows],
+                "error": [current.error for current in rows],
+            },
+            hide_index=True,
+        )
+        if METRICS_PORT:
+            st.caption(f"Process-wide metrics: http://localhost:{METRICS_PORT}/metrics")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        if METRICS_TOKEN and not hmac.compare_digest(self.headers.get("Authorization", "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            self.send_error(401)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port=METRICS_PORT, host=METRICS_HOST):
+    """Start the /metrics endpoint once per process if a port is configured."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
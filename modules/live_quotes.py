@@ -0,0 +1,99 @@
+"""
+Live quote updates pushed from the Django backend.
+
+One background thread per Streamlit process holds a server-sent-events
+connection to ``/api/quotes/stream/`` for every symbol any session is
+watching, and writes each pushed quote into the local quote cache. Pages
+therefore render from data the backend's refresher already fetched, and all
+sessions share one connection instead of polling separately.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from modules import alpha_vantage, backend_client
+
+MAX_WATCHED = 100
+RECONNECT_DELAY = 5
+READ_TIMEOUT = 60  # the backend sends a keep-alive comment every 15 seconds
+
+logger = logging.getLogger(__name__)
+
+_watched = OrderedDict()
+_lock = threading.Lock()
+_changed = threading.Event()
+_thread = None
+
+
+def watch(symbols):
+    """Subscribe to updates for ``symbols`` (the least recently watched fall off past MAX_WATCHED)."""
+    global _thread
+    with _lock:
+        added = False
+        for symbol in symbols:
+            added = added or symbol not in _watched
+            _watched[symbol] = None
+            _watched.move_to_end(symbol)
+        while len(_watched) > MAX_WATCHED:
+            _watched.popitem(last=False)
+        if added:
+            _changed.set()
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="live-quotes", daemon=True)
+            _thread.start()
+
+
+def _run():
+    global _thread
+    try:
+        while True:
+            with _lock:
+                symbols = list(_watched)
+                _changed.clear()
+            try:
+                _listen(symbols)
+            except requests.RequestException as e:
+                logger.info("quote stream disconnected: %s", e)
+                time.sleep(RECONNECT_DELAY)
+            except Exception:
+                # A malformed event must not end updates for the whole process
+                logger.warning("quote stream failed", exc_info=True)
+                time.sleep(RECONNECT_DELAY)
+    finally:
+        # Whatever stopped the thread, the next watch() starts a new one
+        with _lock:
+            _thread = None
+
+
+def _listen(symbols):
+    """Apply pushed quotes until the watch list changes or the connection drops.
+
+    A changed watch list is noticed on the next line received, at the latest
+    with the backend's keep-alive.
+    """
+    response = backend_client.session.get(
+        backend_client.url("api/quotes/stream/"),
+        params={"symbols": ",".join(symbols)},
+        # Compressed event streams can be held back by buffering on either side
+        headers={"Accept": "text/event-stream", "Accept-Encoding": "identity"},
+        stream=True,
+        timeout=(backend_client.REQUEST_TIMEOUT, READ_TIMEOUT),
+    )
+    with response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if _changed.is_set():
+                return
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event == "quote":
+                update = json.loads(line[5:])
+                alpha_vantage.quote_cache.put(update["symbol"], "GLOBAL_QUOTE", update["payload"], update["fetched_at"])
+            elif not line:
+                event = None
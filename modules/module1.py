@@ -6,20 +6,30 @@ Description  : AI Investment Agent to compare stock performance using Alpha Vant
 """
 
 import streamlit as st
-import json
+import numpy as np
 import os
-import requests
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from dotenv import load_dotenv
+from concurrent.futures import Future
+from modules import alpha_vantage, backend_client, indicators, live_quotes, reports, timeseries
+from modules.instrumentation import span, timed
+from modules.snapshot import StockSnapshot
+from modules.symbols import get_index as get_symbol_index, is_valid_symbol
 
-# Load API key
-load_dotenv()
-ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
-
-# Constants
-CACHE_FILE = "stock_cache.json"
+# Read quotes through the Django backend's shared cache instead of calling Alpha Vantage directly
+MARKET_DATA_FROM_BACKEND = os.getenv("MARKET_DATA_FROM_BACKEND", "").lower() in ("1", "true", "yes")
+# Seconds between redraws of the comparison table from pushed quotes (backend mode only)
+LIVE_TABLE_INTERVAL = 10
+# Latest-value columns of the indicator table: (label, indicator, output, format)
+INDICATOR_COLUMNS = [
+    ("SMA 50", indicators.SMA(50), "sma", "${:,.2f}"),
+    ("SMA 200", indicators.SMA(200), "sma", "${:,.2f}"),
+    ("EMA 20", indicators.EMA(20), "ema", "${:,.2f}"),
+    ("RSI 14", indicators.RSI(14), "rsi", "{:.1f}"),
+    ("MACD Histogram", indicators.MACD(), "histogram", "{:+.2f}"),
+    ("Bollinger %B", indicators.Bollinger(), "percent_b", "{:.2f}"),
+    ("20-Day Volatility", indicators.Volatility(20), "volatility", "{:.1%}"),
+]
+# Trading days shown in the Bollinger band chart
+BAND_CHART_DAYS = 252
 
 def run():
     st.header("📊 Stock Comparison Tool (Alpha Vantage)")
@@ -27,83 +37,268 @@ def run():
 
     stock1 = st.text_input("Enter first stock symbol (e.g., AAPL)")
     stock2 = st.text_input("Enter second stock symbol (e.g., MSFT)")
+    more_stocks = st.text_input("Add more symbols to compare (optional, comma separated)")
 
+    symbols = []
     if stock1 and stock2:
-        data1 = get_stock_information(stock1.upper())
-        data2 = get_stock_information(stock2.upper())
+        inputs = [stock1, stock2] + [text for text in more_stocks.split(",") if text.strip()]
+        symbols = [resolve_symbol(text) for text in inputs]
+        if not all(symbols):
+            return
+        symbols = list(dict.fromkeys(symbols))
 
-        if not data1 or not data2:
-            st.error("Failed to retrieve data for one or both stocks.")
+        stocks = get_stock_information_many(symbols)
+        if not all(stocks.values()):
+            st.error("Failed to retrieve data for one or more stocks.")
         else:
-            st.subheader(f"Comparison: {stock1.upper()} vs {stock2.upper()}")
-            st.write(data1)
-            st.write(data2)
+            data = [stocks[symbol] for symbol in symbols]
+            st.subheader(f"Comparison: {' vs '.join(symbols)}")
+            if MARKET_DATA_FROM_BACKEND:
+                live_table(symbols, data)
+            else:
+                st.table([stock.row() for stock in data])
+            download_slot = st.empty()
+
+            with_history = st.checkbox("Show historical comparison")
+            if with_history:
+                refresh_history(symbols)
+
+            # Queue the PDF before drawing charts so it renders while the page does
+            job_id = reports.submit_job(data, with_history)
+            if with_history:
+                show_history(symbols)
+                show_indicators(symbols)
+
+            with download_slot, st.spinner(f"Preparing PDF report ({reports.job_status(job_id)})..."), span("report.wait"):
+                pdf_bytes = reports.job_result(job_id)
+            download_slot.download_button("Download PDF Report", pdf_bytes, file_name="stock_comparison_alpha.pdf")
+
+    tokens = st.session_state.get("tokens")
+    if tokens:
+        with st.expander("My watchlist and portfolio"):
+            show_portfolio(tokens, symbols)
+
+    with st.expander("Cache and rate limit statistics"):
+        st.json({"cache": alpha_vantage.quote_cache.stats(), "rate_limit": alpha_vantage.limiter.stats()})
+
+@st.fragment(run_every=LIVE_TABLE_INTERVAL)
+def live_table(symbols, data):
+    """Comparison table that redraws itself as the backend pushes new quotes into the local cache."""
+    stocks = get_stock_information_many(symbols)
+    st.table([(stocks[symbol] or stock).row() for symbol, stock in zip(symbols, data)])
+
+def show_portfolio(tokens, compared):
+    """Saved watchlist and holdings with their analytics, kept by the backend between sessions."""
+    if compared and st.button("Add compared symbols to my watchlist"):
+        for symbol in compared:
+            backend_client.add_to_watchlist(tokens, symbol)
+
+    with st.form("holding"):
+        symbol_column, quantity_column, cost_column = st.columns(3)
+        symbol = symbol_column.text_input("Symbol")
+        quantity = quantity_column.number_input("Quantity (0 removes)", min_value=0.0)
+        average_cost = cost_column.number_input("Average cost", min_value=0.0)
+        if st.form_submit_button("Save holding") and symbol:
+            symbol = resolve_symbol(symbol)
+            if symbol and quantity:
+                backend_client.set_holding(tokens, symbol, quantity, average_cost)
+            elif symbol:
+                backend_client.remove_holding(tokens, symbol)
+
+    response = backend_client.dashboard(tokens)
+    if response.status_code != 200:
+        st.error("Could not load your portfolio. Please log in again.")
+        return
+    dashboard = response.json()
+
+    if dashboard["holdings"]:
+        value, pnl, volatility = st.columns(3)
+        value.metric("Value", f"${dashboard['value']:,.2f}")
+        pnl.metric("P&L", f"${dashboard['pnl']:,.2f}", f"{dashboard['pnl_pct']:.1%}" if dashboard["pnl_pct"] is not None else None)
+        if dashboard["volatility"] is not None:
+            volatility.metric("Volatility", f"{dashboard['volatility']:.1%}", f"return {dashboard['weighted_return']:.1%}", delta_color="off")
+        st.table([
+            {
+                "Symbol": holding["symbol"],
+                "Quantity": holding["quantity"],
+                "Average Cost": f"${holding['average_cost']:,.2f}",
+                "Price": f"${holding['price']:,.2f}" if holding["price"] is not None else "N/A",
+                "Value": f"${holding['value']:,.2f}",
+                "P&L": f"${holding['pnl']:,.2f}",
+                "Allocation": f"{holding['allocation']:.1%}",
+            }
+            for holding in dashboard["holdings"]
+        ])
+    if dashboard["watchlist"]:
+        st.caption("Watchlist")
+        st.table([
+            {
+                "Symbol": item["symbol"],
+                "Price": f"${item['quote']['Global Quote'].get('05. price', 'N/A')}" if item["quote"] else "N/A",
+            }
+            for item in dashboard["watchlist"]
+        ])
+
+def resolve_symbol(text):
+    """Turn a ticker or company name into a known symbol, suggesting alternatives for typos."""
+    index = get_symbol_index()
+    symbol = index.resolve(text)
+    if symbol:
+        if not index.verified(symbol):
+            st.warning(f"'{symbol}' is not in the symbol list yet; it is looked up unverified.")
+        return symbol
 
-            pdf_path = create_pdf_report(data1, data2)
-            with open(pdf_path, "rb") as f:
-                st.download_button("Download PDF Report", f, file_name="stock_comparison_alpha.pdf")
+    suggestions = index.suggest(text)
+    hint = f" Did you mean {', '.join(suggestions)}?" if suggestions else ""
+    st.error(f"Unknown or ambiguous stock symbol '{text}'.{hint}")
+    return None
 
 def get_stock_information(symbol):
-    """Fetch stock data from Alpha Vantage."""
-    if not ALPHA_API_KEY:
+    """Fetch a StockSnapshot from Alpha Vantage, or None."""
+    return get_stock_information_many([symbol])[symbol]
+
+def _resolved(value=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+    return future
+
+def backend_payloads(symbols):
+    """Quotes from the local cache (kept current by ``live_quotes``), the rest in one bulk backend request.
+
+    Shaped like the futures from ``alpha_vantage.submit``.
+    """
+    pending = {}
+    for symbol in symbols:
+        quote = alpha_vantage.quote_cache.get(symbol, "GLOBAL_QUOTE")
+        overview = alpha_vantage.quote_cache.get(symbol, "OVERVIEW")
+        if quote is not None and overview is not None:
+            pending[symbol] = (_resolved(quote), _resolved(overview))
+
+    missing = [symbol for symbol in symbols if symbol not in pending]
+    if missing:
+        try:
+            data = backend_client.quotes(missing)
+        except Exception as e:
+            data = {"quotes": {}, "errors": {symbol: str(e) for symbol in missing}}
+        for symbol in missing:
+            entry = data["quotes"].get(symbol)
+            if entry is None:
+                error = ValueError(data["errors"].get(symbol, "No data available"))
+                pending[symbol] = (_resolved(error=error), _resolved(error=error))
+            else:
+                for function, payload in entry.items():
+                    alpha_vantage.quote_cache.put(symbol, function, payload)
+                pending[symbol] = (_resolved(entry["GLOBAL_QUOTE"]), _resolved(entry["OVERVIEW"]))
+    return pending
+
+@timed("quotes.lookup")
+def get_stock_information_many(symbols):
+    """Fetch StockSnapshots (None on failure) for several symbols concurrently, keyed by symbol."""
+    symbols = list(dict.fromkeys(symbols))
+    if not MARKET_DATA_FROM_BACKEND and not os.getenv("ALPHA_API_KEY"):
         st.error("Alpha Vantage API key not found. Set it in the .env file.")
-        return None
-
-    cache_data = {}
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as file:
-            try:
-                cache_data = json.load(file)
-            except json.JSONDecodeError:
-                cache_data = {}
-
-    if symbol in cache_data:
-        return cache_data[symbol]
-
-    try:
-        quote_url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey={ALPHA_API_KEY}"
-        overview_url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={ALPHA_API_KEY}"
-
-        quote_data = requests.get(quote_url).json().get("Global Quote", {})
-        overview_data = requests.get(overview_url).json()
-
-        if not quote_data or "01. symbol" not in quote_data:
-            raise ValueError("Invalid stock symbol or no data available")
-
-        stock_data = {
-            "Name": overview_data.get("Name", "N/A"),
-            "Symbol": symbol,
-            "Market Cap": f"${round(float(overview_data.get('MarketCapitalization', 0)) / 1e9, 2)} Billion",
-            "Current Price": f"${quote_data.get('05. price', 'N/A')}",
-            "52-Week High": f"${overview_data.get('52WeekHigh', 'N/A')}",
-            "52-Week Low": f"${overview_data.get('52WeekLow', 'N/A')}"
+        return {symbol: None for symbol in symbols}
+
+    results = {}
+    for symbol in symbols:
+        if not is_valid_symbol(symbol):
+            st.error(f"Error fetching data for {symbol}: Unknown stock symbol")
+            results[symbol] = None
+
+    valid = [symbol for symbol in symbols if symbol not in results]
+    for symbol in valid:
+        snapshot = alpha_vantage.quote_cache.get_snapshot(symbol)
+        if snapshot is not None:
+            results[symbol] = snapshot
+
+    wanted = [symbol for symbol in valid if symbol not in results]
+    if MARKET_DATA_FROM_BACKEND:
+        live_quotes.watch(valid)
+        pending = backend_payloads(wanted)
+    else:
+        # Submit every endpoint up front so all requests are in flight together
+        pending = {
+            symbol: (alpha_vantage.submit(symbol, "GLOBAL_QUOTE"), alpha_vantage.submit(symbol, "OVERVIEW"))
+            for symbol in wanted
         }
 
-        cache_data[symbol] = stock_data
-        with open(CACHE_FILE, "w") as file:
-            json.dump(cache_data, file)
+    for symbol, (quote_future, overview_future) in pending.items():
+        try:
+            quote, overview = quote_future.result(), overview_future.result()
+            # As fresh as the quote it shows, which may have come from the cache
+            entry = alpha_vantage.quote_cache.lookup(symbol, "GLOBAL_QUOTE")
+            snapshot = StockSnapshot.from_payloads(symbol, quote, overview, entry[1] if entry else None)
+            alpha_vantage.quote_cache.put_snapshot(snapshot)
+            results[symbol] = snapshot
+
+        except Exception as e:
+            st.error(f"Error fetching data for {symbol}: {e}")
+            results[symbol] = None
+
+    return results
+
+def refresh_history(symbols):
+    """Append any missing daily bars for the given symbols."""
+    with st.spinner("Updating price history..."), span("history.refresh"):
+        errors = timeseries.refresh_many(symbols)
+    for symbol, error in errors.items():
+        st.warning(f"Could not update history for {symbol}: {error}")
 
-        return stock_data
+def show_history(symbols):
+    """Render normalized price history and risk metrics from the stored daily series."""
+    metrics = timeseries.compare(symbols)
+    if metrics is None:
+        st.info("Not enough price history to compare yet.")
+        return
 
-    except Exception as e:
-        st.error(f"Error fetching data for {symbol}: {e}")
-        return None
+    dates, prices = timeseries.price_matrix(symbols)
+    normalized = prices / prices[0]
+    chart = {"Date": timeseries.to_datetime64(dates)}
+    chart.update({symbol: normalized[:, i] for i, symbol in enumerate(symbols)})
+    st.subheader(f"Growth of $1 ({metrics['start']} to {metrics['end']})")
+    st.line_chart(chart, x="Date")
 
-def create_pdf_report(stock1, stock2, filename="stock_comparison_alpha.pdf"):
-    file_path = os.path.join(os.getcwd(), filename)
-    pdf = SimpleDocTemplate(file_path, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
+    st.table({
+        "Symbol": symbols,
+        "Total Return": [f"{value:.1%}" for value in metrics["total_return"]],
+        "Annualized Return": [f"{value:.1%}" for value in metrics["annualized_return"]],
+        "Annualized Volatility": [f"{value:.1%}" for value in metrics["annualized_volatility"]],
+        "Max Drawdown": [f"{value:.1%}" for value in metrics["max_drawdown"]],
+        f"Beta vs {metrics['benchmark']}": [f"{value:.2f}" for value in metrics["beta"]],
+    })
+    st.caption("Correlation of daily returns")
+    st.table({symbol: [f"{value:.2f}" for value in row] for symbol, row in zip(symbols, metrics["correlation"])})
 
-    story.append(Paragraph("Stock Comparison Report (Alpha Vantage)", styles['h1']))
-    story.append(Spacer(1, 12))
+def show_indicators(symbols):
+    """Render the latest technical indicators and a Bollinger band chart from the stored daily series."""
+    cache = indicators.get_cache()
+    with span("indicators.show"):
+        columns = {"Symbol": symbols}
+        for label, indicator, output, spec in INDICATOR_COLUMNS:
+            series = cache.get(symbols, indicator)
+            latest = [series[symbol][output][-1] if symbol in series else np.nan for symbol in symbols]
+            columns[label] = ["N/A" if np.isnan(value) else spec.format(value) for value in latest]
+    st.subheader("Technical indicators")
+    st.table(columns)
 
-    for stock in [stock1, stock2]:
-        story.append(Paragraph(f"Stock: {stock.get('Name')} ({stock.get('Symbol')})", styles['h2']))
-        for key, value in stock.items():
-            if key != "Symbol":
-                story.append(Paragraph(f"{key}: {value}", styles['Normal']))
-        story.append(Spacer(1, 12))
+    symbol = st.selectbox("Bollinger bands for", symbols)
+    bands = cache.get([symbol], indicators.Bollinger()).get(symbol)
+    if bands is None:
+        return
+    prices = timeseries.load(symbol)["adjusted_close"][:len(bands["date"])]
+    recent = slice(-BAND_CHART_DAYS, None)
+    st.line_chart({
+        "Date": timeseries.to_datetime64(bands["date"][recent]),
+        "Price": prices[recent],
+        "Upper": bands["upper"][recent],
+        "Middle": bands["middle"][recent],
+        "Lower": bands["lower"][recent],
+    }, x="Date")
 
-    pdf.build(story)
-    return file_path
+@timed("report.create")
+def create_pdf_report(stock1, stock2):
+    """Return the comparison report for two stocks as PDF bytes (cached by content)."""
+    return reports.submit_report([stock1, stock2]).result()
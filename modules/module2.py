@@ -1,50 +1,140 @@
 # module2.py (Gemini Chatbot)
+import logging
 import os
+import threading
+import time
+import uuid
 import streamlit as st
-import google.generativeai as genai
-import fitz  # PyMuPDF for PDF processing
-from PIL import Image
-from dotenv import load_dotenv
+from modules import uploads
+from modules.instrumentation import observe, span
+from modules.conversation import ConversationStore, build_context, extractive_summary
+from modules.pdf_index import get_pdf_index
+from modules.resources import shared
+
+MODEL_NAME = "gemini-1.5-flash-latest"
+HISTORY_PAGE_SIZE = 20
+# Stored as the reply when Gemini fails or is interrupted before sending any text
+NO_REPLY = "*(No response.)*"
+
+logger = logging.getLogger(__name__)
+
+@shared("conversation_store")
+def get_conversation_store():
+    return ConversationStore()
+
+@shared("gemini_model", warm=True)
+def get_model():
+    """Configure Gemini and create the model once per process, not on every rerun."""
+    # Imported here: the SDK takes most of a second to load and only the chatbot needs it
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    return genai.GenerativeModel(model_name=MODEL_NAME)
+
+def _collect(stream, parts):
+    """Pass ``stream`` through, keeping what was yielded in ``parts``."""
+    for text in stream:
+        parts.append(text)
+        yield text
+
+def stream_response(model, inputs, cancel_event):
+    """Yield response text as Gemini produces it, stopping early once cancel_event is set."""
+    start = time.perf_counter()
+    first_chunk_at = None
+    text_length = 0
+    response = None
+    cancelled = False
+    try:
+        response = model.generate_content(inputs, stream=True)
+        for chunk in response:
+            if cancel_event.is_set():
+                cancelled = True
+                break
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety stops) have nothing to render
+                continue
+            text_length += len(text)
+            yield text
+    finally:
+        total = time.perf_counter() - start
+        usage = getattr(response, "usage_metadata", None) if response is not None and not cancelled else None
+        # Roughly four characters per token when the API does not report usage
+        tokens = getattr(usage, "candidates_token_count", 0) or text_length // 4
+        if first_chunk_at is not None:
+            observe("gemini.first_chunk", first_chunk_at - start)
+        observe("gemini.stream", total, cancelled=cancelled)
+        logger.info(
+            "gemini response: ttft=%.3fs total=%.3fs tokens=%d tokens/s=%.1f cancelled=%s",
+            (first_chunk_at or time.perf_counter()) - start, total, tokens, tokens / total if total else 0.0, cancelled,
+        )
+
+def summarize_turns(model, summary, messages):
+    """Fold turns that no longer fit the context window into the running summary."""
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    request = (
+        "Update the summary of a conversation between a user and an assistant with the new turns below. "
+        "Keep facts, names and numbers the user may refer back to. Answer with the summary only, under 200 words.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"
+    )
+    try:
+        with span("gemini.summarize"):
+            return model.generate_content(request).text
+    except Exception as e:
+        logger.warning("conversation summary failed, keeping an extractive one: %s", e)
+        return extractive_summary(summary, messages)
 
 def run():
     st.title("🤖 Multimodal Chatbot with Gemini Flash ⚡️")
     st.caption("Chat with Google's Gemini Flash model using images, PDFs, and text input.")
 
-    # Load environment variables
-    load_dotenv()
+    # .env is loaded once per process by modules.env
     API_KEY = os.getenv("GOOGLE_API_KEY")
 
     if not API_KEY:
         st.error("API Key not found. Make sure it's set in the .env file.")
         return
 
-    # Configure Gemini AI
-    genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash-latest")
+    model = get_model()
+    conversation_store = get_conversation_store()
 
-    # Chat history initialization
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    # Chat history lives in the conversation store; the session only keeps its id
+    if "conversation_id" not in st.session_state or st.button("🧹 New chat"):
+        st.session_state.conversation_id = uuid.uuid4().hex
+        st.session_state.visible_messages = HISTORY_PAGE_SIZE
+    conversation_id = st.session_state.conversation_id
 
     # File upload
     uploaded_file = st.file_uploader("📎 Upload an image or PDF", type=["jpg", "jpeg", "png", "pdf"])
-    pdf_text = None
+    pdf_index = None
     uploaded_image = None
+    page_images = []
 
     if uploaded_file:
         file_extension = uploaded_file.name.split(".")[-1].lower()
 
         if file_extension in ["jpg", "jpeg", "png"]:
-            uploaded_image = Image.open(uploaded_file)
-            st.image(uploaded_image, caption="🖼️ Uploaded Image", use_column_width=True)
+            # Downscaled and re-encoded once per file; reruns and follow-up questions reuse it
+            uploaded_image = uploads.prepare_image(uploaded_file.getvalue())
+            st.image(uploaded_image.data, caption="🖼️ Uploaded Image", use_column_width=True)
 
         elif file_extension == "pdf":
-            with fitz.open(stream=uploaded_file.read(), filetype="pdf") as pdf:
-                pdf_text = "\n".join([page.get_text("text") for page in pdf])
-            st.success("✅ PDF uploaded. Extracted text will be used for responses.")
-
-    # Chat display
-    for message in st.session_state.messages:
+            # Extracted and indexed once per file; reruns reuse the cached index
+            pdf_index = get_pdf_index(uploaded_file.getvalue())
+            st.success(f"✅ PDF uploaded ({pdf_index.pages} pages). Relevant passages will be used for responses.")
+            if pdf_index.scanned_pages and st.checkbox(
+                f"🖨️ Send scanned pages as images ({len(pdf_index.scanned_pages)} found, "
+                f"first {uploads.MAX_PDF_PAGE_IMAGES} used)"
+            ):
+                page_images = uploads.prepare_pdf_pages(uploaded_file.getvalue(), pdf_index.scanned_pages)
+
+    # Chat display, newest page only
+    hidden = conversation_store.count(conversation_id) - st.session_state.visible_messages
+    if hidden > 0 and st.button(f"⬆️ Show earlier messages ({hidden} more)"):
+        st.session_state.visible_messages += HISTORY_PAGE_SIZE
+    for message in conversation_store.latest(conversation_id, st.session_state.visible_messages):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -52,24 +142,41 @@ def run():
     prompt = st.chat_input("💬 Ask something...")
 
     if prompt:
+        # A new prompt cancels any response still streaming for this session
+        previous = st.session_state.get("cancel_generation")
+        if previous is not None:
+            previous.set()
+        cancel_event = threading.Event()
+        st.session_state.cancel_generation = cancel_event
+
+        history = build_context(
+            conversation_store, conversation_id,
+            summarize=lambda summary, messages: summarize_turns(model, summary, messages),
+        )
         inputs = [prompt]
-        st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         if uploaded_image:
-            inputs.append(uploaded_image)
-
-        if pdf_text:
-            inputs.append(pdf_text)
-
-        with st.spinner("🤖 Generating response..."):
-            response = model.generate_content(inputs)
-
-        with st.chat_message("assistant"):
-            st.markdown(response.text)
-
-        st.session_state.messages.append({"role": "assistant", "content": response.text})
+            inputs.append(uploads.as_part(uploaded_image))
+
+        inputs += [uploads.as_part(image) for image in page_images]
+
+        if pdf_index:
+            inputs.append(pdf_index.context_for(prompt))
+
+        parts = []
+        try:
+            with st.chat_message("assistant"):
+                contents = history + [{"role": "user", "parts": inputs}]
+                st.write_stream(_collect(stream_response(model, contents, cancel_event), parts))
+        except Exception as e:
+            logger.warning("Gemini response failed: %s", e)
+            st.error(f"⚠️ No response from Gemini: {e}")
+        finally:
+            # Saved here, after the stream, even when a new prompt interrupts this run (a
+            # BaseException), so a user turn is never stored without a reply
+            conversation_store.append_turn(conversation_id, prompt, "".join(parts) or NO_REPLY)
 
     if uploaded_file and not prompt:
         st.warning("⚠️ Please enter a question to analyze the uploaded file.")
@@ -0,0 +1,120 @@
+"""
+Stock screener: filter the whole listed universe on fundamentals.
+
+Queries go to the Django backend's screener table (``api/screener.py``,
+built by ``manage.py build_screener``), so a screen costs one request
+however many symbols it covers and no Alpha Vantage calls.
+"""
+
+from datetime import datetime
+
+import streamlit as st
+
+from modules import backend_client
+from modules.instrumentation import timed
+
+SORTS = {
+    "Market cap": "market_cap",
+    "P/E ratio": "pe_ratio",
+    "Dividend yield": "dividend_yield",
+    "Distance from 52-week low": "from_low",
+    "Beta": "beta",
+}
+MAX_ROWS = 200
+# Matches the backend's screener.LOW_COVERAGE
+LOW_COVERAGE = 0.9
+
+
+def run():
+    st.header("🔎 Stock Screener")
+    st.caption("Screen every listed stock on fundamentals from the backend's fundamentals table.")
+
+    if "screener_result" not in st.session_state:
+        # The largest companies until the first screen, which also lists the sectors to pick from
+        st.session_state.screener_result = screen({"sort": f"-{SORTS['Market cap']}", "limit": MAX_ROWS})
+    sectors = st.session_state.screener_result.get("categories", {}).get("sector", [])
+
+    with st.form("screener"):
+        cap_column, pe_column, low_column, yield_column = st.columns(4)
+        market_cap_min = cap_column.number_input("Market cap at least ($B)", min_value=0.0, value=0.0)
+        pe_max = pe_column.number_input("P/E at most (0 = any)", min_value=0.0, value=0.0)
+        from_low_max = low_column.number_input("Within % of 52-week low (0 = any)", min_value=0.0, value=0.0)
+        yield_min = yield_column.number_input("Dividend yield at least (%)", min_value=0.0, value=0.0)
+        sector_column, sort_column, order_column = st.columns([2, 2, 1])
+        sector = sector_column.selectbox("Sector", ["Any", *sectors])
+        sort = sort_column.selectbox("Sort by", list(SORTS))
+        descending = order_column.checkbox("Descending", value=True)
+        submitted = st.form_submit_button("Screen")
+
+    if submitted:
+        params = {
+            "market_cap_min": market_cap_min * 1e9 or None,
+            # Negative or missing earnings have no meaningful P/E; a cap implies a positive one
+            "pe_ratio_min": 0 if pe_max else None,
+            "pe_ratio_max": pe_max or None,
+            "from_low_max": from_low_max / 100 if from_low_max else None,
+            "dividend_yield_min": yield_min / 100 or None,
+            "sector": None if sector == "Any" else sector,
+            "sort": f"{'-' if descending else ''}{SORTS[sort]}",
+            "limit": MAX_ROWS,
+        }
+        st.session_state.screener_result = screen({name: value for name, value in params.items() if value is not None})
+
+    result = st.session_state.screener_result
+    if "error" in result:
+        st.error(f"Screener unavailable: {result['error']}")
+        return
+
+    built = datetime.fromtimestamp(result["built_at"]).strftime("%Y-%m-%d %H:%M")
+    st.subheader(f"{result['count']} of {result['universe']} stocks match")
+    st.caption(f"Fundamentals as of {built}. Showing up to {MAX_ROWS}.")
+    listed = result.get("listed") or result["universe"]
+    if result["universe"] < LOW_COVERAGE * listed:
+        st.warning(
+            f"The fundamentals table covers only {result['universe']} of {listed} listed stocks "
+            f"({result['universe'] / listed:.0%}), so screens miss the rest. Filling it takes a premium "
+            "Alpha Vantage quota or a shorter universe (`manage.py build_screener --symbols`)."
+        )
+    rows = result["results"]
+    if not rows:
+        return
+    # Numbers stay numeric so the table sorts correctly; formatting is applied by the column config
+    st.dataframe(
+        {
+            "Symbol": [row["symbol"] for row in rows],
+            "Name": [row["name"] for row in rows],
+            "Sector": [row["sector"] for row in rows],
+            "Market Cap ($B)": [None if row["market_cap"] is None else row["market_cap"] / 1e9 for row in rows],
+            "Price": [row["price"] for row in rows],
+            "P/E": [row["pe_ratio"] for row in rows],
+            "Dividend Yield": [_percent(row["dividend_yield"]) for row in rows],
+            "Above 52-Week Low": [_percent(row["from_low"]) for row in rows],
+            "Beta": [row["beta"] for row in rows],
+        },
+        hide_index=True,
+        column_config={
+            "Market Cap ($B)": st.column_config.NumberColumn(format="%.2f"),
+            "Price": st.column_config.NumberColumn(format="$%.2f"),
+            "P/E": st.column_config.NumberColumn(format="%.1f"),
+            "Dividend Yield": st.column_config.NumberColumn(format="%.2f%%"),
+            "Above 52-Week Low": st.column_config.NumberColumn(format="%.1f%%"),
+            "Beta": st.column_config.NumberColumn(format="%.2f"),
+        },
+    )
+
+
+@timed("screener.query")
+def screen(params):
+    """The backend's answer, or {"error": message}."""
+    try:
+        response = backend_client.screener(params)
+    except Exception as e:
+        return {"error": str(e)}
+    data = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else {}
+    if response.status_code != 200:
+        return {"error": data.get("error", f"HTTP {response.status_code}")}
+    return data
+
+
+def _percent(fraction):
+    return None if fraction is None else fraction * 100
@@ -0,0 +1,118 @@
+"""
+Text extraction and lexical retrieval for PDFs uploaded to the chatbot.
+
+Each PDF is extracted once per process, keyed by the SHA-256 of its bytes,
+split into overlapping word chunks and indexed with BM25. Prompts then carry
+only the most relevant chunks instead of the whole document.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from modules.instrumentation import span, timed
+
+MAX_CACHED_DOCUMENTS = 16
+CHUNK_WORDS = 200
+CHUNK_OVERLAP = 40
+TOP_K = 6
+# Documents this small are cheaper to send whole than to retrieve from
+SMALL_DOCUMENT_WORDS = 2000
+# Pages with less extractable text than this are treated as scanned images
+SCANNED_PAGE_CHARS = 20
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_documents = OrderedDict()
+_lock = threading.Lock()
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class PdfIndex:
+    """Chunks of one PDF with a BM25 inverted index over them."""
+
+    def __init__(self, pages):
+        self.pages = len(pages)
+        self.text = "\n".join(pages)
+        self.scanned_pages = [number for number, text in enumerate(pages, start=1) if len(text.strip()) < SCANNED_PAGE_CHARS]
+        self.words = 0
+        self.chunks = []
+        for page_number, text in enumerate(pages, start=1):
+            words = text.split()
+            self.words += len(words)
+            step = CHUNK_WORDS - CHUNK_OVERLAP
+            for start in range(0, max(len(words) - CHUNK_OVERLAP, 1), step):
+                chunk = " ".join(words[start:start + CHUNK_WORDS])
+                if chunk:
+                    self.chunks.append((page_number, chunk))
+
+        self._postings = {}
+        self._lengths = []
+        for chunk_id, (_, chunk) in enumerate(self.chunks):
+            terms = Counter(tokenize(chunk))
+            self._lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self._postings.setdefault(term, []).append((chunk_id, count))
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def search(self, query, k=TOP_K):
+        """Return the ``k`` best (page, chunk) pairs for ``query``, in document order."""
+        scores = Counter()
+        total = len(self.chunks)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[chunk_id] / self._average_length)
+                scores[chunk_id] += idf * count * (BM25_K1 + 1) / (count + norm)
+
+        best = sorted(chunk_id for chunk_id, _ in scores.most_common(k))
+        if not best:
+            # No term overlap (e.g. "summarize this"): fall back to the opening of the document
+            best = range(min(k, total))
+        return [self.chunks[chunk_id] for chunk_id in best]
+
+    def context_for(self, prompt, k=TOP_K):
+        """Text to send alongside ``prompt``: the whole document if small, else the top-k chunks."""
+        if self.words <= SMALL_DOCUMENT_WORDS:
+            return self.text
+        excerpts = "\n\n".join(f"[Page {page}] {chunk}" for page, chunk in self.search(prompt, k))
+        return f"Relevant excerpts from the uploaded PDF ({self.pages} pages):\n\n{excerpts}"
+
+
+@timed("pdf.extract")
+def extract_pages(data):
+    """Extract the text of every page of a PDF given as bytes."""
+    import fitz  # PyMuPDF, loaded on the first upload rather than with the chatbot page
+
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        return [page.get_text("text") for page in pdf]
+
+
+def get_pdf_index(data):
+    """Return the index for a PDF, extracting it only the first time these bytes are seen."""
+    key = hashlib.sha256(data).hexdigest()
+    with _lock:
+        index = _documents.get(key)
+        if index is not None:
+            _documents.move_to_end(key)
+            return index
+
+    pages = extract_pages(data)
+    with span("pdf.index"):
+        index = PdfIndex(pages)
+    with _lock:
+        _documents[key] = index
+        while len(_documents) > MAX_CACHED_DOCUMENTS:
+            _documents.popitem(last=False)
+    return index
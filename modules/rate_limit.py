@@ -0,0 +1,139 @@
+"""
+Client-side token-bucket rate limiting for the Alpha Vantage free tier.
+
+One limiter is shared by every session in the process. Pointing it at a
+SQLite file shares the same buckets across processes as well.
+"""
+
+import sqlite3
+import threading
+import time
+
+# Pseudo-bucket holding the time until which ``penalize`` stops all requests
+_BLOCKED = "blocked"
+
+
+class ThrottledError(RuntimeError):
+    """Raised when a request can not be sent without exceeding the quota."""
+
+
+class RateLimiter:
+    """Several token buckets (e.g. per-minute and per-day) that must all have a token to send a request."""
+
+    def __init__(self, limits, path=None, max_wait=30.0):
+        # limits: {"minute": (5, 60), "day": (25, 86400)} -> (requests, seconds)
+        self.limits = dict(limits)
+        self.path = path
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets = self._full_buckets(time.time())
+        self.waiting = 0
+        self.requests = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+        if path:
+            with sqlite3.connect(path, timeout=10) as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+                )
+
+    def acquire(self):
+        """Block until every bucket has a token, or raise ThrottledError if that would take longer than max_wait."""
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self._take()
+                waited = time.monotonic() - start
+                if wait == 0:
+                    self._record(waited)
+                    return waited
+                if waited + wait > self.max_wait:
+                    with self._lock:
+                        self.throttled += 1
+                    raise ThrottledError(f"Alpha Vantage rate limit reached; retry in {int(wait) + 1}s")
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def penalize(self, seconds):
+        """Send no request for ``seconds`` (after the API reports throttling); the buckets keep their tokens."""
+        def block(buckets, now):
+            _, until = buckets[_BLOCKED]
+            buckets[_BLOCKED] = (0.0, max(until, now + seconds))
+        self._update(block)
+
+    def _full_buckets(self, now):
+        buckets = {name: (float(capacity), now) for name, (capacity, _) in self.limits.items()}
+        buckets[_BLOCKED] = (0.0, 0.0)
+        return buckets
+
+    def _take(self):
+        """Take one token from every bucket if possible; otherwise return the seconds until one is available."""
+        result = {}
+
+        def take(buckets, now):
+            _, until = buckets[_BLOCKED]
+            waits = [until - now] if until > now else []
+            for name, (capacity, period) in self.limits.items():
+                tokens, updated = buckets[name]
+                tokens = min(capacity, tokens + (now - updated) * capacity / period)
+                buckets[name] = (tokens, now)
+                if tokens < 1:
+                    waits.append((1 - tokens) * period / capacity)
+            if not waits:
+                for name in self.limits:
+                    tokens, _ = buckets[name]
+                    buckets[name] = (tokens - 1, now)
+            result["wait"] = max(waits, default=0)
+
+        self._update(take)
+        return result["wait"]
+
+    def _update(self, mutate):
+        """Apply ``mutate(buckets, now)`` atomically, in memory or inside a SQLite write transaction."""
+        if not self.path:
+            with self._lock:
+                mutate(self._buckets, time.time())
+            return
+
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            buckets = self._full_buckets(now)
+            for name, tokens, updated in conn.execute("SELECT name, tokens, updated FROM buckets"):
+                if name in buckets:
+                    buckets[name] = (tokens, updated)
+            mutate(buckets, now)
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                [(name, tokens, updated) for name, (tokens, updated) in buckets.items()],
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _record(self, waited):
+        with self._lock:
+            self.requests += 1
+            if waited > 0.001:
+                self.delayed += 1
+            self.total_wait += waited
+            self.max_observed_wait = max(self.max_observed_wait, waited)
+
+    def stats(self):
+        """Return queue depth and wait-time metrics."""
+        with self._lock:
+            return {
+                "queue_depth": self.waiting,
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "throttled": self.throttled,
+                "avg_wait_s": round(self.total_wait / self.requests, 3) if self.requests else 0.0,
+                "max_wait_s": round(self.max_observed_wait, 3),
+            }
@@ -0,0 +1,126 @@
+"""
+ReportLab rendering for comparison reports.
+
+Kept free of Streamlit and network imports so it can be loaded cheaply in
+report worker processes. Everything here takes plain, picklable data.
+"""
+
+from io import BytesIO
+
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+SNAPSHOT_FIELDS = ["Symbol", "Name", "Current Price", "Market Cap", "52-Week High", "52-Week Low"]
+PALETTE = [
+    colors.HexColor("#2563eb"), colors.HexColor("#16a34a"), colors.HexColor("#dc2626"),
+    colors.HexColor("#9333ea"), colors.HexColor("#ea580c"), colors.HexColor("#0891b2"),
+    colors.HexColor("#ca8a04"), colors.HexColor("#db2777"), colors.HexColor("#4b5563"),
+]
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1c1e26")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f3f4f6")]),
+])
+CHART_WIDTH = 460
+CHART_HEIGHT = 220
+
+
+def render_report(data):
+    """Build a comparison report and return the PDF bytes.
+
+    ``data`` is {"stocks": [StockSnapshot], "history": None or {"symbols", "dates",
+    "growth", "metrics"}} as produced by ``reports.build_report_data``.
+    """
+    buffer = BytesIO()
+    pdf = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("Stock Comparison Report (Alpha Vantage)", styles['h1']))
+    story.append(Spacer(1, 12))
+
+    rows = [SNAPSHOT_FIELDS]
+    for stock in data["stocks"]:
+        row = stock.row()
+        rows.append([row[field] for field in SNAPSHOT_FIELDS])
+    story.append(Table(rows, repeatRows=1, style=TABLE_STYLE))
+
+    history = data.get("history")
+    if history:
+        metrics = history["metrics"]
+        story.append(PageBreak())
+        story.append(Paragraph(f"Growth of $1 ({history['start']} to {history['end']})", styles['h2']))
+        story.append(growth_chart(history["symbols"], history["dates"], history["growth"]))
+        story.append(Spacer(1, 12))
+
+        story.append(Paragraph("Total return", styles['h2']))
+        story.append(return_chart(history["symbols"], metrics["total_return"]))
+        story.append(Spacer(1, 12))
+
+        story.append(Paragraph("Risk and return", styles['h2']))
+        rows = [["Symbol", "Total Return", "Annualized Return", "Annualized Volatility", "Max Drawdown", f"Beta vs {metrics['benchmark']}"]]
+        for i, symbol in enumerate(history["symbols"]):
+            rows.append([
+                symbol,
+                f"{metrics['total_return'][i]:.1%}",
+                f"{metrics['annualized_return'][i]:.1%}",
+                f"{metrics['annualized_volatility'][i]:.1%}",
+                f"{metrics['max_drawdown'][i]:.1%}",
+                f"{metrics['beta'][i]:.2f}",
+            ])
+        story.append(Table(rows, repeatRows=1, style=TABLE_STYLE))
+
+    pdf.build(story)
+    return buffer.getvalue()
+
+
+def growth_chart(symbols, dates, growth):
+    """Line chart of normalized prices; ``growth`` is (days x symbols)."""
+    legend_rows = (len(symbols) + 5) // 6
+    drawing = Drawing(CHART_WIDTH, CHART_HEIGHT + 12 * legend_rows)
+    chart = LinePlot()
+    chart.x, chart.y = 40, 12 * legend_rows + 20
+    chart.width, chart.height = CHART_WIDTH - 50, CHART_HEIGHT - 30
+    x = dates.tolist()
+    chart.data = [list(zip(x, growth[:, i].tolist())) for i in range(len(symbols))]
+    for i in range(len(symbols)):
+        chart.lines[i].strokeColor = PALETTE[i % len(PALETTE)]
+        chart.lines[i].strokeWidth = 0.8
+    chart.xValueAxis.visibleLabels = False
+    chart.yValueAxis.labelTextFormat = "%.1f"
+    drawing.add(chart)
+
+    legend = Legend()
+    legend.x, legend.y = 40, 12 * legend_rows
+    legend.fontSize = 7
+    legend.columnMaximum = legend_rows
+    legend.alignment = "right"
+    legend.colorNamePairs = [(PALETTE[i % len(PALETTE)], symbol) for i, symbol in enumerate(symbols)]
+    drawing.add(legend)
+    return drawing
+
+
+def return_chart(symbols, total_returns):
+    """Horizontal bar chart of total return per symbol, in percent."""
+    bar_height = 10
+    drawing = Drawing(CHART_WIDTH, bar_height * len(symbols) + 30)
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 60, 15
+    chart.width, chart.height = CHART_WIDTH - 80, bar_height * len(symbols)
+    chart.data = [[value * 100 for value in total_returns]]
+    chart.categoryAxis.categoryNames = list(symbols)
+    chart.categoryAxis.labels.fontSize = 7
+    # Keep labels left of the plot so negative bars do not cover them
+    chart.categoryAxis.labelAxisMode = "low"
+    chart.valueAxis.labelTextFormat = "%d%%"
+    chart.bars[0].fillColor = PALETTE[0]
+    drawing.add(chart)
+    return drawing
@@ -0,0 +1,144 @@
+"""
+Comparison reports for any number of symbols, rendered in a process pool.
+
+Report data (snapshot tables plus down-sampled price history and metrics) is
+assembled in the Streamlit process and rendered by ``report_render`` in
+worker processes, so large reports never block the server. Reports are keyed
+by a hash of their data: rendered PDFs are kept in a small LRU, and repeated
+requests for a report that is still rendering share the same job.
+
+Job API: ``submit_job`` returns an id, ``job_status`` polls it and
+``job_result`` returns the PDF bytes.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from modules import timeseries
+from modules.resources import shared
+
+MAX_CACHED_REPORTS = 32
+MAX_TRACKED_JOBS = 256
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+# Enough points for a smooth line without bloating large reports
+MAX_CHART_POINTS = 500
+
+_rendered = OrderedDict()
+_in_flight = {}
+_jobs = OrderedDict()
+_lock = threading.Lock()
+
+
+@shared("report_executor")
+def _get_executor():
+    # Created on first use; "spawn" keeps the workers clear of this process's threads and sockets
+    return ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def report_key(data):
+    """Content hash of the report inputs."""
+    # Keyed on the rows the report prints, so a refreshed quote with the same figures reuses the PDF
+    digest = hashlib.sha256(json.dumps([stock.row() for stock in data["stocks"]]).encode())
+    history = data.get("history")
+    if history:
+        digest.update(history["growth"].tobytes())
+        digest.update(history["dates"].tobytes())
+    return digest.hexdigest()
+
+
+def build_report_data(stocks, with_history=False):
+    """Assemble picklable report inputs; history comes from the stored daily series."""
+    history = None
+    symbols = [stock.symbol for stock in stocks]
+    metrics = timeseries.compare(symbols) if with_history else None
+    if metrics is not None:
+        dates, prices = timeseries.price_matrix(symbols)
+        step = max(1, len(dates) // MAX_CHART_POINTS)
+        history = {
+            "symbols": symbols,
+            "start": str(metrics["start"]),
+            "end": str(metrics["end"]),
+            "dates": dates[::step].copy(),
+            "growth": (prices / prices[0])[::step],
+            "metrics": {key: value for key, value in metrics.items() if key not in ("start", "end")},
+        }
+    return {"stocks": stocks, "history": history}
+
+
+def submit_render(data):
+    """Return a Future for the PDF bytes of ``data``, reusing cached and in-flight renders."""
+    key = report_key(data)
+    executor = _get_executor()
+    with _lock:
+        if key in _rendered:
+            _rendered.move_to_end(key)
+            future = Future()
+            future.set_result(_rendered[key])
+            return future
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        # Loaded on the first report rather than with the page. Workers unpickle a reference to
+        # report_render, so they import only it (reportlab, numpy), never timeseries or alpha_vantage
+        from modules import report_render
+
+        future = executor.submit(report_render.render_report, data)
+        _in_flight[key] = future
+    # Registered outside the lock: the callback runs immediately if the render already finished
+    future.add_done_callback(lambda done: _store(key, done))
+    return future
+
+
+def _store(key, future):
+    with _lock:
+        _in_flight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            _rendered[key] = future.result()
+            while len(_rendered) > MAX_CACHED_REPORTS:
+                _rendered.popitem(last=False)
+
+
+def submit_report(stocks, with_history=False):
+    """Return a Future for the PDF bytes of a comparison report on ``stocks``."""
+    return submit_render(build_report_data(stocks, with_history))
+
+
+def submit_job(stocks, with_history=False):
+    """Queue a report and return its job id; identical reports get the same id."""
+    data = build_report_data(stocks, with_history)
+    job_id = report_key(data)
+    future = submit_render(data)
+    with _lock:
+        _jobs[job_id] = future
+        _jobs.move_to_end(job_id)
+        while len(_jobs) > MAX_TRACKED_JOBS:
+            _jobs.popitem(last=False)
+    return job_id
+
+
+def job_status(job_id):
+    """One of "unknown", "queued", "running", "done", "failed" or "cancelled"."""
+    with _lock:
+        future = _jobs.get(job_id)
+    if future is None:
+        return "unknown"
+    # exception() raises CancelledError for a cancelled job (e.g. at pool shutdown)
+    if future.cancelled():
+        return "cancelled"
+    if future.done():
+        return "failed" if future.exception() is not None else "done"
+    return "running" if future.running() else "queued"
+
+
+def job_result(job_id, timeout=None):
+    """Return the PDF bytes for a job, waiting up to ``timeout`` seconds."""
+    with _lock:
+        future = _jobs.get(job_id)
+    if future is None:
+        raise KeyError(f"Unknown report job {job_id}")
+    return future.result(timeout=timeout)
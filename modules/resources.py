@@ -0,0 +1,88 @@
+"""
+Process-wide resources shared by every Streamlit session, created once.
+
+Factories are registered with ``@shared(name)``; the decorated function
+becomes an accessor that builds the resource on first call (under a lock,
+so concurrent sessions never build it twice) and returns the same object
+afterwards. The entry script calls ``warm_in_background`` after it renders
+(``.env`` is already loaded, see ``modules.env``): unless SMARTSTOCK_WARMUP=0,
+a background thread then imports the page modules and builds the resources
+marked ``warm``, so the first visit to a page does not pay for them and the
+first render does not compete with them for the CPU.
+"""
+
+import functools
+import importlib
+import logging
+import os
+import threading
+import time
+
+WARMUP = os.getenv("SMARTSTOCK_WARMUP", "1").lower() not in ("0", "false", "no")
+# Imported in the background after startup; heavy dependencies load here, not on the login page
+WARM_MODULES = ["modules.module1", "modules.module2", "modules.module3"]
+
+logger = logging.getLogger(__name__)
+
+_factories = {}
+_instances = {}
+_warm = []
+_locks = {}
+_lock = threading.Lock()
+_warming = False
+
+
+def shared(name, warm=False):
+    """Register the decorated zero-argument factory as resource ``name`` and return its accessor."""
+    def decorator(factory):
+        _factories[name] = factory
+        if warm:
+            _warm.append(name)
+
+        @functools.wraps(factory)
+        def accessor():
+            return get(name)
+        return accessor
+    return decorator
+
+
+def get(name):
+    """Return resource ``name``, building it on first use."""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    # One lock per resource, so a slow factory only blocks users of that resource
+    with _lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+    return _instances[name]
+
+
+def warmup(modules=WARM_MODULES):
+    """Import ``modules`` (which registers their resources), then build every resource marked warm."""
+    start = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            logger.exception("warmup: importing %s failed", module)
+    for name in list(_warm):
+        try:
+            get(name)
+        except Exception:
+            # Left unbuilt; the first real use builds it again and reports the error there
+            logger.warning("warmup: building %s failed", name, exc_info=True)
+    logger.info("warmup finished in %.2fs", time.perf_counter() - start)
+
+
+def warm_in_background():
+    """Once per process, unless SMARTSTOCK_WARMUP=0: run ``warmup`` on a daemon thread."""
+    global _warming
+    with _lock:
+        if _warming or not WARMUP:
+            return
+        _warming = True
+    threading.Thread(target=warmup, name="warmup", daemon=True).start()
@@ -0,0 +1,117 @@
+"""
+Numeric stock snapshots for the comparison tool.
+
+A ``StockSnapshot`` holds the figures shown for one symbol as numbers (NaN
+when Alpha Vantage has no value) plus when they are from, so pages can sort
+and compare symbols without parsing display strings. ``row`` formats one for
+display and is only called when a table is drawn.
+
+``pack`` and ``unpack`` serialize a snapshot to a small fixed binary record
+(about 60 bytes plus the name) for the quote cache, so a warm lookup reads one
+short row instead of re-parsing the two JSON payloads it was built from.
+"""
+
+import math
+import struct
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+# Fields of ``row``, in table order
+DISPLAY_FIELDS = ["Name", "Symbol", "Market Cap", "Current Price", "52-Week High", "52-Week Low"]
+
+FORMAT_VERSION = 1
+# version, price, market cap, 52-week high and low, fetched_at, trading day, symbol and name lengths
+_RECORD = struct.Struct("<BdddddiBH")
+_EPOCH = date(1970, 1, 1)
+UNKNOWN_DAY = -1
+
+
+@dataclass(frozen=True, slots=True)
+class StockSnapshot:
+    """Quote and overview figures for one symbol; ``trading_day`` is days since 1970-01-01."""
+
+    symbol: str
+    name: str
+    price: float
+    market_cap: float
+    year_high: float
+    year_low: float
+    trading_day: int
+    fetched_at: float
+
+    @classmethod
+    def from_payloads(cls, symbol, quote, overview, fetched_at=None):
+        """Build a snapshot from GLOBAL_QUOTE and OVERVIEW payloads; ValueError if the quote is empty."""
+        quote_data = quote.get("Global Quote", {})
+        if not quote_data or "01. symbol" not in quote_data:
+            raise ValueError("Invalid stock symbol or no data available")
+        return cls(
+            symbol=symbol,
+            name=overview.get("Name", "N/A"),
+            price=_number(quote_data.get("05. price")),
+            market_cap=_number(overview.get("MarketCapitalization")),
+            year_high=_number(overview.get("52WeekHigh")),
+            year_low=_number(overview.get("52WeekLow")),
+            trading_day=_day(quote_data.get("07. latest trading day")),
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+        )
+
+    @property
+    def as_of(self):
+        """The quote's trading day as a date, or None."""
+        return None if self.trading_day == UNKNOWN_DAY else _EPOCH + timedelta(days=self.trading_day)
+
+    def row(self):
+        """Display strings for a table or report row, keyed by ``DISPLAY_FIELDS``."""
+        return {
+            "Name": self.name,
+            "Symbol": self.symbol,
+            "Market Cap": "N/A" if math.isnan(self.market_cap) else f"${self.market_cap / 1e9:,.2f} Billion",
+            "Current Price": _money(self.price),
+            "52-Week High": _money(self.year_high),
+            "52-Week Low": _money(self.year_low),
+        }
+
+    def pack(self):
+        symbol = self.symbol.encode()
+        name = self.name.encode()
+        return _RECORD.pack(
+            FORMAT_VERSION, self.price, self.market_cap, self.year_high, self.year_low,
+            self.fetched_at, self.trading_day, len(symbol), len(name),
+        ) + symbol + name
+
+    @classmethod
+    def unpack(cls, record):
+        """Inverse of ``pack``; ValueError or ``struct.error`` for a record it can not read."""
+        version, price, market_cap, year_high, year_low, fetched_at, trading_day, symbol_length, name_length = (
+            _RECORD.unpack_from(record)
+        )
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot record version {version}")
+        offset = _RECORD.size
+        if len(record) != offset + symbol_length + name_length:
+            raise ValueError("Truncated snapshot record")
+        symbol = bytes(record[offset:offset + symbol_length]).decode()
+        offset += symbol_length
+        name = bytes(record[offset:offset + name_length]).decode()
+        return cls(symbol, name, price, market_cap, year_high, year_low, trading_day, fetched_at)
+
+
+def _number(value):
+    # Alpha Vantage sends "None", "-" or nothing for unknown figures
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _day(value):
+    try:
+        return (date.fromisoformat(value) - _EPOCH).days
+    except (TypeError, ValueError):
+        return UNKNOWN_DAY
+
+
+def _money(value):
+    return "N/A" if math.isnan(value) else f"${value:,.2f}"
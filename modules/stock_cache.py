@@ -0,0 +1,191 @@
+"""
+Quote cache for the stock comparison tool.
+
+Recently used Alpha Vantage payloads live in an in-process LRU, backed by a
+small SQLite store with one row per (symbol, function). A miss only upserts
+the entry that changed, and WAL mode lets several Streamlit sessions (or
+processes) read and write the store at the same time.
+
+Comparison rows are also kept as packed ``StockSnapshot`` records in a
+``snapshots`` table, so a warm lookup neither re-reads nor re-parses the
+payloads they came from. Storing a new quote or overview for a symbol drops
+its snapshot, and a snapshot is only as fresh as the quote it was built from.
+A record that can not be decoded (say, from an older format) is a miss.
+
+The snapshots are stored in addition to the payloads, not instead of them:
+the conditional refetch in ``alpha_vantage`` and the ``live_quotes`` updates
+work on the raw payloads. The file grows by one short row per compared symbol
+in exchange for lookups that skip the JSON.
+"""
+
+import json
+import logging
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from modules.instrumentation import span
+from modules.snapshot import StockSnapshot
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB = "stock_cache.sqlite3"
+MAX_MEMORY_ENTRIES = 512
+
+# Seconds a payload stays fresh, per Alpha Vantage function.
+FIELD_TTLS = {
+    "GLOBAL_QUOTE": 60,
+    "OVERVIEW": 24 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+# Payloads a snapshot is built from; it goes stale with the first of them
+SNAPSHOT_SOURCES = ("GLOBAL_QUOTE", "OVERVIEW")
+SNAPSHOT = "SNAPSHOT"
+
+
+class QuoteCache:
+    """LRU of Alpha Vantage payloads with per-function TTLs and a SQLite backing store."""
+
+    def __init__(self, path=CACHE_DB, max_entries=MAX_MEMORY_ENTRIES, ttls=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(FIELD_TTLS, **(ttls or {}))
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS payloads ("
+            " symbol TEXT NOT NULL,"
+            " function TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (symbol, function))"
+        )
+        self._connect().execute("CREATE TABLE IF NOT EXISTS snapshots (symbol TEXT PRIMARY KEY, record BLOB NOT NULL)")
+
+    def _connect(self):
+        """Return this thread's connection to the backing store."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl(self, function):
+        return self.ttls.get(function, DEFAULT_TTL)
+
+    def get(self, symbol, function, allow_stale=False):
+        """Return the cached payload, or None if it is missing or expired."""
+        with span("quote_cache.get", function=function) as current:
+            entry = self.lookup(symbol, function)
+            if entry is not None:
+                payload, fetched_at = entry
+                if allow_stale or time.time() - fetched_at < self.ttl(function):
+                    with self._lock:
+                        self.hits += 1
+                    current.set(result="hit")
+                    return payload
+            with self._lock:
+                self.misses += 1
+            current.set(result="miss")
+            return None
+
+    def lookup(self, symbol, function):
+        """Return ``(payload, fetched_at)`` regardless of age, or None."""
+        key = (symbol, function)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        row = self._connect().execute(
+            "SELECT payload, fetched_at FROM payloads WHERE symbol = ? AND function = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        entry = (json.loads(row[0]), row[1])
+        self._remember(key, entry)
+        return entry
+
+    def put(self, symbol, function, payload, fetched_at=None):
+        """Store a payload in memory and upsert its row on disk."""
+        entry = (payload, time.time() if fetched_at is None else fetched_at)
+        self._connect().execute(
+            "INSERT INTO payloads (symbol, function, payload, fetched_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (symbol, function) DO UPDATE SET"
+            " payload = excluded.payload, fetched_at = excluded.fetched_at",
+            (symbol, function, json.dumps(payload), entry[1]),
+        )
+        self._remember((symbol, function), entry)
+        if function in SNAPSHOT_SOURCES:
+            self._drop_snapshot(symbol)
+
+    def get_snapshot(self, symbol):
+        """Return the cached StockSnapshot, or None if it is missing or its quote has expired."""
+        with span("quote_cache.get", function=SNAPSHOT) as current:
+            key = (symbol, SNAPSHOT)
+            with self._lock:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+            if entry is None:
+                row = self._connect().execute("SELECT record FROM snapshots WHERE symbol = ?", (symbol,)).fetchone()
+                if row is not None:
+                    try:
+                        snapshot = StockSnapshot.unpack(row[0])
+                    except (ValueError, struct.error) as e:
+                        logger.warning("dropping unreadable snapshot for %s: %s", symbol, e)
+                        self._drop_snapshot(symbol)
+                    else:
+                        entry = (snapshot, snapshot.fetched_at)
+                        self._remember(key, entry)
+            if entry is not None and time.time() - entry[1] < self.ttl("GLOBAL_QUOTE"):
+                with self._lock:
+                    self.hits += 1
+                current.set(result="hit")
+                return entry[0]
+            with self._lock:
+                self.misses += 1
+            current.set(result="miss")
+            return None
+
+    def put_snapshot(self, snapshot):
+        """Store a snapshot in memory and upsert its packed record on disk."""
+        self._connect().execute(
+            "INSERT INTO snapshots (symbol, record) VALUES (?, ?)"
+            " ON CONFLICT (symbol) DO UPDATE SET record = excluded.record",
+            (snapshot.symbol, snapshot.pack()),
+        )
+        self._remember((snapshot.symbol, SNAPSHOT), (snapshot, snapshot.fetched_at))
+
+    def _drop_snapshot(self, symbol):
+        with self._lock:
+            self._memory.pop((symbol, SNAPSHOT), None)
+        self._connect().execute("DELETE FROM snapshots WHERE symbol = ?", (symbol,))
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss/eviction counters for display or logging."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._memory),
+            }
@@ -0,0 +1,230 @@
+"""
+Local symbol index used to validate and autocomplete tickers before any API call.
+
+The index is built once per process from ``alpha_api_symbols.txt`` and the
+last saved LISTING_STATUS download, and is kept up to date by applying the
+difference from a fresh LISTING_STATUS listing in the background.
+Prefix lookups are binary searches over sorted symbol and name lists.
+"""
+
+import csv
+import difflib
+import io
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from modules import alpha_vantage
+from modules.resources import shared
+
+logger = logging.getLogger(__name__)
+
+SYMBOLS_FILE = "alpha_api_symbols.txt"
+LISTING_FILE = "symbol_listing.csv"
+LISTING_TTL = 24 * 60 * 60
+SYMBOL_PATTERN = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+# Above this many changes, re-sorting is cheaper than inserting one at a time
+BULK_UPDATE_THRESHOLD = 1000
+
+
+class SymbolIndex:
+    """Sorted symbol and company-name lists with prefix, exact and fuzzy lookups.
+
+    Updates build new lists and swap them in, so readers never take a lock.
+    """
+
+    def __init__(self, names=None):
+        self.names = {}
+        self._symbols = []
+        self._by_name = []
+        # Only a full LISTING_STATUS universe is trusted to reject unknown symbols
+        self.complete = False
+        self._lock = threading.Lock()
+        if names:
+            self.update(names)
+
+    def __contains__(self, symbol):
+        return symbol in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def update(self, names, replace=False):
+        """Merge {symbol: name} into the index; with ``replace`` drop symbols that are not listed."""
+        with self._lock:
+            current = self.names
+            added = {symbol: name for symbol, name in names.items() if current.get(symbol) != name}
+            removed = [symbol for symbol in current if symbol not in names] if replace else []
+            if not added and not removed:
+                return 0
+
+            merged = dict(current)
+            for symbol in removed:
+                del merged[symbol]
+            merged.update(added)
+
+            if len(added) + len(removed) > BULK_UPDATE_THRESHOLD:
+                symbols = sorted(merged)
+                by_name = sorted((name.lower(), symbol) for symbol, name in merged.items())
+            else:
+                symbols = list(self._symbols)
+                by_name = list(self._by_name)
+                for symbol in removed + [symbol for symbol in added if symbol in current]:
+                    by_name.remove((current[symbol].lower(), symbol))
+                for symbol in removed:
+                    symbols.pop(bisect_left(symbols, symbol))
+                for symbol, name in added.items():
+                    if symbol not in current:
+                        insort(symbols, symbol)
+                    insort(by_name, (name.lower(), symbol))
+
+            self.names, self._symbols, self._by_name = merged, symbols, by_name
+            return len(added) + len(removed)
+
+    def search(self, query, limit=10):
+        """Autocomplete: symbols starting with ``query``, then companies whose name starts with it."""
+        query = query.strip()
+        if not query:
+            return []
+        symbols, by_name, names = self._symbols, self._by_name, self.names
+
+        results = []
+        prefix = query.upper()
+        i = bisect_left(symbols, prefix)
+        while i < len(symbols) and symbols[i].startswith(prefix) and len(results) < limit:
+            results.append(symbols[i])
+            i += 1
+
+        for symbol in self._name_prefix(query, limit, by_name):
+            if len(results) >= limit:
+                break
+            if symbol not in results:
+                results.append(symbol)
+        return [(symbol, names[symbol]) for symbol in results]
+
+    def resolve(self, query):
+        """Map a ticker or company name to a symbol, or None if it is unknown or ambiguous.
+
+        Known tickers win, then exact company names, then a company name prefix
+        or a close match ("APPL" -> AAPL), each only when a single symbol fits
+        ("Apple" matches two in the full listing). An incomplete index can not
+        rule out real tickers it does not list, so a well-formed ticker that
+        matches nothing in it is passed through; ``verified`` tells the caller.
+        """
+        symbol = query.strip().upper()
+        if not symbol or symbol in self.names:
+            return symbol or None
+        name, by_name = query.strip().lower(), self._by_name
+        i = bisect_left(by_name, (name,))
+        if i < len(by_name) and by_name[i][0] == name:
+            return by_name[i][1]
+        matches = self._name_prefix(name, 2, by_name) or self.suggest(query, 2)
+        if matches:
+            return matches[0] if len(matches) == 1 else None
+        return symbol if not self.complete and SYMBOL_PATTERN.match(symbol) else None
+
+    def verified(self, symbol):
+        """Whether ``symbol`` is listed, as opposed to passed through by ``resolve``."""
+        return symbol in self.names
+
+    def suggest(self, query, limit=5):
+        """Candidates for a query that did not resolve: companies whose name starts with it, then fuzzy matches ("APPL" -> AAPL)."""
+        query = query.strip()
+        symbols, by_name = self._symbols, self._by_name
+        suggestions = self._name_prefix(query, limit, by_name) if query else []
+        for symbol in difflib.get_close_matches(query.upper(), symbols, n=limit, cutoff=0.7):
+            if symbol not in suggestions:
+                suggestions.append(symbol)
+        names = difflib.get_close_matches(query.lower(), [name for name, _ in by_name], n=limit, cutoff=0.6)
+        for name in names:
+            symbol = by_name[bisect_left(by_name, (name,))][1]
+            if symbol not in suggestions:
+                suggestions.append(symbol)
+        return suggestions[:limit]
+
+    def _name_prefix(self, query, limit, by_name):
+        """Up to ``limit`` distinct symbols whose company name starts with ``query``, in name order."""
+        prefix = query.lower()
+        results = []
+        i = bisect_left(by_name, (prefix,))
+        while i < len(by_name) and by_name[i][0].startswith(prefix) and len(results) < limit:
+            if by_name[i][1] not in results:
+                results.append(by_name[i][1])
+            i += 1
+        return results
+
+
+_refresh_lock = threading.Lock()
+
+
+@shared("symbol_index", warm=True)
+def get_index():
+    """Return the process-wide index, loading it on first use."""
+    return _load_index()
+
+
+def is_valid_symbol(symbol):
+    """Cheap pre-flight check used before spending API calls on a symbol: it must resolve to itself."""
+    return bool(SYMBOL_PATTERN.match(symbol)) and get_index().resolve(symbol) == symbol
+
+
+def _load_index():
+    index = SymbolIndex(read_symbols_file(SYMBOLS_FILE))
+    if os.path.exists(LISTING_FILE):
+        with open(LISTING_FILE, newline="") as file:
+            index.update(parse_listing(file.read()))
+        index.complete = True
+
+    stale = not os.path.exists(LISTING_FILE) or time.time() - os.path.getmtime(LISTING_FILE) > LISTING_TTL
+    if stale and os.getenv("ALPHA_API_KEY"):
+        threading.Thread(target=refresh_listing, args=(index,), daemon=True).start()
+    return index
+
+
+def read_symbols_file(path):
+    """Parse "SYMBOL: Name" lines."""
+    names = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                symbol, _, name = line.partition(":")
+                if symbol.strip() and name.strip():
+                    names[symbol.strip().upper()] = name.strip()
+    return names
+
+
+def parse_listing(text):
+    """Parse LISTING_STATUS CSV into {symbol: name} for active listings."""
+    return {
+        row["symbol"]: row["name"]
+        for row in csv.DictReader(io.StringIO(text))
+        if row.get("symbol") and row.get("status", "Active") == "Active"
+    }
+
+
+def refresh_listing(index):
+    """Download LISTING_STATUS, apply the difference to ``index`` and save it for the next process."""
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        text = alpha_vantage.fetch_csv("LISTING_STATUS")
+        listing = parse_listing(text)
+        if not listing:
+            return
+        listing.update(read_symbols_file(SYMBOLS_FILE))
+        index.update(listing, replace=True)
+        index.complete = True
+
+        temp_path = f"{LISTING_FILE}.tmp"
+        with open(temp_path, "w", newline="") as file:
+            file.write(text)
+        os.replace(temp_path, LISTING_FILE)
+    except Exception:
+        # Keep serving the index we have; the next process start tries again
+        logger.warning("symbol listing refresh failed", exc_info=True)
+    finally:
+        _refresh_lock.release()
@@ -0,0 +1,205 @@
+"""
+Daily price history stored as per-symbol column files.
+
+Each symbol gets a directory with one raw binary file per column: ``date``
+(int32 days since 1970-01-01) and open/high/low/close/adjusted_close/volume
+(float64). Files are only ever appended to, so refreshing a symbol writes the
+missing days, and reads are memory-mapped with ``np.memmap``.
+
+Comparison metrics are computed on a (days x symbols) matrix with NumPy.
+"""
+
+import os
+import time
+from datetime import date
+from functools import reduce
+
+import numpy as np
+
+from modules import alpha_vantage
+
+# Replayed history goes to its own directory, like replayed quotes (see alpha_vantage)
+TIMESERIES_DIR = "timeseries_data.replay" if alpha_vantage.transport.replayed else "timeseries_data"
+TIMESERIES_FUNCTION = os.getenv("ALPHA_TIMESERIES_FUNCTION", "TIME_SERIES_DAILY")
+
+COLUMNS = {
+    "date": np.int32,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "adjusted_close": np.float64,
+    "volume": np.float64,
+}
+PRICE_FIELDS = {
+    "open": "1. open",
+    "high": "2. high",
+    "low": "3. low",
+    "close": "4. close",
+}
+
+TRADING_DAYS = 252
+# Don't ask for new bars more often than this
+REFRESH_INTERVAL = 6 * 60 * 60
+# "compact" returns the latest 100 bars, roughly 140 calendar days
+COMPACT_WINDOW_DAYS = 140
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _symbol_dir(symbol):
+    return os.path.join(TIMESERIES_DIR, symbol.upper())
+
+
+def _column_path(symbol, column):
+    return os.path.join(_symbol_dir(symbol), f"{column}.bin")
+
+
+def load(symbol):
+    """Return the stored history as a dict of read-only memory-mapped columns (empty if none)."""
+    lengths = []
+    for column, dtype in COLUMNS.items():
+        path = _column_path(symbol, column)
+        lengths.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+    # An interrupted append can leave some columns longer than others
+    rows = min(lengths)
+    if rows == 0:
+        return {column: np.empty(0, dtype) for column, dtype in COLUMNS.items()}
+    return {
+        column: np.memmap(_column_path(symbol, column), dtype=dtype, mode="r", shape=(rows,))
+        for column, dtype in COLUMNS.items()
+    }
+
+
+def last_date(symbol):
+    """Return the last stored day as int32 days since epoch, or None."""
+    dates = load(symbol)["date"]
+    return int(dates[-1]) if len(dates) else None
+
+
+def append(symbol, columns):
+    """Append rows newer than the stored history; returns the number of rows written."""
+    last = last_date(symbol)
+    new = columns["date"] > last if last is not None else slice(None)
+    rows = len(columns["date"][new])
+    if rows == 0:
+        return 0
+
+    os.makedirs(_symbol_dir(symbol), exist_ok=True)
+    existing = len(load(symbol)["date"])
+    for column, dtype in COLUMNS.items():
+        path = _column_path(symbol, column)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as file:
+            # Drop any partial tail from an interrupted append before writing
+            file.truncate(existing * np.dtype(dtype).itemsize)
+            file.seek(0, os.SEEK_END)
+            file.write(np.ascontiguousarray(columns[column][new], dtype=dtype).tobytes())
+    return rows
+
+
+def parse_payload(payload):
+    """Convert a TIME_SERIES_DAILY(_ADJUSTED) payload into ascending column arrays."""
+    series = next((value for key, value in payload.items() if key.startswith("Time Series")), None)
+    if not series:
+        raise ValueError(payload.get("Error Message", "No time series data available"))
+
+    days = sorted(series)
+    bars = [series[day] for day in days]
+    columns = {
+        "date": np.array([(date.fromisoformat(day) - _EPOCH).days for day in days], dtype=np.int32),
+    }
+    for column, field in PRICE_FIELDS.items():
+        columns[column] = np.array([float(bar[field]) for bar in bars])
+    # The adjusted endpoint adds "5. adjusted close" and moves volume to "6. volume"
+    columns["adjusted_close"] = np.array([float(bar.get("5. adjusted close", bar["4. close"])) for bar in bars])
+    columns["volume"] = np.array([float(bar.get("6. volume", bar.get("5. volume", 0))) for bar in bars])
+    return columns
+
+
+def needs_refresh(symbol):
+    path = _column_path(symbol, "date")
+    return not os.path.exists(path) or time.time() - os.path.getmtime(path) > REFRESH_INTERVAL
+
+
+def refresh_many(symbols):
+    """Bring each symbol's history up to date, fetching all symbols concurrently.
+
+    Symbols with recent history only request the compact (last 100 days) series.
+    Returns {symbol: error message} for symbols that could not be refreshed.
+    """
+    today = (date.today() - _EPOCH).days
+    pending = {}
+    for symbol in symbols:
+        if not needs_refresh(symbol):
+            continue
+        last = last_date(symbol)
+        outputsize = "compact" if last is not None and today - last < COMPACT_WINDOW_DAYS else "full"
+        pending[symbol] = alpha_vantage.submit(symbol, TIMESERIES_FUNCTION, use_cache=False, outputsize=outputsize)
+
+    errors = {}
+    for symbol, future in pending.items():
+        try:
+            if append(symbol, parse_payload(future.result())) == 0:
+                # Nothing new yet; touch the file so we wait a full interval before asking again
+                os.utime(_column_path(symbol, "date"))
+        except Exception as e:
+            errors[symbol] = str(e)
+    return errors
+
+
+def price_matrix(symbols, field="adjusted_close"):
+    """Return (dates, prices) aligned on the days every symbol traded; prices is (days x symbols)."""
+    histories = [load(symbol) for symbol in symbols]
+    dates = reduce(np.intersect1d, (history["date"] for history in histories))
+    prices = np.column_stack([
+        history[field][np.searchsorted(history["date"], dates)] for history in histories
+    ]) if len(dates) else np.empty((0, len(symbols)))
+    return dates, prices
+
+
+def to_datetime64(dates):
+    return np.asarray(dates).astype("datetime64[D]")
+
+
+def returns(prices):
+    """Simple daily returns, (days - 1 x symbols)."""
+    return prices[1:] / prices[:-1] - 1
+
+
+def max_drawdown(prices):
+    """Largest peak-to-trough fall per symbol, as a negative fraction."""
+    return (prices / np.maximum.accumulate(prices, axis=0) - 1).min(axis=0)
+
+
+def compare(symbols, benchmark=None, field="adjusted_close"):
+    """Compute return, volatility, drawdown, correlation and beta for any number of symbols.
+
+    Beta is measured against ``benchmark`` (default: the first symbol).
+    """
+    symbols = list(symbols)
+    benchmark = benchmark or symbols[0]
+    columns = symbols if benchmark in symbols else symbols + [benchmark]
+    dates, prices = price_matrix(columns, field)
+    # Volatility and correlation need at least two daily returns
+    if len(dates) < 3:
+        return None
+
+    daily = returns(prices)
+    years = len(daily) / TRADING_DAYS
+    centered = daily - daily.mean(axis=0)
+    market = centered[:, columns.index(benchmark)]
+    beta = centered.T @ market / (market @ market)
+
+    n = len(symbols)
+    return {
+        "symbols": symbols,
+        "start": to_datetime64(dates[0]),
+        "end": to_datetime64(dates[-1]),
+        "total_return": (prices[-1] / prices[0] - 1)[:n],
+        "annualized_return": ((prices[-1] / prices[0]) ** (1 / years) - 1)[:n],
+        "annualized_volatility": (daily.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS))[:n],
+        "max_drawdown": max_drawdown(prices)[:n],
+        "correlation": np.corrcoef(daily[:, :n], rowvar=False).reshape(n, n),
+        "beta": beta[:n],
+        "benchmark": benchmark,
+    }
@@ -0,0 +1,200 @@
+"""
+Pluggable transports for Alpha Vantage requests: live, record and replay.
+
+``alpha_vantage`` sends every request through ``transport.get(params)``,
+which returns the raw response body. ALPHA_TRANSPORT selects the mode:
+
+  live    (default) call the API over the shared session
+  record  call the API and save each response to the fixture store
+  replay  answer from the fixture store with no network at all
+
+The fixture store is a SQLite file (ALPHA_FIXTURES) with one zlib-compressed
+body per request, keyed by its query string without the API key and
+indexed by function and symbol. Replay can inject latency
+(ALPHA_REPLAY_LATENCY seconds) and failures (ALPHA_REPLAY_ERROR_RATE, split
+evenly between throttle notices, error payloads and timeouts), and with
+ALPHA_REPLAY_ANY_SYMBOL=1 serves a recorded response for the same function
+with the symbol swapped in when a symbol was never recorded, so load tests
+can use any number of symbols. Replay is not rate limited.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlencode
+
+import requests
+
+FIXTURES_DB = os.getenv("ALPHA_FIXTURES", "alpha_fixtures.sqlite3")
+COMPRESSION_LEVEL = 6
+ERROR_KINDS = ("throttle", "error", "timeout")
+
+
+def fixture_key(params):
+    """Canonical query string of a request, without the API key."""
+    return urlencode(sorted((name, value) for name, value in params.items() if name != "apikey"))
+
+
+class FixtureStore:
+    """Compressed response bodies in SQLite, one row per distinct request."""
+
+    def __init__(self, path=FIXTURES_DB):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " function TEXT NOT NULL,"
+            " symbol TEXT,"
+            " body BLOB NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS responses_function_symbol ON responses (function, symbol)")
+
+    def _connect(self):
+        """Return this thread's connection to the store."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, params, body):
+        self._connect().execute(
+            "INSERT INTO responses (key, function, symbol, body, recorded_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET body = excluded.body, recorded_at = excluded.recorded_at",
+            (fixture_key(params), params["function"], params.get("symbol"),
+             zlib.compress(body.encode(), COMPRESSION_LEVEL), time.time()),
+        )
+
+    def get(self, params):
+        """The recorded body for exactly this request, or None."""
+        row = self._connect().execute("SELECT body FROM responses WHERE key = ?", (fixture_key(params),)).fetchone()
+        return None if row is None else zlib.decompress(row[0]).decode()
+
+    def any_for(self, function):
+        """(symbol, body) of some recorded response for ``function``, or None."""
+        row = self._connect().execute(
+            "SELECT symbol, body FROM responses WHERE function = ? AND symbol IS NOT NULL LIMIT 1", (function,)
+        ).fetchone()
+        return None if row is None else (row[0], zlib.decompress(row[1]).decode())
+
+    def stats(self):
+        """Responses recorded per function, with their stored (compressed) size."""
+        rows = self._connect().execute(
+            "SELECT function, COUNT(*), SUM(LENGTH(body)) FROM responses GROUP BY function ORDER BY function"
+        ).fetchall()
+        return {function: {"responses": count, "bytes": size} for function, count, size in rows}
+
+
+class LiveTransport:
+    """Requests to the real API over a pooled session."""
+
+    rate_limited = True
+    replayed = False
+
+    def __init__(self, session, url, timeout):
+        self.session = session
+        self.url = url
+        self.timeout = timeout
+
+    def get(self, params):
+        return self.session.get(self.url, params=params, timeout=self.timeout).text
+
+
+class RecordTransport(LiveTransport):
+    """Live requests whose responses are also written to the fixture store."""
+
+    def __init__(self, session, url, timeout, store):
+        super().__init__(session, url, timeout)
+        self.store = store
+
+    def get(self, params):
+        body = super().get(params)
+        # Throttle notices say nothing about the symbol; keep the last real answer instead
+        if not _is_throttle_notice(body):
+            self.store.put(params, body)
+        return body
+
+
+class ReplayTransport:
+    """Recorded responses with optional injected latency and failures."""
+
+    rate_limited = False
+    # Recorded (possibly symbol-swapped) payloads are kept out of the real caches
+    replayed = True
+
+    def __init__(self, store, latency=0.0, error_rate=0.0, any_symbol=False, seed=None):
+        self.store = store
+        self.latency = latency
+        self.error_rate = error_rate
+        self.any_symbol = any_symbol
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.injected = dict.fromkeys(ERROR_KINDS, 0)
+        self.missing = 0
+
+    def get(self, params):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            kind = self._random.choice(ERROR_KINDS) if self._random.random() < self.error_rate else None
+            if kind:
+                self.injected[kind] += 1
+        if kind == "timeout":
+            raise requests.Timeout("Injected timeout (replay)")
+        if kind == "throttle":
+            return json.dumps({"Information": "Injected rate limit notice (replay)"})
+        if kind == "error":
+            return json.dumps({"Error Message": "Injected error (replay)"})
+
+        body = self.store.get(params)
+        if body is None and self.any_symbol and params.get("symbol"):
+            recorded = self.store.any_for(params["function"])
+            if recorded is not None:
+                symbol, body = recorded
+                body = body.replace(json.dumps(symbol), json.dumps(params["symbol"]))
+        if body is None:
+            with self._lock:
+                self.missing += 1
+            return json.dumps({"Error Message": f"No recorded response for {fixture_key(params)}"})
+        return body
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "missing": self.missing, "injected": dict(self.injected)}
+
+
+def _is_throttle_notice(body):
+    if not body.lstrip().startswith("{"):
+        return False
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and ("Note" in payload or "Information" in payload)
+
+
+def from_env(session, url, timeout):
+    """The transport selected by ALPHA_TRANSPORT and its settings."""
+    mode = os.getenv("ALPHA_TRANSPORT", "live").lower()
+    if mode == "live":
+        return LiveTransport(session, url, timeout)
+    if mode == "record":
+        return RecordTransport(session, url, timeout, FixtureStore())
+    if mode == "replay":
+        return ReplayTransport(
+            FixtureStore(),
+            latency=float(os.getenv("ALPHA_REPLAY_LATENCY", 0)),
+            error_rate=float(os.getenv("ALPHA_REPLAY_ERROR_RATE", 0)),
+            any_symbol=os.getenv("ALPHA_REPLAY_ANY_SYMBOL", "").lower() in ("1", "true", "yes"),
+        )
+    raise ValueError(f"Unknown ALPHA_TRANSPORT {mode!r}; use live, record or replay")
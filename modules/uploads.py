@@ -0,0 +1,100 @@
+"""
+Image preparation for chatbot uploads.
+
+Uploaded images (and, optionally, rasterized scanned PDF pages) are
+downscaled to a maximum side length and re-encoded once, keyed by a hash of
+the upload. The prepared bytes are kept in a byte-bounded LRU, so asking
+several questions about the same chart reuses the same small payload.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+from modules.instrumentation import span
+
+MAX_IMAGE_SIDE = int(os.getenv("CHAT_MAX_IMAGE_SIDE", 1536))
+JPEG_QUALITY = 85
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+PDF_PAGE_DPI = 110
+MAX_PDF_PAGE_IMAGES = 8
+
+PreparedImage = namedtuple("PreparedImage", ["mime_type", "data", "width", "height"])
+
+_prepared = OrderedDict()
+_cached_bytes = 0
+_lock = threading.Lock()
+
+
+def as_part(image):
+    """Inline-data part accepted by ``generate_content``."""
+    return {"mime_type": image.mime_type, "data": image.data}
+
+
+def _cached(key, build):
+    global _cached_bytes
+    with _lock:
+        value = _prepared.get(key)
+        if value is not None:
+            _prepared.move_to_end(key)
+            return value
+
+    value = build()
+    size = sum(len(image.data) for image in value) if isinstance(value, list) else len(value.data)
+    with _lock:
+        if key not in _prepared:
+            _prepared[key] = value
+            _cached_bytes += size
+            while _cached_bytes > CACHE_MAX_BYTES and len(_prepared) > 1:
+                _, evicted = _prepared.popitem(last=False)
+                _cached_bytes -= sum(len(i.data) for i in evicted) if isinstance(evicted, list) else len(evicted.data)
+    return value
+
+
+def encode_image(image, max_side=MAX_IMAGE_SIDE):
+    """Downscale a PIL image and re-encode it: JPEG, or PNG when it has transparency."""
+    from PIL import Image  # Pillow is loaded on the first upload, not with the chatbot page
+
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = BytesIO()
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image.save(buffer, format="PNG", optimize=True)
+        mime_type = "image/png"
+    else:
+        image.convert("RGB").save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        mime_type = "image/jpeg"
+    return PreparedImage(mime_type, buffer.getvalue(), image.width, image.height)
+
+
+def prepare_image(data, max_side=MAX_IMAGE_SIDE):
+    """Return the prepared version of an uploaded image, processing each distinct upload once."""
+    key = (hashlib.sha256(data).hexdigest(), "image", max_side)
+
+    def build():
+        from PIL import Image
+
+        return encode_image(Image.open(BytesIO(data)), max_side)
+
+    return _cached(key, build)
+
+
+def prepare_pdf_pages(data, pages, dpi=PDF_PAGE_DPI, max_side=MAX_IMAGE_SIDE):
+    """Rasterize the given 1-based page numbers of a PDF and prepare them like uploaded images."""
+    pages = tuple(pages[:MAX_PDF_PAGE_IMAGES])
+    key = (hashlib.sha256(data).hexdigest(), "pdf", pages, dpi, max_side)
+
+    def build():
+        import fitz  # PyMuPDF, loaded only when scanned pages are sent
+        from PIL import Image
+
+        images = []
+        with span("pdf.rasterize"), fitz.open(stream=data, filetype="pdf") as pdf:
+            for page_number in pages:
+                pixmap = pdf[page_number - 1].get_pixmap(dpi=dpi)
+                image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+                images.append(encode_image(image, max_side))
+        return images
+
+    return _cached(key, build)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import market, portfolio
+
+        market.payload_stored.connect(portfolio.on_payload_stored, dispatch_uid="api.portfolio")
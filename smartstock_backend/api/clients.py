@@ -0,0 +1,44 @@
+"""
+Pooled async HTTP clients for upstream APIs.
+
+An ``httpx.AsyncClient`` is bound to the event loop it was created on, so one
+client is kept per running loop (one loop per process under an ASGI server)
+and every async view on that loop shares its connection pool. Requests
+beyond the pool size wait on a semaphore rather than in httpx's pool queue,
+which gets slow when thousands of requests are waiting on it.
+"""
+
+import asyncio
+import weakref
+
+import httpx
+
+REQUEST_TIMEOUT = 15
+MAX_CONNECTIONS = 20
+
+# Event loop -> (client, semaphore)
+_clients = weakref.WeakKeyDictionary()
+
+
+def _for_loop():
+    loop = asyncio.get_running_loop()
+    state = _clients.get(loop)
+    if state is None:
+        client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        )
+        state = _clients[loop] = (client, asyncio.Semaphore(MAX_CONNECTIONS))
+    return state
+
+
+def async_client():
+    """Return the running event loop's shared client."""
+    return _for_loop()[0]
+
+
+async def get(url, **kwargs):
+    """GET on the shared client, at most MAX_CONNECTIONS at a time."""
+    client, slots = _for_loop()
+    async with slots:
+        return await client.get(url, **kwargs)
@@ -0,0 +1,85 @@
+"""
+Which symbols users are asking for.
+
+Each quote request adds one to its symbols' scores in an in-process buffer;
+the buffer is merged into ``SymbolDemand`` at most every FLUSH_INTERVAL
+seconds, so tracking costs one small transaction per interval rather than a
+write per request. Scores halve every HALF_LIFE seconds, so the hot set
+follows what users look at now rather than all-time totals.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from .models import SymbolDemand
+
+HALF_LIFE = 6 * 60 * 60
+FLUSH_INTERVAL = 10
+# Symbols below this score are not worth refreshing ahead of time
+MIN_HOT_SCORE = 1.0
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def decayed(score, scored_at, now):
+    return score * 0.5 ** ((now - scored_at).total_seconds() / HALF_LIFE)
+
+
+def record(symbols):
+    """Count a request for ``symbols``; returns True when the buffer is due to be flushed."""
+    with _pending_lock:
+        _pending.update(symbols)
+        return time.monotonic() - _last_flush >= FLUSH_INTERVAL
+
+
+def flush():
+    """Merge buffered counts into the database."""
+    global _last_flush
+    with _pending_lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not counts:
+        return
+
+    now = datetime.now(timezone.utc)
+    with transaction.atomic():
+        rows = SymbolDemand.objects.in_bulk(list(counts))
+        for symbol, count in counts.items():
+            row = rows.get(symbol)
+            if row is None:
+                rows[symbol] = SymbolDemand(symbol=symbol, score=count, scored_at=now)
+            else:
+                row.score = decayed(row.score, row.scored_at, now) + count
+                row.scored_at = now
+        SymbolDemand.objects.bulk_create(
+            rows.values(), update_conflicts=True, unique_fields=["symbol"], update_fields=["score", "scored_at"]
+        )
+
+
+async def arecord(symbols):
+    """``record`` for async views; only the periodic flush leaves the event loop."""
+    if record(symbols):
+        await sync_to_async(flush)()
+
+
+def hot_symbols(limit, now=None):
+    """The ``limit`` highest-demand symbols as ``[(symbol, decayed score, last_refreshed)]``."""
+    now = now or datetime.now(timezone.utc)
+    # Anything untouched for ten half-lives has decayed to under 0.1% of its peak
+    recent = SymbolDemand.objects.filter(scored_at__gte=now - timedelta(seconds=10 * HALF_LIFE))
+    ranked = [(row.symbol, decayed(row.score, row.scored_at, now), row.last_refreshed) for row in recent]
+    ranked = [entry for entry in ranked if entry[1] >= MIN_HOT_SCORE]
+    ranked.sort(key=lambda entry: entry[1], reverse=True)
+    return ranked[:limit]
+
+
+def mark_refreshed(symbol, when=None):
+    SymbolDemand.objects.filter(symbol=symbol).update(last_refreshed=when or datetime.now(timezone.utc))
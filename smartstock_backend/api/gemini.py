@@ -0,0 +1,48 @@
+"""
+Streaming proxy to the Gemini REST API.
+
+Requests go out on the event loop's pooled client and Gemini's server-sent
+events are relayed as plain text chunks as they arrive, so a slow answer
+holds a coroutine rather than a worker thread.
+"""
+
+import json
+import time
+
+from django.conf import settings
+
+from . import clients
+from .instrumentation import observe
+
+
+class GeminiError(Exception):
+    """Gemini rejected the request or could not be reached."""
+
+
+def _texts(event):
+    for candidate in event.get("candidates", []):
+        for part in candidate.get("content", {}).get("parts", []):
+            if part.get("text"):
+                yield part["text"]
+
+
+async def stream_generate(contents):
+    """Yield response text for Gemini ``contents`` (a list of {"role", "parts"} turns)."""
+    url = f"{settings.GEMINI_API_URL}/models/{settings.GEMINI_MODEL}:streamGenerateContent"
+    params = {"alt": "sse", "key": settings.GEMINI_API_KEY}
+    start = time.perf_counter()
+    first_chunk = None
+    async with clients.async_client().stream("POST", url, params=params, json={"contents": contents}) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise GeminiError(f"Gemini returned {response.status_code}: {body[:200].decode(errors='replace')}")
+        try:
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    for text in _texts(json.loads(line[5:])):
+                        if first_chunk is None:
+                            first_chunk = time.perf_counter() - start
+                            observe("gemini.first_chunk", first_chunk)
+                        yield text
+        finally:
+            observe("gemini.stream", time.perf_counter() - start, completed=first_chunk is not None)
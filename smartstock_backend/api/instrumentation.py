@@ -0,0 +1,125 @@
+"""
+Request and upstream timings for the backend, exported for Prometheus.
+
+``MetricsMiddleware`` times every request by route pattern, method and
+status; ``span`` and ``observe`` time upstream calls and cache lookups
+inside views. Everything lands in one histogram family served at /metrics
+in the Prometheus text format. The registry is per process, so scrape each
+worker (or run one worker per scrape target) when serving with several.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+HISTOGRAM = "smartstock_backend_span_duration_seconds"
+ERRORS = "smartstock_backend_span_errors_total"
+
+_series = {}
+_lock = threading.Lock()
+
+
+def observe(name, seconds, error=False, **labels):
+    """Add one duration to the ``name`` histogram for these labels (keep them low-cardinality)."""
+    key = (name, tuple(sorted((label, str(value).lower() if isinstance(value, bool) else str(value)) for label, value in labels.items())))
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            # [per-bucket counts (last one is +Inf), sum, count, errors]
+            series = _series[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0, 0]
+        series[0][bisect_left(BUCKETS, seconds)] += 1
+        series[1] += seconds
+        series[2] += 1
+        series[3] += error
+
+
+@contextmanager
+def span(name, **labels):
+    """Time the enclosed block; the yielded dict takes labels known only once it has run."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield labels
+    except Exception:
+        error = True
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, error, **labels)
+
+
+def _format_labels(labels):
+    return ",".join(
+        '{}="{}"'.format(label, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for label, value in labels
+    )
+
+
+def render():
+    """All series in Prometheus text exposition format."""
+    with _lock:
+        series = sorted((key, (list(counts), total, count, errors)) for key, (counts, total, count, errors) in _series.items())
+    lines = [f"# HELP {HISTOGRAM} Duration of requests, upstream calls and cache lookups.", f"# TYPE {HISTOGRAM} histogram"]
+    for (name, labels), (counts, total, count, _) in series:
+        base = _format_labels((("span", name),) + labels)
+        cumulative = 0
+        for bound, n in zip(BUCKETS, counts):
+            cumulative += n
+            lines.append(f'{HISTOGRAM}_bucket{{{base},le="{bound}"}} {cumulative}')
+        lines.append(f'{HISTOGRAM}_bucket{{{base},le="+Inf"}} {count}')
+        lines.append(f"{HISTOGRAM}_sum{{{base}}} {total}")
+        lines.append(f"{HISTOGRAM}_count{{{base}}} {count}")
+    lines += [f"# HELP {ERRORS} Spans that raised.", f"# TYPE {ERRORS} counter"]
+    for (name, labels), (_, _, _, errors) in series:
+        lines.append(f"{ERRORS}{{{_format_labels((('span', name),) + labels)}}} {errors}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Time each request up to its response headers, labeled by route pattern rather than path."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    @staticmethod
+    def record(request, response, start):
+        match = request.resolver_match
+        observe(
+            "http.request", time.perf_counter() - start, response.status_code >= 500,
+            route=match.route if match else "unmatched", method=request.method, status=response.status_code,
+        )
+
+
+def metrics(request):
+    """GET /metrics/; requires ``Authorization: Bearer <METRICS_TOKEN>`` when that setting is set."""
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,114 @@
+"""
+Build the screener's fundamentals table (see ``api/screener.py``).
+
+Run periodically (``python manage.py build_screener``). Each run starts from
+the saved table, takes in any OVERVIEW payloads already in the shared cache,
+then fetches the symbols that are missing or whose row is older than the
+OVERVIEW TTL, missing and oldest first, within its own slice of the Alpha
+Vantage quota. The table is saved every ``--save-every`` fetches, so a run
+that is stopped or runs out of budget still leaves its progress for the
+next one. Symbols that drop out of the listing are dropped from the table.
+
+Each symbol costs one call, so the free quota (25 a day, shared with
+everything else) cannot keep up with the ~10,000-stock listing: at the
+default SCREENER_CALLS_PER_DAY of 10 the first pass alone takes years. Give
+the screener a premium quota (``--per-day`` / SCREENER_CALLS_PER_DAY) or a
+universe small enough for the budget with ``--symbols``. Each run reports
+the coverage and warns when the table holds less than
+``screener.LOW_COVERAGE`` of the universe.
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from api import market, screener
+from api.management.commands.refresh_prices import Budget
+
+
+class Command(BaseCommand):
+    help = "Collect OVERVIEW fundamentals for the symbol universe into the screener table, within an API call budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbols", help="comma-separated universe instead of the LISTING_STATUS listing")
+        parser.add_argument("--per-minute", type=int, default=settings.SCREENER_CALLS_PER_MINUTE)
+        parser.add_argument("--per-day", type=int, default=settings.SCREENER_CALLS_PER_DAY)
+        parser.add_argument("--max-calls", type=int, help="overviews to fetch this run (default: --per-day)")
+        parser.add_argument("--no-fetch", action="store_true", help="only use the saved table and cached overviews")
+        parser.add_argument("--save-every", type=int, default=25, help="fetches between saves")
+        parser.add_argument("--path", default=str(settings.SCREENER_PATH))
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if options["symbols"]:
+            universe = list(dict.fromkeys(s.strip().upper() for s in options["symbols"].split(",") if s.strip()))
+        else:
+            try:
+                universe = screener.fetch_listing()
+            except market.UpstreamError as e:
+                raise CommandError(f"Could not load the symbol listing: {e}")
+
+        saved = screener.Screener.load(path).rows() if os.path.exists(path) else {}
+        rows = {symbol: saved[symbol] for symbol in universe if symbol in saved}
+
+        # Overviews already fetched for other pages cost no calls
+        keys = {market.cache_key("OVERVIEW", symbol): symbol for symbol in universe}
+        for key, entry in cache.get_many(list(keys)).items():
+            symbol = keys[key]
+            if symbol not in rows or rows[symbol]["fetched_at"] < entry["fetched_at"]:
+                rows[symbol] = screener.overview_row(entry["payload"], entry["fetched_at"])
+
+        stale_before = time.time() - market.TTLS["OVERVIEW"]
+        due = [symbol for symbol in universe if symbol not in rows or rows[symbol]["fetched_at"] < stale_before]
+        due.sort(key=lambda symbol: rows[symbol]["fetched_at"] if symbol in rows else 0)
+        if options["no_fetch"]:
+            due = []
+        due = due[:options["max_calls"] if options["max_calls"] is not None else options["per_day"]]
+
+        # A batch run goes as fast as the per-minute limit allows; --per-day only caps the total
+        budget = Budget(options["per_minute"], options["per_day"], spread=False)
+        fetched = 0
+        for symbol in due:
+            delay = budget.wait()
+            if delay > 0:
+                time.sleep(delay)
+            budget.spend()
+            try:
+                payload = market.fetch_upstream("OVERVIEW", symbol)
+            except market.UpstreamError as e:
+                self.stderr.write(f"OVERVIEW {symbol}: {e}")
+                if "rate limit" in str(e):
+                    break
+                continue
+            # Empty for funds; the row is kept so the symbol is not fetched again until it goes stale
+            rows[symbol] = screener.overview_row(payload, market.store("OVERVIEW", symbol, payload)["fetched_at"])
+            fetched += 1
+            if fetched % options["save_every"] == 0:
+                self.save(rows, path, len(universe))
+
+        table = self.save(rows, path, len(universe))
+        self.stdout.write(
+            f"screener: {table.size} of {table.listed} symbols ({table.coverage:.1%}; "
+            f"{fetched} fetched, {len(due) - fetched} left this run) saved to {path}"
+        )
+        if table.coverage < screener.LOW_COVERAGE:
+            missing = table.listed - table.size
+            days = -(-missing // options["per_day"]) if options["per_day"] > 0 else None
+            self.stderr.write(
+                f"warning: the table covers only {table.coverage:.1%} of the universe; "
+                + (f"the other {missing} take {days} more day{'s' if days != 1 else ''} at {options['per_day']} calls a day. " if days else "")
+                + "Use a premium quota (--per-day) or a smaller universe (--symbols)."
+            )
+
+    def save(self, rows, path, listed):
+        """Price every row from cached quotes where there are any, then write the table."""
+        keys = {market.cache_key("GLOBAL_QUOTE", symbol): symbol for symbol in rows}
+        prices = {keys[key]: market.quote_price(entry) for key, entry in cache.get_many(list(keys)).items()}
+        for symbol, row in rows.items():
+            screener.set_price(row, prices.get(symbol))
+        table = screener.Screener.from_rows(rows, listed)
+        table.save(path)
+        return table
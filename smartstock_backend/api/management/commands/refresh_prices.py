@@ -0,0 +1,161 @@
+"""
+Keep the quotes users actually look at warm in the shared cache.
+
+Runs next to the web server (``python manage.py refresh_prices``). Every
+step it ranks the hot symbols from ``SymbolDemand`` by demand times
+staleness, refreshes the most deserving cached payload, and then sleeps
+until the call budget allows another request. The budget is a slice of the
+Alpha Vantage quota that is spread evenly over the day, so the refresher
+never starves interactive requests. Refreshed entries stay cached for
+``--keep`` seconds, and connected quote streams pick up the changes.
+
+It also does the portfolio work kept out of request handlers: daily history
+missing for any held symbol is fetched before quotes, and every refreshed
+quote is applied to the snapshots of the users holding it.
+"""
+
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from api import demand, market, portfolio
+
+# Refresh a payload once it has used this fraction of its TTL
+REFRESH_AHEAD = 0.8
+THROTTLE_BACKOFF = 60
+IDLE_SLEEP = 30
+
+
+class Budget:
+    """Per-minute and per-day call limits, with the daily calls spaced evenly unless ``spread`` is off."""
+
+    def __init__(self, per_minute, per_day, spread=True):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.spacing = 24 * 60 * 60 / per_day if spread else 0.0
+        self.recent = deque()
+        self.day = None
+        self.used_today = 0
+        self.last_call = float("-inf")
+
+    def wait(self, now=None):
+        """Seconds until the next call is allowed."""
+        now = time.time() if now is None else now
+        today = datetime.fromtimestamp(now, timezone.utc).date()
+        if today != self.day:
+            self.day, self.used_today = today, 0
+        if self.used_today >= self.per_day:
+            midnight = datetime(today.year, today.month, today.day, tzinfo=timezone.utc).timestamp() + 24 * 60 * 60
+            return midnight - now
+        while self.recent and now - self.recent[0] >= 60:
+            self.recent.popleft()
+        waits = [self.last_call + self.spacing - now]
+        if len(self.recent) >= self.per_minute:
+            waits.append(self.recent[0] + 60 - now)
+        return max(0.0, *waits)
+
+    def spend(self, now=None):
+        now = time.time() if now is None else now
+        self.recent.append(now)
+        self.used_today += 1
+        self.last_call = now
+
+
+def next_history(failed, now=None):
+    """A held symbol missing daily history, skipping those that failed within the history TTL."""
+    now = time.time() if now is None else now
+    retry_after = market.TTLS.get(settings.ALPHA_TIMESERIES_FUNCTION, market.DEFAULT_TTL)
+    return next((symbol for symbol in portfolio.missing_history() if now - failed.get(symbol, -retry_after) >= retry_after), None)
+
+
+def next_refresh(hot, now=None):
+    """The (function, symbol) most worth refreshing: demand times how far past its refresh point it is."""
+    now = time.time() if now is None else now
+    best, best_priority = None, 0.0
+    for function in ("GLOBAL_QUOTE", "OVERVIEW"):
+        ttl = market.TTLS[function]
+        keys = {market.cache_key(function, symbol): (symbol, score) for symbol, score, _ in hot}
+        cached = cache.get_many(list(keys))
+        for key, (symbol, score) in keys.items():
+            entry = cached.get(key)
+            age = now - entry["fetched_at"] if entry else ttl
+            if age < REFRESH_AHEAD * ttl:
+                continue
+            priority = score * age / ttl
+            if priority > best_priority:
+                best, best_priority = (function, symbol), priority
+    return best
+
+
+class Command(BaseCommand):
+    help = "Refresh the most requested symbols' quotes in the background, within an API call budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--per-minute", type=int, default=settings.REFRESH_CALLS_PER_MINUTE)
+        parser.add_argument("--per-day", type=int, default=settings.REFRESH_CALLS_PER_DAY)
+        parser.add_argument("--max-symbols", type=int, default=50, help="size of the hot set")
+        parser.add_argument("--keep", type=int, default=15 * 60, help="seconds a refreshed payload stays cached")
+        parser.add_argument("--once", action="store_true", help="refresh at most one payload and exit")
+
+    def handle(self, *args, **options):
+        budget = Budget(options["per_minute"], options["per_day"])
+        history_failures = {}
+        while True:
+            delay = budget.wait()
+            if delay > 0 and not options["once"]:
+                time.sleep(delay)
+                continue
+
+            symbol = next_history(history_failures)
+            if symbol is not None:
+                self.fetch_history(symbol, history_failures, budget, options)
+                if options["once"]:
+                    return
+                continue
+
+            hot = demand.hot_symbols(options["max_symbols"])
+            target = next_refresh(hot)
+            if target is None:
+                if options["once"]:
+                    return
+                time.sleep(IDLE_SLEEP)
+                continue
+
+            function, symbol = target
+            budget.spend()
+            try:
+                payload = market.fetch_upstream(function, symbol)
+            except market.UpstreamError as e:
+                self.upstream_failed(function, symbol, e, options)
+            else:
+                entry = market.store(function, symbol, payload, timeout=max(options["keep"], market.TTLS[function]))
+                demand.mark_refreshed(symbol)
+                price = market.quote_price(entry) if function == "GLOBAL_QUOTE" else None
+                updated = portfolio.apply_price(symbol, price) if price is not None else 0
+                self.stdout.write(f"refreshed {function} {symbol}" + (f" ({updated} portfolios)" if updated else ""))
+            if options["once"]:
+                return
+
+    def fetch_history(self, symbol, failures, budget, options):
+        function, outputsize = settings.ALPHA_TIMESERIES_FUNCTION, portfolio.HISTORY_OUTPUTSIZE
+        budget.spend()
+        try:
+            payload = market.fetch_upstream(function, symbol, outputsize=outputsize)
+        except market.UpstreamError as e:
+            # A throttled call is retried on the next step; anything else waits out the history TTL
+            if "rate limit" not in str(e):
+                failures[symbol] = time.time()
+            self.upstream_failed(function, symbol, e, options)
+        else:
+            failures.pop(symbol, None)
+            market.store(function, symbol, payload, outputsize=outputsize)
+            self.stdout.write(f"fetched {function} {symbol} for portfolio risk")
+
+    def upstream_failed(self, function, symbol, error, options):
+        self.stderr.write(f"{function} {symbol}: {error}")
+        if "rate limit" in str(error) and not options["once"]:
+            time.sleep(THROTTLE_BACKOFF)
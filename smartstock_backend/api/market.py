@@ -0,0 +1,239 @@
+"""
+Server-side Alpha Vantage access shared by every frontend.
+
+Payloads are cached with Django's cache framework (file-based by default so
+all worker processes share it, Redis when REDIS_URL is set), with a TTL per
+Alpha Vantage function. Concurrent misses for the same key inside a process
+wait for a single upstream call and share its result or error, and bulk lookups fetch their misses in
+parallel over one pooled session.
+
+The ``a``-prefixed functions are the asyncio equivalents used by the async
+views: misses fan out with ``asyncio.gather`` and concurrent requests for the
+same key await one shared task instead of holding a thread each.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from requests.adapters import HTTPAdapter
+
+from . import clients
+from .instrumentation import span
+
+# Seconds a payload stays fresh, per Alpha Vantage function
+TTLS = {
+    "GLOBAL_QUOTE": 60,
+    "OVERVIEW": 24 * 60 * 60,
+    "TIME_SERIES_DAILY": 6 * 60 * 60,
+    "TIME_SERIES_DAILY_ADJUSTED": 6 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+MAX_WORKERS = 16
+REQUEST_TIMEOUT = 15
+
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="market")
+# Cache key -> Future of the upstream call filling it, for the blocking path
+_pending = {}
+_pending_lock = threading.Lock()
+# Event loop -> {cache key: task fetching it}
+_in_flight = weakref.WeakKeyDictionary()
+
+
+# Sent with function, symbol, params and entry after a fresh payload is cached
+payload_stored = Signal()
+
+
+class UpstreamError(Exception):
+    """Alpha Vantage returned an error, a throttle notice or no data."""
+
+
+def cache_key(function, symbol, **params):
+    extra = ":".join(f"{name}={value}" for name, value in sorted(params.items()))
+    return f"av:{function}:{symbol}:{extra}"
+
+
+def _query(function, symbol, params):
+    return {"function": function, "symbol": symbol, "apikey": settings.ALPHA_API_KEY, **params}
+
+
+def fetch_upstream(function, symbol, **params):
+    """Call Alpha Vantage and validate the payload; raises UpstreamError."""
+    try:
+        with span("alpha_vantage.request", function=function):
+            payload = session.get(settings.ALPHA_VANTAGE_URL, params=_query(function, symbol, params), timeout=REQUEST_TIMEOUT).json()
+    except (requests.RequestException, ValueError) as e:
+        raise UpstreamError(f"Alpha Vantage request failed: {e}")
+    return validate(function, payload)
+
+
+async def afetch_upstream(function, symbol, **params):
+    """Async ``fetch_upstream`` over the event loop's pooled client."""
+    try:
+        with span("alpha_vantage.request", function=function):
+            response = await clients.get(settings.ALPHA_VANTAGE_URL, params=_query(function, symbol, params))
+            payload = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise UpstreamError(f"Alpha Vantage request failed: {e}")
+    return validate(function, payload)
+
+
+def validate(function, payload):
+    """Return the payload, or raise UpstreamError for throttle notices, errors and empty quotes."""
+    if "Note" in payload or "Information" in payload:
+        raise UpstreamError("Alpha Vantage rate limit reached")
+    if "Error Message" in payload:
+        raise UpstreamError(payload["Error Message"])
+    if function == "GLOBAL_QUOTE" and "01. symbol" not in payload.get("Global Quote", {}):
+        raise UpstreamError("Invalid stock symbol or no data available")
+    # OVERVIEW is legitimately empty for ETFs and funds, so an empty payload is cached as-is
+    return payload
+
+
+def store(function, symbol, payload, timeout=None, **params):
+    """Cache a fresh payload; ``timeout`` defaults to the function's TTL."""
+    entry = {"payload": payload, "fetched_at": time.time()}
+    cache.set(cache_key(function, symbol, **params), entry, timeout or TTLS.get(function, DEFAULT_TTL))
+    payload_stored.send(sender=None, function=function, symbol=symbol, params=params, entry=entry)
+    return entry
+
+
+def get_payload(function, symbol, **params):
+    """Return {"payload", "fetched_at"} for one symbol, from cache or a single upstream call."""
+    key = cache_key(function, symbol, **params)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    with _pending_lock:
+        future = _pending.get(key)
+        leader = future is None
+        if leader:
+            future = _pending[key] = Future()
+    if not leader:
+        # The first caller's entry, or its error: a failed fetch is not retried by every waiter
+        return future.result()
+
+    try:
+        # Another process may have filled the cache since our lookup
+        entry = cache.get(key)
+        if entry is None:
+            entry = store(function, symbol, fetch_upstream(function, symbol, **params), **params)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(entry)
+    finally:
+        with _pending_lock:
+            del _pending[key]
+    return entry
+
+
+def quote_price(entry):
+    """The price in a cached GLOBAL_QUOTE entry, or None."""
+    try:
+        return float(entry["payload"]["Global Quote"]["05. price"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _lookup_result(found, wanted):
+    return "hit" if found == wanted else "miss" if not found else "partial"
+
+
+def get_many(function, symbols, **params):
+    """Return ({symbol: entry}, {symbol: error}) with one cache round trip and parallel misses."""
+    keys = {cache_key(function, symbol, **params): symbol for symbol in symbols}
+    with span("cache.get_many", function=function) as labels:
+        cached = cache.get_many(list(keys))
+        labels["result"] = _lookup_result(len(cached), len(keys))
+    entries = {keys[key]: entry for key, entry in cached.items()}
+
+    missing = [symbol for symbol in symbols if symbol not in entries]
+    futures = {symbol: _executor.submit(get_payload, function, symbol, **params) for symbol in missing}
+    errors = {}
+    for symbol, future in futures.items():
+        try:
+            entries[symbol] = future.result()
+        except UpstreamError as e:
+            errors[symbol] = str(e)
+    return entries, errors
+
+
+async def _afill(key, function, symbol, params):
+    entry = {"payload": await afetch_upstream(function, symbol, **params), "fetched_at": time.time()}
+    await cache.aset(key, entry, TTLS.get(function, DEFAULT_TTL))
+    await payload_stored.asend(sender=None, function=function, symbol=symbol, params=params, entry=entry)
+    return entry
+
+
+def _forget(in_flight, key, task):
+    if in_flight.get(key) is task:
+        del in_flight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved even if every waiter went away
+
+
+async def aget_payload(function, symbol, **params):
+    """Async ``get_payload``: every concurrent miss for a key awaits the same upstream call."""
+    key = cache_key(function, symbol, **params)
+    entry = await cache.aget(key)
+    if entry is not None:
+        return entry
+
+    in_flight = _in_flight.setdefault(asyncio.get_running_loop(), {})
+    task = in_flight.get(key)
+    if task is None:
+        task = in_flight[key] = asyncio.ensure_future(_afill(key, function, symbol, params))
+        task.add_done_callback(lambda done: _forget(in_flight, key, done))
+    # A client disconnecting must not cancel the fetch other requests are waiting on
+    return await asyncio.shield(task)
+
+
+async def aget_many(function, symbols, **params):
+    """Async ``get_many``: one cache round trip, then all misses fetched concurrently."""
+    keys = {cache_key(function, symbol, **params): symbol for symbol in symbols}
+    with span("cache.get_many", function=function) as labels:
+        cached = await cache.aget_many(list(keys))
+        labels["result"] = _lookup_result(len(cached), len(keys))
+    entries = {keys[key]: entry for key, entry in cached.items()}
+
+    missing = [symbol for symbol in symbols if symbol not in entries]
+    results = await asyncio.gather(*(aget_payload(function, symbol, **params) for symbol in missing), return_exceptions=True)
+    errors = {}
+    for symbol, result in zip(missing, results):
+        if isinstance(result, UpstreamError):
+            errors[symbol] = str(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            entries[symbol] = result
+    return entries, errors
+
+
+def parse_daily_series(payload):
+    """Convert a TIME_SERIES_DAILY(_ADJUSTED) payload into ascending JSON-friendly columns."""
+    series = next((value for key, value in payload.items() if key.startswith("Time Series")), None) or {}
+    days = sorted(series)
+    bars = [series[day] for day in days]
+    return {
+        "date": days,
+        "open": [float(bar["1. open"]) for bar in bars],
+        "high": [float(bar["2. high"]) for bar in bars],
+        "low": [float(bar["3. low"]) for bar in bars],
+        "close": [float(bar["4. close"]) for bar in bars],
+        "adjusted_close": [float(bar.get("5. adjusted close", bar["4. close"])) for bar in bars],
+        "volume": [float(bar.get("6. volume", bar.get("5. volume", 0))) for bar in bars],
+    }
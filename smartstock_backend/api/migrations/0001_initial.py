@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='SymbolDemand',
+            fields=[
+                ('symbol', models.CharField(max_length=16, primary_key=True, serialize=False)),
+                ('score', models.FloatField(default=0.0)),
+                ('scored_at', models.DateTimeField()),
+                ('last_refreshed', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scored_at'], name='api_demand_scored_at_idx')],
+            },
+        ),
+    ]
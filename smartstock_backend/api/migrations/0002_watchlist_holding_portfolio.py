@@ -0,0 +1,56 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchlistItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=16)),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watchlist', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['symbol'], name='api_watchlist_symbol_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'symbol'), name='api_watchlist_user_symbol')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Holding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=16)),
+                ('quantity', models.FloatField()),
+                ('average_cost', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['symbol'], name='api_holding_symbol_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'symbol'), name='api_holding_user_symbol')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='portfolio', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('data', models.JSONField(default=dict)),
+                ('value', models.FloatField(default=0.0)),
+                ('cost', models.FloatField(default=0.0)),
+                ('pnl', models.FloatField(default=0.0)),
+                ('weighted_return', models.FloatField(blank=True, null=True)),
+                ('volatility', models.FloatField(blank=True, null=True)),
+                ('risk_stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
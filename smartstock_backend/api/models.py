@@ -1,3 +1,70 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class SymbolDemand(models.Model):
+    """How often a symbol is asked for, as an exponentially decaying score (see api/demand.py)."""
+
+    symbol = models.CharField(max_length=16, primary_key=True)
+    score = models.FloatField(default=0.0)
+    # Time the score was last decayed to
+    scored_at = models.DateTimeField()
+    last_refreshed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["scored_at"], name="api_demand_scored_at_idx")]
+
+    def __str__(self):
+        return f"{self.symbol} ({self.score:.1f})"
+
+
+class WatchlistItem(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="watchlist")
+    symbol = models.CharField(max_length=16)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "symbol"], name="api_watchlist_user_symbol")]
+        indexes = [models.Index(fields=["symbol"], name="api_watchlist_symbol_idx")]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.symbol}"
+
+
+class Holding(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="holdings")
+    symbol = models.CharField(max_length=16)
+    quantity = models.FloatField()
+    # Average price paid per share
+    average_cost = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "symbol"], name="api_holding_user_symbol")]
+        # New prices are applied to every holding of a symbol
+        indexes = [models.Index(fields=["symbol"], name="api_holding_symbol_idx")]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.quantity} {self.symbol}"
+
+
+class PortfolioSnapshot(models.Model):
+    """Materialized dashboard for one user, kept current by api/portfolio.py.
+
+    ``data`` holds the per-holding arrays (inputs and results) and the
+    watchlist; the totals are columns so they can be queried directly.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="portfolio")
+    data = models.JSONField(default=dict)
+    value = models.FloatField(default=0.0)
+    cost = models.FloatField(default=0.0)
+    pnl = models.FloatField(default=0.0)
+    weighted_return = models.FloatField(null=True, blank=True)
+    volatility = models.FloatField(null=True, blank=True)
+    # Set when new daily history arrives for a held symbol; risk is recomputed on the next read
+    risk_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.value:.2f}"
@@ -0,0 +1,215 @@
+"""
+Portfolio analytics, materialized per user in ``PortfolioSnapshot``.
+
+A snapshot is rebuilt from the database only when holdings change; watchlist
+edits rewrite just that list. New prices are swapped into the stored arrays
+and the figures recomputed with a few NumPy operations, without reading
+holdings or history again: the refresher (``manage.py refresh_prices``)
+applies each quote it fetches to every holder, and a dashboard read picks up
+any newer quote already in the cache. New daily history only marks the risk
+figures (expected return and volatility) stale; they are recomputed on the
+next dashboard read.
+
+Nothing here calls Alpha Vantage. Request handlers use cached data only, and
+the refresher fetches the daily history that held symbols are missing.
+"""
+
+from functools import reduce
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import market
+from .models import Holding, PortfolioSnapshot, WatchlistItem
+
+TRADING_DAYS = 252
+# Daily returns used for expected return and covariance: all a compact series (100 bars) provides
+HISTORY_OUTPUTSIZE = "compact"
+RISK_LOOKBACK = 99
+
+
+def analytics(quantity, average_cost, price, expected_return=None, covariance=None):
+    """Portfolio figures for arrays aligned by holding.
+
+    ``expected_return`` (annualized, per holding) and ``covariance``
+    (annualized, holdings x holdings) are optional; without them the
+    weighted return and volatility are None.
+    """
+    holding_value = quantity * price
+    holding_cost = quantity * average_cost
+    value, cost = holding_value.sum(), holding_cost.sum()
+    allocation = holding_value / value if value else np.zeros_like(holding_value)
+    result = {
+        "value": float(value),
+        "cost": float(cost),
+        "pnl": float(value - cost),
+        "pnl_pct": float((value - cost) / cost) if cost else None,
+        "holding_value": holding_value,
+        "holding_pnl": holding_value - holding_cost,
+        "allocation": allocation,
+        "weighted_return": None,
+        "volatility": None,
+    }
+    if expected_return is not None:
+        result["weighted_return"] = float(allocation @ expected_return)
+    if covariance is not None:
+        result["volatility"] = float(np.sqrt(max(allocation @ covariance @ allocation, 0.0)))
+    return result
+
+
+def _cached(function, symbols, **params):
+    keys = {market.cache_key(function, symbol, **params): symbol for symbol in symbols}
+    return {keys[key]: entry for key, entry in cache.get_many(list(keys)).items()}
+
+
+def risk_inputs(symbols):
+    """Annualized mean returns and covariance over the dates all ``symbols`` share.
+
+    Uses cached daily history only. Returns (None, None) unless every symbol
+    has enough of it.
+    """
+    if not symbols:
+        return None, None
+    entries = _cached(settings.ALPHA_TIMESERIES_FUNCTION, symbols, outputsize=HISTORY_OUTPUTSIZE)
+    if len(entries) < len(symbols):
+        return None, None
+
+    series = [market.parse_daily_series(entries[symbol]["payload"]) for symbol in symbols]
+    common = reduce(np.intersect1d, [np.asarray(s["date"]) for s in series])[-(RISK_LOOKBACK + 1):]
+    if len(common) < 3:
+        return None, None
+    closes = np.column_stack([
+        np.asarray(s["adjusted_close"])[np.searchsorted(s["date"], common)] for s in series
+    ])
+    returns = closes[1:] / closes[:-1] - 1
+    covariance = np.atleast_2d(np.cov(returns, rowvar=False)) * TRADING_DAYS
+    return returns.mean(axis=0) * TRADING_DAYS, covariance
+
+
+def _materialize(snapshot):
+    """Recompute a snapshot's figures from the arrays stored in it."""
+    data = snapshot.data
+    quantity = np.asarray(data["quantity"], dtype=float)
+    average_cost = np.asarray(data["average_cost"], dtype=float)
+    # Until a quote arrives a holding is valued at cost
+    price = np.asarray([cost if p is None else p for p, cost in zip(data["price"], data["average_cost"])], dtype=float)
+    expected_return = None if data.get("expected_return") is None else np.asarray(data["expected_return"])
+    covariance = None if data.get("covariance") is None else np.asarray(data["covariance"])
+
+    result = analytics(quantity, average_cost, price, expected_return, covariance)
+    data["holding_value"] = result["holding_value"].tolist()
+    data["holding_pnl"] = result["holding_pnl"].tolist()
+    data["allocation"] = result["allocation"].tolist()
+    data["pnl_pct"] = result["pnl_pct"]
+    snapshot.value, snapshot.cost, snapshot.pnl = result["value"], result["cost"], result["pnl"]
+    snapshot.weighted_return, snapshot.volatility = result["weighted_return"], result["volatility"]
+    return snapshot
+
+
+def missing_history():
+    """Held symbols whose daily history is not cached, for the refresher to fetch."""
+    held = list(Holding.objects.order_by("symbol").values_list("symbol", flat=True).distinct())
+    cached = _cached(settings.ALPHA_TIMESERIES_FUNCTION, held, outputsize=HISTORY_OUTPUTSIZE)
+    return [symbol for symbol in held if symbol not in cached]
+
+
+def rebuild(user_id):
+    """Build and save a user's snapshot from their holdings, watchlist and cached market data.
+
+    Risk figures stay empty until the refresher has fetched every holding's
+    history; storing it marks the snapshot stale, so the next read fills them.
+    """
+    holdings = list(Holding.objects.filter(user_id=user_id).order_by("symbol").values_list("symbol", "quantity", "average_cost"))
+    watchlist = list(WatchlistItem.objects.filter(user_id=user_id).order_by("added_at").values_list("symbol", flat=True))
+    symbols = [symbol for symbol, _, _ in holdings]
+
+    quotes = _cached("GLOBAL_QUOTE", symbols)
+    expected_return, covariance = risk_inputs(symbols)
+
+    snapshot = PortfolioSnapshot(user_id=user_id, data={
+        "symbols": symbols,
+        "quantity": [quantity for _, quantity, _ in holdings],
+        "average_cost": [cost for _, _, cost in holdings],
+        "price": [market.quote_price(quotes[symbol]) if symbol in quotes else None for symbol in symbols],
+        "expected_return": None if expected_return is None else expected_return.tolist(),
+        "covariance": None if covariance is None else covariance.tolist(),
+        "watchlist": watchlist,
+    })
+    _materialize(snapshot).save()
+    return snapshot
+
+
+def _swap_prices(snapshot, prices):
+    """Write {symbol: price} into a snapshot's arrays; True if anything changed."""
+    stored = snapshot.data["price"]
+    changed = False
+    for i, symbol in enumerate(snapshot.data["symbols"]):
+        price = prices.get(symbol)
+        if price is not None and price != stored[i]:
+            stored[i] = price
+            changed = True
+    return changed
+
+
+def get_snapshot(user_id):
+    """The user's snapshot in one query, updated from cached quotes and recomputed only when something changed."""
+    snapshot = PortfolioSnapshot.objects.filter(user_id=user_id).first()
+    if snapshot is None:
+        return rebuild(user_id)
+    symbols = snapshot.data["symbols"]
+    quotes = _cached("GLOBAL_QUOTE", symbols)
+    changed = _swap_prices(snapshot, {symbol: market.quote_price(entry) for symbol, entry in quotes.items()})
+    if snapshot.risk_stale:
+        expected_return, covariance = risk_inputs(symbols)
+        snapshot.data["expected_return"] = None if expected_return is None else expected_return.tolist()
+        snapshot.data["covariance"] = None if covariance is None else covariance.tolist()
+        snapshot.risk_stale = False
+        changed = True
+    if changed:
+        _materialize(snapshot).save()
+    return snapshot
+
+
+def refresh_watchlist(user_id):
+    """Update only the watchlist part of a user's snapshot."""
+    snapshot = get_snapshot(user_id)
+    snapshot.data["watchlist"] = list(
+        WatchlistItem.objects.filter(user_id=user_id).order_by("added_at").values_list("symbol", flat=True)
+    )
+    snapshot.save(update_fields=["data", "updated_at"])
+    return snapshot
+
+
+def apply_price(symbol, price):
+    """Swap a new price into every snapshot holding ``symbol``; called by the refresher."""
+    with transaction.atomic():
+        snapshots = [
+            snapshot
+            for snapshot in PortfolioSnapshot.objects.select_for_update().filter(
+                user__in=Holding.objects.filter(symbol=symbol).values("user_id")
+            )
+            if _swap_prices(snapshot, {symbol: price})
+        ]
+        # bulk_update skips auto_now, so the timestamp is set here
+        now = timezone.now()
+        for snapshot in snapshots:
+            _materialize(snapshot).updated_at = now
+        PortfolioSnapshot.objects.bulk_update(
+            snapshots, ["data", "value", "cost", "pnl", "weighted_return", "volatility", "updated_at"]
+        )
+    return len(snapshots)
+
+
+def on_payload_stored(sender, function, symbol, params, entry, **kwargs):
+    """``market.payload_stored`` receiver marking holders' risk figures stale when new history arrives.
+
+    A single UPDATE, since it also runs inside request handlers; prices are
+    applied by the refresher and on read instead.
+    """
+    if function == settings.ALPHA_TIMESERIES_FUNCTION and params.get("outputsize", "compact") == HISTORY_OUTPUTSIZE:
+        PortfolioSnapshot.objects.filter(
+            user__in=Holding.objects.filter(symbol=symbol).values("user_id")
+        ).update(risk_stale=True)
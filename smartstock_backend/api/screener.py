@@ -0,0 +1,272 @@
+"""
+Stock screener over a locally built fundamentals table.
+
+``manage.py build_screener`` collects OVERVIEW fundamentals for the listed
+symbol universe and saves them to SCREENER_PATH as one NumPy array per
+column, together with ascending and descending sort orders for every
+numeric column. Queries never call Alpha Vantage: each filter is one
+vectorized comparison over a column, the masks are combined, and results
+are read off the precomputed order of the sort column.
+
+Prices come from cached quotes where there are any and are otherwise
+estimated as market cap over shares outstanding, so ``from_low`` and
+``below_high`` are as of the last build. Symbols missing a figure never
+match a filter on it.
+
+The table only covers what the builds have fetched so far, one OVERVIEW call
+per symbol. At the default SCREENER_CALLS_PER_DAY a full listing (around
+10,000 stocks) would take years, so a useful table needs a premium quota or a
+short ``--symbols`` universe; ``listed`` records the universe size so the
+coverage can be reported.
+
+The table is loaded once per process and reloaded when the file changes.
+"""
+
+import csv
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from . import market
+
+# Numeric columns and the OVERVIEW fields they come from
+FUNDAMENTALS = {
+    "market_cap": "MarketCapitalization",
+    "pe_ratio": "PERatio",
+    "forward_pe": "ForwardPE",
+    "peg_ratio": "PEGRatio",
+    "price_to_book": "PriceToBookRatio",
+    "eps": "EPS",
+    "dividend_yield": "DividendYield",
+    "profit_margin": "ProfitMargin",
+    "beta": "Beta",
+    "year_high": "52WeekHigh",
+    "year_low": "52WeekLow",
+    "shares": "SharesOutstanding",
+}
+TEXT = {"symbol": "Symbol", "name": "Name", "sector": "Sector", "exchange": "Exchange"}
+# Computed at build time: price, fraction above the 52-week low and below the 52-week high
+DERIVED = ["price", "from_low", "below_high"]
+NUMERIC = [*FUNDAMENTALS, *DERIVED, "fetched_at"]
+# Text columns that can be filtered on, matched exactly (case-insensitive)
+CATEGORIES = ["sector", "exchange"]
+
+DEFAULT_SORT = "market_cap"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+LISTING_TTL = 24 * 60 * 60
+# Below this share of the universe, the build and the page warn that screens miss most stocks
+LOW_COVERAGE = 0.9
+
+_loaded = None
+_loaded_mtime = None
+_load_lock = threading.Lock()
+
+
+class Screener:
+    """Columns of equal length keyed by name, plus sort orders keyed by (column, descending).
+
+    ``listed`` is the size of the universe the table was built for.
+    """
+
+    def __init__(self, columns, orders=None, built_at=None, listed=None):
+        self.columns = columns
+        self.size = len(columns["symbol"])
+        self.listed = max(listed or 0, self.size)
+        self.orders = orders if orders is not None else _sort_orders(columns)
+        self.built_at = built_at if built_at is not None else time.time()
+        self.categories = {name: sorted(set(columns[name].tolist()) - {""}) for name in CATEGORIES}
+
+    @classmethod
+    def from_rows(cls, rows, listed=None):
+        """Build from ``{symbol: row}``, where rows hold the TEXT and NUMERIC fields."""
+        symbols = sorted(rows)
+        columns = {"symbol": np.array(symbols, dtype=str)}
+        for name in TEXT:
+            if name != "symbol":
+                values = [str(rows[symbol].get(name) or "") for symbol in symbols]
+                columns[name] = np.array([value.upper() for value in values] if name in CATEGORIES else values, dtype=str)
+        for name in NUMERIC:
+            columns[name] = np.array([rows[symbol].get(name, np.nan) for symbol in symbols], dtype=float)
+        return cls(columns, listed=listed)
+
+    def rows(self):
+        """``{symbol: row}`` for every symbol (NaN for missing figures), the input ``from_rows`` expects."""
+        return {
+            str(symbol): {name: values[i].item() for name, values in self.columns.items()}
+            for i, symbol in enumerate(self.columns["symbol"])
+        }
+
+    @property
+    def coverage(self):
+        """Share of the listed universe in the table."""
+        return self.size / self.listed if self.listed else 1.0
+
+    def row(self, i):
+        """Row ``i`` for JSON, with None for missing figures."""
+        row = {name: str(self.columns[name][i]) for name in TEXT}
+        for name in NUMERIC:
+            value = float(self.columns[name][i])
+            row[name] = None if np.isnan(value) else value
+        return row
+
+    def query(self, ranges=None, equals=None, sort=DEFAULT_SORT, descending=True, limit=DEFAULT_LIMIT):
+        """Return (matching count, first ``limit`` matching rows in sort order).
+
+        ``ranges`` maps numeric columns to (low, high) bounds, either of which
+        may be None; ``equals`` maps CATEGORIES columns to a value.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for name, (low, high) in (ranges or {}).items():
+            values = self.columns[name]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        for name, value in (equals or {}).items():
+            mask &= self.columns[name] == value.upper()
+
+        order = self.orders[(sort, descending)]
+        matches = order[mask[order]]
+        return len(matches), [self.row(i) for i in matches[:limit]]
+
+    def save(self, path):
+        """Write the table atomically, so readers only ever see a complete file."""
+        arrays = {f"column:{name}": values for name, values in self.columns.items()}
+        for (name, descending), order in self.orders.items():
+            arrays[f"order:{name}:{'desc' if descending else 'asc'}"] = order
+        arrays["built_at"] = np.array(self.built_at)
+        arrays["listed"] = np.array(self.listed)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            columns, orders = {}, {}
+            for key in data.files:
+                kind, _, rest = key.partition(":")
+                if kind == "column":
+                    columns[rest] = data[key]
+                elif kind == "order":
+                    name, direction = rest.rsplit(":", 1)
+                    orders[(name, direction == "desc")] = data[key]
+            # Tables saved before ``listed`` was recorded count as complete
+            listed = int(data["listed"]) if "listed" in data.files else None
+            return cls(columns, orders, float(data["built_at"]), listed)
+
+
+def _sort_orders(columns):
+    """Ascending and descending row order per numeric column; rows without a value sort last either way."""
+    orders = {}
+    for name in NUMERIC:
+        values = columns[name]
+        # argsort puts NaN last, and negating keeps it there
+        orders[(name, False)] = np.argsort(values, kind="stable").astype(np.int32)
+        orders[(name, True)] = np.argsort(-values, kind="stable").astype(np.int32)
+    return orders
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def overview_row(payload, fetched_at):
+    """A table row from an OVERVIEW payload, priced at market cap over shares outstanding."""
+    row = {name: payload.get(field, "") for name, field in TEXT.items()}
+    row.update({name: _number(payload.get(field)) for name, field in FUNDAMENTALS.items()})
+    row["fetched_at"] = fetched_at
+    return set_price(row)
+
+
+def set_price(row, price=None):
+    """Fill in ``price`` and the columns derived from it."""
+    if price is None:
+        price = row["market_cap"] / row["shares"] if row["shares"] else np.nan
+    row["price"] = price
+    row["from_low"] = price / row["year_low"] - 1 if row["year_low"] else np.nan
+    row["below_high"] = 1 - price / row["year_high"] if row["year_high"] else np.nan
+    return row
+
+
+def fetch_listing():
+    """Active stock symbols from LISTING_STATUS, cached for a day."""
+    key = market.cache_key("LISTING_STATUS", "")
+    symbols = cache.get(key)
+    if symbols is not None:
+        return symbols
+    try:
+        response = market.session.get(
+            settings.ALPHA_VANTAGE_URL,
+            params={"function": "LISTING_STATUS", "apikey": settings.ALPHA_API_KEY},
+            timeout=market.REQUEST_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise market.UpstreamError(f"Alpha Vantage request failed: {e}")
+    # Errors and throttle notices still come back as JSON
+    if response.text.lstrip().startswith("{"):
+        market.validate("LISTING_STATUS", response.json())
+        raise market.UpstreamError("Unexpected response from Alpha Vantage")
+    symbols = [
+        row["symbol"] for row in csv.DictReader(io.StringIO(response.text))
+        if row.get("assetType") == "Stock" and row.get("status", "Active") == "Active"
+    ]
+    cache.set(key, symbols, LISTING_TTL)
+    return symbols
+
+
+def get_screener(path=None):
+    """The saved table, loaded once per process and again whenever the file changes; None before the first build."""
+    global _loaded, _loaded_mtime
+    path = path or settings.SCREENER_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if mtime != _loaded_mtime:
+        with _load_lock:
+            if mtime != _loaded_mtime:
+                _loaded, _loaded_mtime = Screener.load(path), mtime
+    return _loaded
+
+
+def parse_query(params):
+    """Keyword arguments for ``Screener.query`` from request parameters; raises ValueError.
+
+    ``<column>_min`` and ``<column>_max`` bound numeric columns, ``sector`` and
+    ``exchange`` match exactly, ``sort`` names a numeric column (prefix ``-``
+    for descending, the default for market cap) and ``limit`` caps the rows.
+    """
+    ranges = {}
+    for name in NUMERIC:
+        low, high = params.get(f"{name}_min"), params.get(f"{name}_max")
+        if low not in (None, "") or high not in (None, ""):
+            try:
+                ranges[name] = (None if low in (None, "") else float(low), None if high in (None, "") else float(high))
+            except ValueError:
+                raise ValueError(f"{name}_min and {name}_max must be numbers")
+    equals = {name: params[name] for name in CATEGORIES if params.get(name)}
+
+    sort = params.get("sort") or f"-{DEFAULT_SORT}"
+    descending = sort.startswith("-")
+    sort = sort.lstrip("-")
+    if sort not in NUMERIC:
+        raise ValueError(f"sort must be one of {', '.join(NUMERIC)}")
+    try:
+        limit = int(params.get("limit") or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    return {"ranges": ranges, "equals": equals, "sort": sort, "descending": descending, "limit": limit}
@@ -1,3 +1,288 @@
-from django.test import TestCase
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.management import call_command
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from authapp.tokens import issue_tokens
+
+from . import market, portfolio, screener
+from .models import Holding
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class TokenRequiredTests(TestCase):
+    """``token_required`` on DRF views and on plain async views."""
+
+    def setUp(self):
+        self.tokens = issue_tokens(User.objects.create_user("carol", password="s3cret-pass"))
+
+    def auth(self, token_type="access"):
+        return {"headers": {"Authorization": f"Bearer {self.tokens[token_type]}"}}
+
+    def test_sync_view(self):
+        self.assertEqual(self.client.post("/api/watchlist/", {}, content_type="application/json").status_code, 401)
+        response = self.client.post("/api/watchlist/", {}, content_type="application/json", **self.auth("refresh"))
+        self.assertEqual(response.status_code, 401)
+        # Authenticated, so the request gets as far as validating the symbol
+        response = self.client.post("/api/watchlist/", {"symbol": ""}, content_type="application/json", **self.auth())
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_view(self):
+        response = await self.async_client.post("/api/chat/", {"contents": []}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Invalid token"})
+        response = await self.async_client.post("/api/chat/", {"contents": []}, content_type="application/json", **self.auth())
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SingleFlightTests(SimpleTestCase):
+    """Concurrent ``market.get_payload`` misses for one key make one upstream call."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def fake_upstream(self, result):
+        def fetch(function, symbol, **params):
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(0.2)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return fetch
+
+    def fetch_concurrently(self, n=8):
+        def call():
+            try:
+                return market.get_payload("OVERVIEW", "IBM")
+            except market.UpstreamError as e:
+                return e
+        with ThreadPoolExecutor(n) as pool:
+            return list(pool.map(lambda _: call(), range(n)))
+
+    def test_waiters_share_the_result(self):
+        payload = {"Symbol": "IBM", "Name": "International Business Machines"}
+        with mock.patch.object(market, "fetch_upstream", self.fake_upstream(payload)):
+            results = self.fetch_concurrently()
+            self.assertEqual(self.calls, 1)
+            self.assertTrue(all(result["payload"] == payload for result in results))
+            # Later callers are served from the cache
+            market.get_payload("OVERVIEW", "IBM")
+            self.assertEqual(self.calls, 1)
+        self.assertEqual(market._pending, {})
+
+    def test_waiters_share_the_error(self):
+        with mock.patch.object(market, "fetch_upstream", self.fake_upstream(market.UpstreamError("Invalid stock symbol"))):
+            results = self.fetch_concurrently()
+            self.assertEqual(self.calls, 1)
+            self.assertTrue(all(isinstance(result, market.UpstreamError) for result in results))
+            # Errors are not cached: the next request tries again
+            with self.assertRaises(market.UpstreamError):
+                market.get_payload("OVERVIEW", "IBM")
+            self.assertEqual(self.calls, 2)
+        self.assertEqual(market._pending, {})
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class QuotesViewTests(TestCase):
+    """``/api/quotes/`` asks for OVERVIEW only once a symbol's quote validates."""
+
+    def setUp(self):
+        cache.clear()
+        self.requested = []
+
+    async def fake_upstream(self, function, symbol, **params):
+        self.requested.append((function, symbol))
+        if symbol == "IBM":
+            payload = {"Global Quote": {"01. symbol": "IBM", "05. price": "100"}} if function == "GLOBAL_QUOTE" else {"Symbol": "IBM"}
+        else:
+            payload = {"Global Quote": {}} if function == "GLOBAL_QUOTE" else {}
+        return market.validate(function, payload)
+
+    async def test_invalid_symbol_skips_overview(self):
+        with mock.patch.object(market, "afetch_upstream", self.fake_upstream):
+            response = await self.async_client.get("/api/quotes/", {"symbols": "IBM,NOPE"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(list(body["quotes"]), ["IBM"])
+        self.assertIn("NOPE", body["errors"])
+        self.assertNotIn(("OVERVIEW", "NOPE"), self.requested)
+        self.assertEqual(sorted(self.requested), [("GLOBAL_QUOTE", "IBM"), ("GLOBAL_QUOTE", "NOPE"), ("OVERVIEW", "IBM")])
+
+
+def daily_series(closes):
+    start = date(2024, 1, 1)
+    return {"Time Series (Daily)": {
+        (start + timedelta(days=i)).isoformat(): {"1. open": c, "2. high": c, "3. low": c, "4. close": c, "5. volume": 1}
+        for i, c in enumerate(closes)
+    }}
+
+
+def quote(symbol, price):
+    return {"Global Quote": {"01. symbol": symbol, "05. price": str(price)}}
+
+
+def no_upstream(function, symbol, **params):
+    raise AssertionError(f"unexpected upstream call: {function} {symbol}")
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PortfolioTests(TestCase):
+    """Snapshots are built from cached data only; the refresher fills in history and prices."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("dave", password="s3cret-pass")
+        Holding.objects.create(user=self.user, symbol="IBM", quantity=10, average_cost=90)
+        market.store("GLOBAL_QUOTE", "IBM", quote("IBM", 100))
+
+    @mock.patch.object(market, "fetch_upstream", no_upstream)
+    def test_rebuild_uses_cached_data_only(self):
+        snapshot = portfolio.rebuild(self.user.id)
+        self.assertEqual(snapshot.value, 1000)
+        self.assertIsNone(snapshot.volatility)
+
+        # New history marks the risk figures stale; the next read fills them from the cache
+        closes = 100 + np.sin(np.arange(150))
+        market.store(settings.ALPHA_TIMESERIES_FUNCTION, "IBM", daily_series(closes.round(4).tolist()), outputsize="compact")
+        snapshot = portfolio.get_snapshot(self.user.id)
+        self.assertFalse(snapshot.risk_stale)
+        returns = np.diff(closes.round(4)[-(portfolio.RISK_LOOKBACK + 1):]) / closes.round(4)[-(portfolio.RISK_LOOKBACK + 1):-1]
+        self.assertAlmostEqual(snapshot.volatility, returns.std(ddof=1) * np.sqrt(portfolio.TRADING_DAYS))
+
+    @mock.patch.object(market, "fetch_upstream", no_upstream)
+    def test_read_picks_up_cached_quotes(self):
+        portfolio.rebuild(self.user.id)
+        market.store("GLOBAL_QUOTE", "IBM", quote("IBM", 110))
+        self.assertEqual(portfolio.get_snapshot(self.user.id).value, 1100)
+
+    def test_apply_price_sets_updated_at(self):
+        before = portfolio.rebuild(self.user.id).updated_at
+        self.assertEqual(portfolio.apply_price("IBM", 120), 1)
+        self.assertEqual(portfolio.apply_price("IBM", 120), 0)
+        snapshot = portfolio.PortfolioSnapshot.objects.get(user=self.user)
+        self.assertEqual(snapshot.value, 1200)
+        self.assertGreater(snapshot.updated_at, before)
+
+    def test_refresher_fetches_history_then_applies_quotes(self):
+        portfolio.rebuild(self.user.id)
+        calls = []
+
+        def upstream(function, symbol, **params):
+            calls.append((function, symbol, params))
+            return daily_series([100, 101, 102, 101]) if function == settings.ALPHA_TIMESERIES_FUNCTION else quote(symbol, 130)
+
+        with mock.patch.object(market, "fetch_upstream", upstream), \
+                mock.patch("api.demand.hot_symbols", return_value=[("IBM", 1.0, None)]):
+            cache.delete(market.cache_key("GLOBAL_QUOTE", "IBM"))
+            call_command("refresh_prices", "--once", stdout=StringIO())
+            call_command("refresh_prices", "--once", stdout=StringIO())
+        self.assertEqual(calls, [
+            (settings.ALPHA_TIMESERIES_FUNCTION, "IBM", {"outputsize": "compact"}),
+            ("GLOBAL_QUOTE", "IBM", {}),
+        ])
+        snapshot = portfolio.PortfolioSnapshot.objects.get(user=self.user)
+        self.assertEqual(snapshot.value, 1300)
+        self.assertTrue(snapshot.risk_stale)
+
+
+def overview(symbol, market_cap, pe_ratio, sector="Technology"):
+    return {
+        "Symbol": symbol, "Name": f"{symbol} Inc", "Sector": sector, "Exchange": "NYSE",
+        "MarketCapitalization": market_cap, "PERatio": pe_ratio, "SharesOutstanding": "100",
+        "52WeekHigh": "20", "52WeekLow": "5",
+    }
+
+
+class ScreenerTests(SimpleTestCase):
+    """Queries over ``screener.Screener``: filter masks, sort orders and the saved file."""
+
+    def setUp(self):
+        payloads = [
+            overview("AAA", "3000", "10"),
+            overview("BBB", "1000", "None", sector="Energy"),
+            overview("CCC", "2000", "30"),
+            overview("DDD", "None", "20"),
+        ]
+        self.table = screener.Screener.from_rows(
+            {payload["Symbol"]: screener.overview_row(payload, 1.0) for payload in payloads}, listed=10
+        )
+
+    def symbols(self, **query):
+        return [row["symbol"] for row in self.table.query(**query)[1]]
+
+    def test_filters(self):
+        self.assertEqual(self.symbols(ranges={"pe_ratio": (None, 20)}), ["AAA", "DDD"])
+        self.assertEqual(self.symbols(ranges={"pe_ratio": (15, 30)}), ["CCC", "DDD"])
+        # A missing figure never matches a filter on it
+        self.assertEqual(self.symbols(ranges={"market_cap": (0, None)}), ["AAA", "CCC", "BBB"])
+        self.assertEqual(self.symbols(equals={"sector": "energy"}), ["BBB"])
+        self.assertEqual(self.symbols(ranges={"pe_ratio": (0, None)}, equals={"sector": "energy"}), [])
+
+    def test_missing_figures_sort_last_both_ways(self):
+        self.assertEqual(self.symbols(sort="market_cap", descending=True), ["AAA", "CCC", "BBB", "DDD"])
+        self.assertEqual(self.symbols(sort="market_cap", descending=False), ["BBB", "CCC", "AAA", "DDD"])
+        self.assertEqual(self.symbols(sort="pe_ratio", descending=False, limit=2), ["AAA", "DDD"])
+        # The count is of all matches, not just the rows returned
+        self.assertEqual(self.table.query(ranges={"pe_ratio": (0, None)}, limit=1)[0], 3)
+
+    def test_save_and_load(self):
+        with TemporaryDirectory() as directory:
+            path = f"{directory}/screener.npz"
+            self.table.save(path)
+            loaded = screener.Screener.load(path)
+        self.assertEqual(loaded.rows().keys(), self.table.rows().keys())
+        self.assertEqual(loaded.built_at, self.table.built_at)
+        self.assertEqual((loaded.listed, loaded.coverage), (10, 0.4))
+        self.assertEqual(loaded.categories, {"sector": ["ENERGY", "TECHNOLOGY"], "exchange": ["NYSE"]})
+        for sort in ("market_cap", "pe_ratio", "from_low"):
+            for descending in (True, False):
+                self.assertEqual(
+                    loaded.query(sort=sort, descending=descending), self.table.query(sort=sort, descending=descending)
+                )
+
+    def test_parse_query(self):
+        query = screener.parse_query({"pe_ratio_max": "20", "market_cap_min": "1e9", "sector": "Energy", "sort": "beta"})
+        self.assertEqual(query["ranges"], {"pe_ratio": (None, 20.0), "market_cap": (1e9, None)})
+        self.assertEqual(query["equals"], {"sector": "Energy"})
+        self.assertEqual((query["sort"], query["descending"], query["limit"]), ("beta", False, screener.DEFAULT_LIMIT))
+        self.assertEqual(screener.parse_query({})["sort"], screener.DEFAULT_SORT)
+        for params, message in [
+            ({"pe_ratio_max": "cheap"}, "pe_ratio_min and pe_ratio_max must be numbers"),
+            ({"sort": "-volume"}, "sort must be one of"),
+            ({"limit": "ten"}, "limit must be an integer"),
+            ({"limit": "0"}, "limit must be between"),
+            ({"limit": str(screener.MAX_LIMIT + 1)}, "limit must be between"),
+        ]:
+            with self.assertRaisesMessage(ValueError, message):
+                screener.parse_query(params)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class BuildScreenerTests(SimpleTestCase):
+    def test_reports_low_coverage(self):
+        cache.clear()
+        cache.set(market.cache_key("OVERVIEW", "AAA"), {"payload": overview("AAA", "3000", "10"), "fetched_at": time.time()})
+        stdout, stderr = StringIO(), StringIO()
+        with TemporaryDirectory() as directory:
+            call_command(
+                "build_screener", "--symbols", "AAA,BBB,CCC,DDD", "--no-fetch", "--per-day", "10",
+                "--path", f"{directory}/screener.npz", stdout=stdout, stderr=stderr,
+            )
+        self.assertIn("1 of 4 symbols (25.0%", stdout.getvalue())
+        self.assertIn("the other 3 take 1 more day at 10 calls a day", stderr.getvalue())
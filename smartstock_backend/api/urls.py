@@ -4,4 +4,13 @@ from . import views
 urlpatterns = [
     path('signup/', views.signup),
     path('login/', views.login),
+    path('quotes/', views.quotes),
+    path('quotes/stream/', views.quotes_stream),
+    path('history/<str:symbol>/', views.history),
+    path('screener/', views.screener),
+    path('chat/', views.chat),
+    path('dashboard/', views.dashboard),
+    path('watchlist/', views.watchlist),
+    path('watchlist/<str:symbol>/', views.watchlist_item),
+    path('holdings/<str:symbol>/', views.holding),
 ]
@@ -1,9 +1,32 @@
+import asyncio
+import json
+import time
+
+import httpx
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import authenticate
 
+from authapp.tokens import token_required
+
+from . import demand, gemini, market, portfolio, screener as screener_table
+from .models import Holding, WatchlistItem
+
+MAX_BULK_SYMBOLS = 100
+# Seconds between cache checks, keep-alive comments and demand updates on a quote stream
+STREAM_POLL_INTERVAL = 2
+STREAM_KEEPALIVE = 15
+STREAM_DEMAND_INTERVAL = 5 * 60
+
 @api_view(['POST'])
 def signup(request):
     username = request.data.get("username")
@@ -25,3 +48,219 @@ def login(request):
         return Response({"message": "Login successful"}, status=200)
     else:
         return Response({"error": "Invalid credentials"}, status=401)
+
+
+def _cache_headers(response, entries, ttl):
+    """Last-Modified from the oldest payload used, and a max-age no longer than its remaining TTL."""
+    if entries:
+        oldest = min(entry["fetched_at"] for entry in entries)
+        response["Last-Modified"] = http_date(oldest)
+        patch_cache_control(response, public=True, max_age=max(0, int(oldest + ttl - time.time())))
+    return response
+
+
+def _symbols(request):
+    return list(dict.fromkeys(s.strip().upper() for s in request.GET.get("symbols", "").split(",") if s.strip()))
+
+
+@require_GET
+async def quotes(request):
+    """GET /api/quotes/?symbols=AAPL,MSFT -> raw GLOBAL_QUOTE and OVERVIEW payloads per symbol."""
+    symbols = _symbols(request)
+    if not symbols:
+        return JsonResponse({"error": "symbols is required"}, status=400)
+    if len(symbols) > MAX_BULK_SYMBOLS:
+        return JsonResponse({"error": f"At most {MAX_BULK_SYMBOLS} symbols per request"}, status=400)
+
+    # OVERVIEW only for symbols whose quote validated, so a typo costs one upstream call, not two
+    quote_entries, errors = await market.aget_many("GLOBAL_QUOTE", symbols)
+    overview_entries, overview_errors = await market.aget_many("OVERVIEW", [s for s in symbols if s in quote_entries])
+    for symbol, error in overview_errors.items():
+        errors.setdefault(symbol, error)
+
+    data = {
+        symbol: {"GLOBAL_QUOTE": quote_entries[symbol]["payload"], "OVERVIEW": overview_entries[symbol]["payload"]}
+        for symbol in symbols if symbol in quote_entries and symbol in overview_entries
+    }
+    # Only real symbols feed the background refresher
+    await demand.arecord(list(data))
+    response = JsonResponse({"quotes": data, "errors": errors})
+    return _cache_headers(response, list(quote_entries.values()), market.TTLS["GLOBAL_QUOTE"])
+
+
+@require_GET
+async def quotes_stream(request):
+    """GET /api/quotes/stream/?symbols=AAPL,MSFT -> server-sent "quote" events whenever a cached quote changes.
+
+    The first events carry the quotes already cached; later ones follow the
+    background refresher (``manage.py refresh_prices``) as it updates the cache.
+    """
+    symbols = _symbols(request)
+    if not symbols:
+        return JsonResponse({"error": "symbols is required"}, status=400)
+    if len(symbols) > MAX_BULK_SYMBOLS:
+        return JsonResponse({"error": f"At most {MAX_BULK_SYMBOLS} symbols per request"}, status=400)
+    keys = {market.cache_key("GLOBAL_QUOTE", symbol): symbol for symbol in symbols}
+
+    async def events():
+        sent = {}
+        last_event = last_demand = time.monotonic()
+        while True:
+            now = time.monotonic()
+            # Watching a symbol keeps it hot
+            if now - last_demand >= STREAM_DEMAND_INTERVAL:
+                await demand.arecord(symbols)
+                last_demand = now
+            for key, entry in (await cache.aget_many(list(keys))).items():
+                symbol = keys[key]
+                if sent.get(symbol) != entry["fetched_at"]:
+                    sent[symbol] = entry["fetched_at"]
+                    last_event = now
+                    yield f"event: quote\ndata: {json.dumps({'symbol': symbol, **entry})}\n\n"
+            if now - last_event >= STREAM_KEEPALIVE:
+                last_event = now
+                yield ": keepalive\n\n"
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    await demand.arecord(symbols)
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+@require_GET
+async def history(request, symbol):
+    """GET /api/history/<symbol>/?outputsize=compact|full -> daily bars as columns."""
+    outputsize = request.GET.get("outputsize", "compact")
+    if outputsize not in ("compact", "full"):
+        return JsonResponse({"error": "outputsize must be compact or full"}, status=400)
+
+    function = settings.ALPHA_TIMESERIES_FUNCTION
+    try:
+        entry = await market.aget_payload(function, symbol.upper(), outputsize=outputsize)
+    except market.UpstreamError as e:
+        return JsonResponse({"error": str(e)}, status=502)
+
+    response = JsonResponse({"symbol": symbol.upper(), **market.parse_daily_series(entry["payload"])})
+    return _cache_headers(response, [entry], market.TTLS[function])
+
+
+@require_GET
+def screener(request):
+    """GET /api/screener/?market_cap_min=1e10&pe_ratio_max=20&from_low_max=0.1&sort=-market_cap -> matching rows.
+
+    See ``screener.parse_query`` for the parameters.
+    """
+    table = screener_table.get_screener()
+    if table is None:
+        return JsonResponse({"error": "The screener has not been built yet (manage.py build_screener)"}, status=503)
+    try:
+        query = screener_table.parse_query(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    count, rows = table.query(**query)
+    return JsonResponse({
+        "count": count, "universe": table.size, "listed": table.listed, "built_at": table.built_at,
+        "categories": table.categories, "results": rows,
+    })
+
+
+@csrf_exempt
+@require_POST
+@token_required
+async def chat(request):
+    """POST /api/chat/ {"contents": [...]} -> Gemini's answer streamed as plain text."""
+    try:
+        contents = json.loads(request.body)["contents"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "contents is required"}, status=400)
+    if not isinstance(contents, list) or not contents:
+        return JsonResponse({"error": "contents must be a non-empty list"}, status=400)
+
+    async def relay():
+        try:
+            async for text in gemini.stream_generate(contents):
+                yield text
+        except (gemini.GeminiError, httpx.HTTPError) as e:
+            # Headers are already sent, so the error can only go in the body
+            yield f"\n[error: {e}]"
+
+    return StreamingHttpResponse(relay(), content_type="text/plain; charset=utf-8")
+
+
+def _dashboard(snapshot):
+    data = snapshot.data
+    keys = {market.cache_key("GLOBAL_QUOTE", symbol): symbol for symbol in data["watchlist"]}
+    quotes = {keys[key]: entry["payload"] for key, entry in cache.get_many(list(keys)).items()}
+    holding_fields = ["quantity", "average_cost", "price", "holding_value", "holding_pnl", "allocation"]
+    return {
+        "value": snapshot.value,
+        "cost": snapshot.cost,
+        "pnl": snapshot.pnl,
+        "pnl_pct": data["pnl_pct"],
+        "weighted_return": snapshot.weighted_return,
+        "volatility": snapshot.volatility,
+        "updated_at": snapshot.updated_at.isoformat(),
+        "holdings": [
+            {"symbol": symbol, **{field.removeprefix("holding_"): data[field][i] for field in holding_fields}}
+            for i, symbol in enumerate(data["symbols"])
+        ],
+        "watchlist": [{"symbol": symbol, "quote": quotes.get(symbol)} for symbol in data["watchlist"]],
+    }
+
+
+@api_view(['GET'])
+@token_required
+def dashboard(request):
+    """Holdings, portfolio analytics and watchlist quotes from one materialized row."""
+    snapshot = portfolio.get_snapshot(request.token_claims["uid"])
+    return Response(_dashboard(snapshot), status=status.HTTP_200_OK)
+
+
+def _symbol(value):
+    symbol = str(value or "").strip().upper()
+    return symbol if 0 < len(symbol) <= 16 else None
+
+
+@api_view(['POST'])
+@token_required
+def watchlist(request):
+    symbol = _symbol(request.data.get("symbol"))
+    if symbol is None:
+        return Response({"error": "A valid symbol is required"}, status=status.HTTP_400_BAD_REQUEST)
+    user_id = request.token_claims["uid"]
+    WatchlistItem.objects.get_or_create(user_id=user_id, symbol=symbol)
+    return Response(_dashboard(portfolio.refresh_watchlist(user_id)), status=status.HTTP_201_CREATED)
+
+
+@api_view(['DELETE'])
+@token_required
+def watchlist_item(request, symbol):
+    user_id = request.token_claims["uid"]
+    WatchlistItem.objects.filter(user_id=user_id, symbol=symbol.upper()).delete()
+    return Response(_dashboard(portfolio.refresh_watchlist(user_id)), status=status.HTTP_200_OK)
+
+
+@api_view(['PUT', 'DELETE'])
+@token_required
+def holding(request, symbol):
+    """PUT {"quantity", "average_cost"} sets a holding; DELETE removes it."""
+    symbol = _symbol(symbol)
+    if symbol is None:
+        return Response({"error": "A valid symbol is required"}, status=status.HTTP_400_BAD_REQUEST)
+    user_id = request.token_claims["uid"]
+
+    if request.method == 'DELETE':
+        Holding.objects.filter(user_id=user_id, symbol=symbol).delete()
+    else:
+        try:
+            quantity = float(request.data.get("quantity"))
+            average_cost = float(request.data.get("average_cost"))
+        except (TypeError, ValueError):
+            return Response({"error": "quantity and average_cost must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if quantity <= 0 or average_cost < 0:
+            return Response({"error": "quantity must be positive and average_cost not negative"}, status=status.HTTP_400_BAD_REQUEST)
+        Holding.objects.update_or_create(
+            user_id=user_id, symbol=symbol, defaults={"quantity": quantity, "average_cost": average_cost}
+        )
+    return Response(_dashboard(portfolio.rebuild(user_id)), status=status.HTTP_200_OK)
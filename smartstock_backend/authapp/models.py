@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.db import models
+
+
+class TokenVersion(models.Model):
+    """Refresh tokens carry the version current when they were issued; bumping it revokes them all."""
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase, override_settings
+
+from .tokens import InvalidToken, TOKEN_SALT, issue_tokens, refresh_access_token, revoke_tokens, verify_token
+
+
+class TokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "s3cret-pass")
+
+    def test_issue_and_verify(self):
+        tokens = issue_tokens(self.user)
+        claims = verify_token(tokens["access"])
+        self.assertEqual((claims["uid"], claims["username"]), (self.user.pk, "alice"))
+        self.assertEqual(verify_token(tokens["refresh"], "refresh")["type"], "refresh")
+
+    def test_wrong_type_and_tampering_are_rejected(self):
+        tokens = issue_tokens(self.user)
+        with self.assertRaisesMessage(InvalidToken, "Wrong token type"):
+            verify_token(tokens["refresh"])
+        with self.assertRaisesMessage(InvalidToken, "Wrong token type"):
+            refresh_access_token(tokens["access"])
+        with self.assertRaisesMessage(InvalidToken, "Invalid token"):
+            verify_token(tokens["access"][:-2] + "xx")
+        forged = signing.dumps({"uid": self.user.pk, "username": "alice", "type": "access"}, salt="other", compress=True)
+        with self.assertRaisesMessage(InvalidToken, "Invalid token"):
+            verify_token(forged)
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=60, REFRESH_TOKEN_LIFETIME=3600)
+    def test_expiry(self):
+        tokens = issue_tokens(self.user)
+        with mock.patch("django.core.signing.time.time", return_value=signing.time.time() + 120):
+            with self.assertRaisesMessage(InvalidToken, "Token expired"):
+                verify_token(tokens["access"])
+            self.assertEqual(refresh_access_token(tokens["refresh"])["expires_in"], 60)
+        with mock.patch("django.core.signing.time.time", return_value=signing.time.time() + 7200):
+            with self.assertRaisesMessage(InvalidToken, "Token expired"):
+                refresh_access_token(tokens["refresh"])
+
+    def test_refresh_issues_access_token(self):
+        access = refresh_access_token(issue_tokens(self.user)["refresh"])["access"]
+        self.assertEqual(verify_token(access)["username"], "alice")
+
+    def test_revoke_invalidates_earlier_refresh_tokens(self):
+        old = issue_tokens(self.user)["refresh"]
+        revoke_tokens(self.user.pk)
+        with self.assertRaisesMessage(InvalidToken, "Token revoked"):
+            refresh_access_token(old)
+        refresh_access_token(issue_tokens(self.user)["refresh"])
+
+    def test_password_change_invalidates_refresh_tokens(self):
+        old = issue_tokens(self.user)["refresh"]
+        self.user.set_password("new-pass-456")
+        self.user.save()
+        with self.assertRaisesMessage(InvalidToken, "Token revoked"):
+            refresh_access_token(old)
+
+    def test_inactive_user_can_not_refresh(self):
+        refresh = issue_tokens(self.user)["refresh"]
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(InvalidToken):
+            refresh_access_token(refresh)
+
+    def test_legacy_refresh_token_without_version_is_rejected(self):
+        legacy = signing.dumps({"uid": self.user.pk, "username": "alice", "type": "refresh"}, salt=TOKEN_SALT, compress=True)
+        with self.assertRaises(InvalidToken):
+            refresh_access_token(legacy)
+
+
+class AuthViewTests(TestCase):
+    def setUp(self):
+        User.objects.create_user("bob", "bob@example.com", "s3cret-pass")
+
+    def login(self):
+        response = self.client.post("/api/login/", {"username": "bob", "password": "s3cret-pass"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_login_refresh_me_logout(self):
+        tokens = self.login()
+        me = self.client.get("/api/me/", headers={"Authorization": f"Bearer {tokens['access']}"})
+        self.assertEqual(me.json()["username"], "bob")
+
+        refreshed = self.client.post("/api/token/refresh/", {"refresh": tokens["refresh"]}, content_type="application/json")
+        self.assertEqual(refreshed.status_code, 200)
+        me = self.client.get("/api/me/", headers={"Authorization": f"Bearer {refreshed.json()['access']}"})
+        self.assertEqual(me.status_code, 200)
+
+        response = self.client.post("/api/logout/", {"refresh": tokens["refresh"]}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        refreshed = self.client.post("/api/token/refresh/", {"refresh": tokens["refresh"]}, content_type="application/json")
+        self.assertEqual(refreshed.status_code, 401)
+
+    def test_bad_credentials_and_missing_tokens(self):
+        response = self.client.post("/api/login/", {"username": "bob", "password": "wrong"}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get("/api/me/").status_code, 401)
+        self.assertEqual(self.client.get("/api/me/", headers={"Authorization": "Bearer nonsense"}).status_code, 401)
+        response = self.client.post("/api/logout/", {"refresh": "nonsense"}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,123 @@
+"""
+Signed, short-lived access and refresh tokens.
+
+Tokens are ``django.core.signing`` payloads carrying the user id, username
+and token type, timestamped and signed with SECRET_KEY. Checking an access
+token is a signature and age check only: no database query and no password
+hash.
+
+Refresh tokens also carry the user's TokenVersion and a fingerprint of the
+password hash, checked against the database on every refresh. Logging out
+bumps the version and changing the password changes the fingerprint, so
+either revokes every refresh token issued before; access tokens already out
+stay valid until they expire (ACCESS_TOKEN_LIFETIME).
+"""
+
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import F
+from django.utils.crypto import salted_hmac
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TokenVersion
+
+TOKEN_SALT = "smartstock.authapp.tokens"
+
+
+class InvalidToken(Exception):
+    """Raised for tokens that are malformed, tampered with, expired or of the wrong type."""
+
+
+def issue_tokens(user):
+    """Return a fresh access/refresh token pair for ``user``."""
+    claims = {"uid": user.pk, "username": user.get_username()}
+    refresh = {**claims, "type": "refresh", "ver": token_version(user.pk), "pwd": _password_fingerprint(user)}
+    return {
+        "access": signing.dumps({**claims, "type": "access"}, salt=TOKEN_SALT, compress=True),
+        "refresh": signing.dumps(refresh, salt=TOKEN_SALT, compress=True),
+        "expires_in": settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def token_version(user_id):
+    version = TokenVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first()
+    return version or 0
+
+
+def revoke_tokens(user_id):
+    """Invalidate every refresh token issued to the user so far."""
+    TokenVersion.objects.get_or_create(user_id=user_id)
+    TokenVersion.objects.filter(user_id=user_id).update(version=F("version") + 1)
+
+
+def _password_fingerprint(user):
+    return salted_hmac(TOKEN_SALT, user.password).hexdigest()[:16]
+
+
+def verify_token(token, token_type="access"):
+    """Return the token's claims, or raise InvalidToken."""
+    max_age = settings.ACCESS_TOKEN_LIFETIME if token_type == "access" else settings.REFRESH_TOKEN_LIFETIME
+    try:
+        claims = signing.loads(token, salt=TOKEN_SALT, max_age=max_age)
+    except signing.SignatureExpired:
+        raise InvalidToken("Token expired")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token")
+    if claims.get("type") != token_type:
+        raise InvalidToken("Wrong token type")
+    return claims
+
+
+def refresh_access_token(refresh_token):
+    """Exchange a valid, unrevoked refresh token for a new access token."""
+    claims = verify_token(refresh_token, "refresh")
+    user = get_user_model().objects.filter(pk=claims["uid"], is_active=True).first()
+    if (
+        user is None
+        or claims.get("ver") != token_version(user.pk)
+        or claims.get("pwd") != _password_fingerprint(user)
+    ):
+        raise InvalidToken("Token revoked")
+    claims = {"uid": claims["uid"], "username": claims["username"], "type": "access"}
+    return {
+        "access": signing.dumps(claims, salt=TOKEN_SALT, compress=True),
+        "expires_in": settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def bearer_token(request):
+    """Extract the token from an ``Authorization: Bearer <token>`` header."""
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+
+def token_required(view):
+    """Reject requests without a valid access token; the claims are set on ``request.token_claims``.
+
+    Works on DRF views and on plain async Django views, which get a JsonResponse.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            try:
+                request.token_claims = verify_token(bearer_token(request))
+            except InvalidToken as e:
+                return JsonResponse({"error": str(e)}, status=401)
+            return await view(request, *args, **kwargs)
+        return markcoroutinefunction(async_wrapper)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            request.token_claims = verify_token(bearer_token(request))
+        except InvalidToken as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        return view(request, *args, **kwargs)
+    return wrapper
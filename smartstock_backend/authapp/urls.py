@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import signup, login
+from .views import signup, login, refresh, logout, me
 
 urlpatterns = [
     path('signup/', signup),
     path('login/', login),
+    path('token/refresh/', refresh),
+    path('logout/', logout),
+    path('me/', me),
 ]
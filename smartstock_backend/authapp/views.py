@@ -3,6 +3,7 @@ from django.contrib.auth import authenticate
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from .tokens import InvalidToken, issue_tokens, refresh_access_token, revoke_tokens, token_required, verify_token
 
 @api_view(['POST'])
 def signup(request):
@@ -25,6 +26,34 @@ def login(request):
 
     user = authenticate(username=username, password=password)
     if user is not None:
-        return Response({"message": "Login successful"}, status=status.HTTP_200_OK)
+        return Response({"message": "Login successful", **issue_tokens(user)}, status=status.HTTP_200_OK)
     else:
         return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@api_view(['POST'])
+def refresh(request):
+    try:
+        tokens = refresh_access_token(request.data.get("refresh", ""))
+    except InvalidToken as e:
+        return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    return Response(tokens, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def logout(request):
+    """Revoke the user's refresh tokens, on every device; access tokens run out on their own."""
+    try:
+        claims = verify_token(request.data.get("refresh", ""), "refresh")
+    except InvalidToken as e:
+        return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    revoke_tokens(claims["uid"])
+    return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@token_required
+def me(request):
+    # Answered from the signed token alone, without touching the database
+    claims = request.token_claims
+    return Response({"id": claims["uid"], "username": claims["username"]}, status=status.HTTP_200_OK)
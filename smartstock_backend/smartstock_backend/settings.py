@@ -42,14 +42,20 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'api',
+    'authapp',
     'corsheaders',
     'streamlit',
 ]
 
 MIDDLEWARE = [
+    # Outermost, so request timings include every other middleware
+    'api.instrumentation.MetricsMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # ETag / If-None-Match and Last-Modified / If-Modified-Since -> 304
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -82,17 +88,103 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'smartstock_backend.wsgi.application'
+# The market-data and chat views are async; serve them with an ASGI server, e.g.
+#   uvicorn smartstock_backend.asgi:application
+ASGI_APPLICATION = 'smartstock_backend.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default; set DB_ENGINE=postgres (with DB_NAME, DB_USER, DB_PASSWORD,
+# DB_HOST, DB_PORT) for PostgreSQL.
+if os.getenv("DB_ENGINE") == "postgres":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DB_NAME", "smartstock"),
+            'USER': os.getenv("DB_USER", "smartstock"),
+            'PASSWORD': os.getenv("DB_PASSWORD", ""),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", "5432"),
+            # psycopg's connection pool works under ASGI too, where persistent connections do not
+            'OPTIONS': {'pool': True},
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Wait up to 20 s for a lock instead of failing with "database is locked"
+                'timeout': 20,
+                # Take the write lock when a transaction starts, so two writers never
+                # deadlock upgrading read locks (which fails at once, ignoring the timeout)
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets reads run during a write; NORMAL sync is durable at checkpoints
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                ),
+            },
+            # Reuse a thread's connection for a minute; checked before reuse
+            'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+
+# Signed API tokens (see authapp/tokens.py), lifetimes in seconds
+ACCESS_TOKEN_LIFETIME = int(os.getenv("ACCESS_TOKEN_LIFETIME", 15 * 60))
+REFRESH_TOKEN_LIFETIME = int(os.getenv("REFRESH_TOKEN_LIFETIME", 7 * 24 * 60 * 60))
+
+
+# Cache shared by every worker process; set REDIS_URL to use Redis instead of files
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / '.cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+
+# Market data (see api/market.py)
+ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+ALPHA_TIMESERIES_FUNCTION = os.getenv("ALPHA_TIMESERIES_FUNCTION", "TIME_SERIES_DAILY")
+
+# Background refresher (manage.py refresh_prices): its share of the Alpha Vantage quota
+REFRESH_CALLS_PER_MINUTE = int(os.getenv("REFRESH_CALLS_PER_MINUTE", 2))
+REFRESH_CALLS_PER_DAY = int(os.getenv("REFRESH_CALLS_PER_DAY", 12))
+
+# Screener fundamentals table (manage.py build_screener, see api/screener.py) and its share of the quota.
+# One call per symbol: 10 a day fills a ~10,000-stock listing in about three years, so set a premium
+# quota here or build for a short list with --symbols.
+SCREENER_PATH = os.getenv("SCREENER_PATH", BASE_DIR / "screener.npz")
+SCREENER_CALLS_PER_MINUTE = int(os.getenv("SCREENER_CALLS_PER_MINUTE", 2))
+SCREENER_CALLS_PER_DAY = int(os.getenv("SCREENER_CALLS_PER_DAY", 10))
+
+# Chatbot proxy (see api/gemini.py)
+GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
+
+# Prometheus metrics at /metrics/ (see api/instrumentation.py); set a token to require it as a bearer token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 
 # Password validation
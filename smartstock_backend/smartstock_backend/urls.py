@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse
 
+from api import instrumentation
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -33,4 +35,6 @@ urlpatterns = [
         </html>
     """)),
     path('api/', include('authapp.urls')),  # adjust if your app has a different name
+    path('api/', include('api.urls')),  # market data; its signup/login are shadowed by authapp above
+    path('metrics/', instrumentation.metrics),
 ]
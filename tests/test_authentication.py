@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import authentication
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(authentication, "_migrated", False)
+    monkeypatch.setattr(authentication, "_local", type(authentication._local)())
+    # Hashing at full cost would make every test take seconds
+    monkeypatch.setattr(authentication.hash_password, "__defaults__", (None, 1000))
+    return tmp_path
+
+
+def write_legacy(users):
+    with open(authentication.LEGACY_USER_DB, "w") as file:
+        json.dump(users, file)
+
+
+def usernames(conn):
+    return sorted(row[0] for row in conn.execute("SELECT username FROM users"))
+
+
+def test_migrates_once_and_skips_malformed_records(store):
+    write_legacy({
+        "alice": {"email": "a@example.com", "password": "secret"},
+        "bob": {"email": "b@example.com"},
+        "carol": "not a record",
+    })
+    conn = authentication.get_connection()
+    assert usernames(conn) == ["alice"]
+    # No plaintext passwords are left on disk
+    assert not [path.name for path in store.iterdir() if path.name.startswith("users.json")]
+    assert authentication.login("alice", "secret")
+    assert not authentication.login("alice", "wrong")
+
+
+def test_missing_file_counts_as_migrated(store):
+    conn = authentication.get_connection()
+    assert usernames(conn) == []
+    assert authentication._migrated
+
+
+def test_file_migrated_by_another_process_meanwhile(store, monkeypatch):
+    write_legacy({"alice": {"password": "secret"}})
+    read_rows = authentication._legacy_rows
+
+    def rows_then_other_process_migrates():
+        rows = read_rows()
+        (store / "users.json").unlink()
+        return rows
+
+    monkeypatch.setattr(authentication, "_legacy_rows", rows_then_other_process_migrates)
+    conn = authentication.get_connection()
+    assert usernames(conn) == []
+    assert not (store / "users.json").exists()
+
+
+def test_reimport_after_interrupted_delete_keeps_existing_users(store):
+    write_legacy({"alice": {"password": "secret"}})
+    conn = authentication.get_connection()
+    stored = conn.execute("SELECT password_hash FROM users").fetchall()
+    # As if the process died between the commit and the delete
+    write_legacy({"alice": {"password": "other"}, "bob": {"password": "hunter2"}})
+    authentication._migrated = False
+    authentication.migrate_legacy_users(conn)
+    assert usernames(conn) == ["alice", "bob"]
+    assert conn.execute("SELECT password_hash FROM users WHERE username = 'alice'").fetchall() == stored
+    assert not (store / "users.json").exists()
+
+
+def test_leftover_plaintext_from_earlier_builds_is_removed(store):
+    (store / "users.json.migrated").write_text(json.dumps({"alice": {"password": "secret"}}))
+    authentication.get_connection()
+    assert not (store / "users.json.migrated").exists()
+
+
+def test_unreadable_file_is_kept(store):
+    (store / "users.json").write_text("{not json")
+    authentication.get_connection()
+    assert (store / "users.json").read_text() == "{not json"
+
+
+def test_sign_up_rejects_taken_username(store):
+    assert authentication.sign_up("dave", "d@example.com", "pw")
+    assert not authentication.sign_up("dave", "other@example.com", "pw")
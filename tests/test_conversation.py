@@ -0,0 +1,10 @@
+from modules.conversation import ConversationStore, build_context
+
+
+def test_append_turn_keeps_roles_alternating(tmp_path):
+    store = ConversationStore(str(tmp_path / "chat.sqlite3"))
+    store.append_turn("c", "first question", "first answer")
+    store.append_turn("c", "second question", "*(No response.)*")
+    assert [m["role"] for m in store.latest("c", 10)] == ["user", "assistant", "user", "assistant"]
+    assert [turn["role"] for turn in build_context(store, "c")] == ["user", "model", "user", "model"]
+    assert store.count("other") == 0
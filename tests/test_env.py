@@ -0,0 +1,27 @@
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS = (
+    "from modules import env; from modules import backend_client, instrumentation; "
+    "print(instrumentation.METRICS_PORT, instrumentation.METRICS_TOKEN, backend_client.BACKEND_URL)"
+)
+
+
+def test_dotenv_is_loaded_before_settings_are_read(tmp_path):
+    # .env is looked up from the modules directory upwards, so the package is copied next to one
+    shutil.copytree(os.path.join(ROOT, "modules"), tmp_path / "modules", ignore=shutil.ignore_patterns("__pycache__"))
+    (tmp_path / ".env").write_text("METRICS_PORT=9311\nMETRICS_TOKEN=from-dotenv\nSMARTSTOCK_BACKEND_URL=http://backend:8000/\n")
+    env = {name: value for name, value in os.environ.items() if name not in ("METRICS_PORT", "METRICS_TOKEN", "SMARTSTOCK_BACKEND_URL")}
+    env["PYTHONPATH"] = str(tmp_path)
+    result = subprocess.run([sys.executable, "-c", SETTINGS], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["9311", "from-dotenv", "http://backend:8000/"]
+
+
+def test_entry_scripts_import_env_first():
+    for script in ("homepage.py", "app.py"):
+        with open(os.path.join(ROOT, script)) as file:
+            first = next(line for line in file if line.strip() and not line.startswith("#"))
+        assert first.startswith("from modules import env"), script
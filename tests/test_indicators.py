@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+import pytest
+
+from modules import indicators
+
+ALL = [
+    indicators.SMA(5),
+    indicators.EMA(10),
+    indicators.RSI(14),
+    indicators.MACD(),
+    indicators.Bollinger(20),
+    indicators.Volatility(20),
+]
+
+
+def random_walk(days, symbols, seed=0):
+    rng = np.random.default_rng(seed)
+    return 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (days, symbols)), axis=0))
+
+
+def reference_ema(values, alpha, initial=None):
+    result, previous = [], values[0] if initial is None else initial
+    for value in values:
+        previous = alpha * value + (1 - alpha) * previous
+        result.append(previous)
+    return np.array(result)
+
+
+def reference_rsi(prices, period):
+    rsi = [math.nan] * len(prices)
+    changes = np.diff(prices)
+    gain = np.maximum(changes[:period], 0).mean()
+    loss = np.maximum(-changes[:period], 0).mean()
+    for day in range(period, len(prices)):
+        if day > period:
+            change = changes[day - 1]
+            gain = (gain * (period - 1) + max(change, 0)) / period
+            loss = (loss * (period - 1) + max(-change, 0)) / period
+        rsi[day] = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+    return np.array(rsi)
+
+
+def trailing(values, window, reduce):
+    return np.array([reduce(values[day + 1 - window:day + 1]) if day + 1 >= window else math.nan for day in range(len(values))])
+
+
+def test_against_reference_loops():
+    prices = random_walk(300, 1)[:, 0]
+    column = prices[:, None]
+
+    sma = indicators.SMA(5).compute(column)[0]["sma"][:, 0]
+    np.testing.assert_allclose(sma, trailing(prices, 5, np.mean), rtol=1e-9)
+
+    ema = indicators.EMA(10).compute(column)[0]["ema"][:, 0]
+    np.testing.assert_allclose(ema, reference_ema(prices, 2 / 11), rtol=1e-9)
+
+    rsi = indicators.RSI(14).compute(column)[0]["rsi"][:, 0]
+    np.testing.assert_allclose(rsi, reference_rsi(prices, 14), rtol=1e-9)
+
+    bands = indicators.Bollinger(20, 2.0).compute(column)[0]
+    std = trailing(prices, 20, np.std)
+    np.testing.assert_allclose(bands["middle"][:, 0], trailing(prices, 20, np.mean), rtol=1e-9)
+    np.testing.assert_allclose(bands["upper"][:, 0], trailing(prices, 20, np.mean) + 2 * std, rtol=1e-9)
+
+    volatility = indicators.Volatility(20).compute(column)[0]["volatility"][:, 0]
+    returns = np.concatenate([[math.nan], np.diff(np.log(prices))])
+    expected = trailing(returns, 20, lambda window: np.std(window, ddof=1) * math.sqrt(252))
+    np.testing.assert_allclose(volatility, expected, rtol=1e-7)
+
+
+def test_blocked_ema_matches_recursion_over_long_series():
+    # Longer than one block of the closed form, with a fast decay
+    values = random_walk(10_000, 2)
+    for alpha in (2 / 3, 2 / 201):
+        expected = np.column_stack([reference_ema(values[:, i], alpha) for i in range(2)])
+        np.testing.assert_allclose(indicators._ema(values, alpha), expected, rtol=1e-9)
+
+
+class MemoryStore:
+    """``timeseries.load`` stand-in whose symbols gain bars as ``days`` grows."""
+
+    def __init__(self, total_days, symbols=3):
+        self.prices = random_walk(total_days, symbols)
+        self.dates = np.arange(total_days, dtype=np.int32) + 19000
+        self.symbols = [f"S{i}" for i in range(symbols)]
+        self.days = total_days
+
+    def load(self, symbol):
+        i = self.symbols.index(symbol)
+        return {"date": self.dates[:self.days], "adjusted_close": self.prices[:self.days, i]}
+
+
+def assert_matches_full_compute(results, store, indicator):
+    full, _ = indicator.compute(store.prices[:store.days])
+    for i, symbol in enumerate(store.symbols):
+        np.testing.assert_array_equal(results[symbol]["date"], store.dates[:store.days])
+        for name in indicator.outputs:
+            np.testing.assert_allclose(results[symbol][name], full[name][:, i], rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("indicator", ALL, ids=repr)
+def test_incremental_updates_match_full_recompute(indicator):
+    store = MemoryStore(400)
+    cache = indicators.IndicatorCache(loader=store.load)
+    store.days = 300
+    cache.get(store.symbols, indicator)
+
+    # One bar at a time, then a batch of several, all advanced from the saved state
+    for days in (301, 302, 310):
+        store.days = days
+        assert_matches_full_compute(cache.get(store.symbols, indicator), store, indicator)
+    assert cache.stats()["computes"] == 3
+    assert cache.stats()["updates"] == 9
+
+    # Too many new bars for updating: computed again
+    store.days = 310 + indicators.MAX_NEW_BARS + 1
+    assert_matches_full_compute(cache.get(store.symbols, indicator), store, indicator)
+    assert cache.stats()["computes"] == 6
+
+
+def test_hits_and_spare_row_growth():
+    store = MemoryStore(200 + indicators.SPARE_BARS + 10)
+    indicator = indicators.EMA(10)
+    cache = indicators.IndicatorCache(loader=store.load)
+    store.days = 200
+    first = cache.get(store.symbols, indicator)
+    snapshot = {symbol: first[symbol]["ema"].copy() for symbol in store.symbols}
+    assert cache.get(store.symbols, indicator)["S0"]["ema"] is not None
+    assert cache.stats()["hits"] == 3
+
+    # Past the spare rows the buffers are reallocated; series handed out earlier stay as they were
+    for days in range(201, len(store.dates) + 1):
+        store.days = days
+        results = cache.get(store.symbols, indicator)
+    assert_matches_full_compute(results, store, indicator)
+    for symbol in store.symbols:
+        np.testing.assert_array_equal(first[symbol]["ema"], snapshot[symbol])
+    assert cache.stats()["computes"] == 3
+
+
+def test_symbols_with_different_dates_are_computed_apart():
+    store = MemoryStore(120)
+    indicator = indicators.SMA(5)
+
+    def load(symbol):
+        history = store.load(symbol)
+        # S1 skips a day the others traded
+        if symbol == "S1":
+            keep = np.arange(len(history["date"])) != 50
+            return {name: values[keep] for name, values in history.items()}
+        return history
+
+    results = indicators.IndicatorCache(loader=load).get(store.symbols, indicator)
+    assert len(results["S1"]["date"]) == 119
+    skipped = np.delete(store.prices[:, 1], 50)
+    np.testing.assert_allclose(results["S1"]["sma"], trailing(skipped, 5, np.mean), rtol=1e-9)
@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+
+import pytest
+
+from modules import live_quotes
+
+# The scripted SystemExit is how these tests stop the thread
+pytestmark = pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+
+
+@pytest.fixture
+def listener(monkeypatch):
+    """Replace ``_listen`` with a script of exceptions to raise; SystemExit ends the thread quietly."""
+    monkeypatch.setattr(live_quotes, "_watched", OrderedDict())
+    monkeypatch.setattr(live_quotes, "_thread", None)
+    monkeypatch.setattr(live_quotes, "RECONNECT_DELAY", 0)
+    calls = []
+    done = threading.Event()
+
+    def script(*outcomes):
+        def listen(symbols):
+            calls.append(symbols)
+            outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+            if isinstance(outcome, SystemExit):
+                done.set()
+            raise outcome
+        monkeypatch.setattr(live_quotes, "_listen", listen)
+        return calls, done
+    return script
+
+
+def test_errors_back_off_and_reconnect(listener):
+    calls, done = listener(ValueError("bad event"), KeyError("symbol"), SystemExit())
+    live_quotes.watch(["IBM"])
+    assert done.wait(5)
+    assert calls == [["IBM"]] * 3
+
+
+def test_watch_restarts_a_stopped_thread(listener):
+    calls, done = listener(SystemExit())
+    live_quotes.watch(["IBM"])
+    first = live_quotes._thread
+    assert done.wait(5)
+    first.join(5)
+    assert live_quotes._thread is None
+
+    done.clear()
+    live_quotes.watch(["MSFT"])
+    assert done.wait(5)
+    assert calls[-1] == ["IBM", "MSFT"]
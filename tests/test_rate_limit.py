@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from modules.rate_limit import RateLimiter, ThrottledError
+
+LIMITS = {"minute": (5, 60), "day": (25, 24 * 60 * 60)}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    path = str(tmp_path / "buckets.sqlite3") if request.param == "sqlite" else None
+    return RateLimiter(LIMITS, path=path, max_wait=0)
+
+
+def test_tokens_run_out_per_minute(limiter):
+    for _ in range(5):
+        assert limiter._take() == 0
+    assert limiter._take() == pytest.approx(12, abs=0.1)
+
+
+def test_penalize_blocks_for_the_given_seconds(limiter):
+    limiter.penalize(60)
+    assert limiter._take() == pytest.approx(60, abs=1)
+
+
+def test_penalize_keeps_tokens(limiter, monkeypatch):
+    limiter.penalize(60)
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    for _ in range(5):
+        assert limiter._take() == 0
+
+
+def test_acquire_raises_when_wait_exceeds_max(limiter):
+    limiter.penalize(60)
+    with pytest.raises(ThrottledError, match="retry in"):
+        limiter.acquire()
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_day_bucket_limits_after_minutes_pass(limiter, monkeypatch):
+    now = time.time()
+    for minute in range(5):
+        monkeypatch.setattr(time, "time", lambda: now + minute * 60)
+        for _ in range(5):
+            assert limiter._take() == 0
+    monkeypatch.setattr(time, "time", lambda: now + 5 * 60)
+    assert limiter._take() > 60
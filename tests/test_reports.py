@@ -0,0 +1,50 @@
+import os
+import pickle
+import subprocess
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+from modules import report_render, reports
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def job(monkeypatch):
+    jobs = type(reports._jobs)()
+    monkeypatch.setattr(reports, "_jobs", jobs)
+    future = Future()
+    jobs["job"] = future
+    return future
+
+
+def test_job_status_lifecycle(job):
+    assert reports.job_status("missing") == "unknown"
+    assert reports.job_status("job") == "queued"
+    job.set_running_or_notify_cancel()
+    assert reports.job_status("job") == "running"
+    job.set_result(b"%PDF")
+    assert reports.job_status("job") == "done"
+
+
+def test_job_status_failed(job):
+    job.set_exception(RuntimeError("render failed"))
+    assert reports.job_status("job") == "failed"
+
+
+def test_job_status_cancelled(job):
+    job.cancel()
+    assert reports.job_status("job") == "cancelled"
+
+
+def test_workers_import_only_the_renderer():
+    # A job as the pool pickles it, unpickled in a fresh interpreter the way a spawned worker does
+    job = pickle.dumps((report_render.render_report, reports.build_report_data([])))
+    script = (
+        "import pickle, sys; pickle.loads(sys.stdin.buffer.read()); "
+        "print(*sorted(name for name in sys.modules if name.startswith('modules.') or name in ('requests', 'streamlit')))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, input=job, capture_output=True, check=True)
+    assert result.stdout.decode().split() == ["modules.report_render"]
@@ -0,0 +1,52 @@
+import struct
+
+import pytest
+
+from modules import snapshot as snapshot_module
+from modules.snapshot import StockSnapshot
+from modules.stock_cache import QuoteCache
+
+QUOTE = {"Global Quote": {"01. symbol": "AAPL", "05. price": "190.5", "07. latest trading day": "2026-10-16"}}
+OVERVIEW = {"Name": "Apple Inc.", "MarketCapitalization": "2900000000000", "52WeekHigh": "199.6", "52WeekLow": "164.1"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QuoteCache(path=str(tmp_path / "cache.sqlite3"))
+
+
+def stored(cache, record):
+    cache._connect().execute("INSERT INTO snapshots (symbol, record) VALUES (?, ?)", ("AAPL", record))
+    # A fresh cache on the same file, so the record is read from disk
+    return QuoteCache(path=cache.path)
+
+
+def test_snapshot_round_trip(cache):
+    snapshot = StockSnapshot.from_payloads("AAPL", QUOTE, OVERVIEW)
+    cache.put_snapshot(snapshot)
+    assert QuoteCache(path=cache.path).get_snapshot("AAPL") == snapshot
+
+
+def test_new_quote_drops_snapshot(cache):
+    cache.put_snapshot(StockSnapshot.from_payloads("AAPL", QUOTE, OVERVIEW))
+    cache.put("AAPL", "GLOBAL_QUOTE", QUOTE)
+    assert cache.get_snapshot("AAPL") is None
+
+
+@pytest.mark.parametrize("damage", ["version", "truncated", "short"])
+def test_unreadable_record_is_a_miss(cache, damage):
+    record = StockSnapshot.from_payloads("AAPL", QUOTE, OVERVIEW).pack()
+    if damage == "version":
+        record = bytes([snapshot_module.FORMAT_VERSION + 1]) + record[1:]
+    elif damage == "truncated":
+        record = record[:-3]
+    else:
+        record = record[:10]
+    reopened = stored(cache, record)
+    assert reopened.get_snapshot("AAPL") is None
+    assert reopened._connect().execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 0
+
+
+def test_unpack_rejects_short_header():
+    with pytest.raises(struct.error):
+        StockSnapshot.unpack(b"\x01")
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from modules import symbols
+from modules.symbols import SYMBOLS_FILE, SymbolIndex, parse_listing, read_symbols_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = {
+    "AAPL": "Apple Inc.",
+    "GOOGL": "Alphabet Inc. (Google)",
+    "MSFT": "Microsoft Corporation",
+    "NFLX": "Netflix Inc.",
+    "META": "Meta Platforms Inc.",
+    "TSLA": "Tesla Inc.",
+    "IBM": "International Business Machines",
+    "SPY": "SPDR S&P 500 ETF Trust",
+}
+
+
+@pytest.fixture
+def sample():
+    return SymbolIndex(SAMPLE)
+
+
+@pytest.fixture
+def listing():
+    index = SymbolIndex(dict(SAMPLE, APLE="Apple Hospitality REIT Inc", NET="Cloudflare Inc", T="AT&T Inc"))
+    index.complete = True
+    return index
+
+
+@pytest.fixture
+def bundled():
+    """The default index: only the bundled symbols file, so incomplete."""
+    return SymbolIndex(read_symbols_file(os.path.join(ROOT, SYMBOLS_FILE)))
+
+
+@pytest.mark.parametrize("ticker", ["XOM", "ZZZZ", "BRK.B", "xom"])
+def test_incomplete_index_passes_through_unmatched_tickers(sample, ticker):
+    assert sample.resolve(ticker) == ticker.upper()
+    assert not sample.verified(ticker.upper())
+
+
+@pytest.mark.parametrize("query, symbol", [
+    ("Apple", "AAPL"), ("Microsoft", "MSFT"), ("Tesla", "TSLA"), ("nvidia", "NVDA"), ("APPL", "AAPL"), ("MSFTT", "MSFT"),
+])
+def test_default_index_resolves_names_and_typos(bundled, query, symbol):
+    assert not bundled.complete
+    assert bundled.resolve(query) == symbol
+    assert bundled.verified(symbol)
+
+
+def test_incomplete_index_does_not_pass_through_near_misses(bundled):
+    # Several companies fit "A", so it is neither guessed nor sent upstream unverified
+    assert bundled.resolve("A") is None
+    assert bundled.suggest("A")
+
+
+def test_known_ticker_and_exact_name(sample):
+    assert sample.resolve(" aapl ") == "AAPL"
+    assert sample.resolve("Microsoft Corporation") == "MSFT"
+
+
+def test_unique_name_prefix(sample):
+    assert sample.resolve("Microsoft Corp") == "MSFT"
+    assert sample.resolve("International Business") == "IBM"
+
+
+def test_ambiguous_prefix_is_not_guessed(listing):
+    assert listing.resolve("Apple") is None
+    assert listing.suggest("Apple")[:2] == ["APLE", "AAPL"]
+    assert listing.resolve("Apple Inc.") == "AAPL"
+
+
+def test_complete_index_rejects_unknown(listing):
+    assert listing.resolve("NET") == "NET"
+    assert listing.resolve("ZZZZ") is None
+    assert listing.resolve("") is None
+    assert listing.resolve("not a ticker!") is None
+
+
+def test_suggest_typos(listing):
+    assert "AAPL" in listing.suggest("APPL")
+
+
+def test_search_symbols_then_names(listing):
+    assert [symbol for symbol, _ in listing.search("a")] == ["AAPL", "APLE", "GOOGL", "T"]
+
+
+def test_update_replace_drops_unlisted(listing):
+    listing.update({"AAPL": "Apple Inc.", "NVDA": "NVIDIA Corp"}, replace=True)
+    assert set(listing.names) == {"AAPL", "NVDA"}
+    assert listing.resolve("nvidia") == "NVDA"
+    assert listing.search("Tes") == []
+
+
+def test_parsers(tmp_path):
+    path = tmp_path / "symbols.txt"
+    path.write_text("AAPL: Apple Inc.\n\nbad line\nmsft: Microsoft Corporation\n")
+    assert read_symbols_file(str(path)) == {"AAPL": "Apple Inc.", "MSFT": "Microsoft Corporation"}
+    text = "symbol,name,exchange,assetType,ipoDate,delistingDate,status\nAAPL,Apple Inc,NASDAQ,Stock,1980-12-12,null,Active\nOLD,Old Co,NYSE,Stock,1990-01-01,2020-01-01,Delisted\n"
+    assert parse_listing(text) == {"AAPL": "Apple Inc"}
+
+
+def test_is_valid_symbol_rejects_near_misses(monkeypatch, bundled):
+    monkeypatch.setattr(symbols, "get_index", lambda: bundled)
+    assert symbols.is_valid_symbol("AAPL")
+    assert symbols.is_valid_symbol("XOM")
+    assert not symbols.is_valid_symbol("APPL")
+    assert not symbols.is_valid_symbol("APPLE")
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = "from modules import alpha_vantage, timeseries; print(alpha_vantage.quote_cache.path, timeseries.TIMESERIES_DIR)"
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("live", "stock_cache.sqlite3 timeseries_data"),
+    ("replay", "stock_cache.replay.sqlite3 timeseries_data.replay"),
+])
+def test_replay_keeps_to_its_own_caches(tmp_path, mode, expected):
+    # A fresh interpreter, since the caches are chosen at import
+    env = dict(os.environ, ALPHA_TRANSPORT=mode, PYTHONPATH=ROOT)
+    env.pop("ALPHA_REPLAY_CACHE", None)
+    result = subprocess.run([sys.executable, "-c", PATHS], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == expected.split()
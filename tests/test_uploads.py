@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+from io import BytesIO
+
+from PIL import Image
+
+from modules import uploads
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_pillow():
+    script = "import sys; import modules.uploads; print('PIL' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_prepare_image_downscales_once():
+    buffer = BytesIO()
+    Image.new("RGB", (400, 200), "red").save(buffer, format="PNG")
+    first = uploads.prepare_image(buffer.getvalue(), max_side=100)
+    assert (first.mime_type, first.width, first.height) == ("image/jpeg", 100, 50)
+    assert uploads.prepare_image(buffer.getvalue(), max_side=100) is first